@@ -0,0 +1,69 @@
+import numpy as np
+from django.db import transaction
+
+from .bulk import get_batch_size
+
+# Derived weapon columns, written by the weapon_stats import stage
+WEAPON_STATS = ('dps', 'damage_per_magazine', 'time_to_empty', 'dps_percentile')
+
+
+def weapon_stats(damage, capacity, fire_rate, type_codes):
+    """
+    Return {column: array} of the derived stats of weapons given as arrays, in one vectorized pass.
+
+    `fire_rate` is in rounds per minute. A weapon without a fire rate has a
+    DPS and a time to empty of 0. `dps_percentile` is the share of the
+    weapons of the same type code whose DPS is at or below the weapon's,
+    from 0 to 100, so the best of a type is at 100.
+    """
+    damage = np.asarray(damage, dtype=np.float64)
+    capacity = np.asarray(capacity, dtype=np.float64)
+    rounds_per_second = np.asarray(fire_rate, dtype=np.float64) / 60
+    type_codes = np.asarray(type_codes, dtype=np.int64)
+    firing = rounds_per_second > 0
+    dps = np.where(firing, damage * rounds_per_second, 0.0).round(2)
+    time_to_empty = np.divide(capacity, rounds_per_second, out=np.zeros_like(capacity), where=firing).round(2)
+
+    # Rank the DPS within each type through one sorted (type, DPS rank) key
+    _, dps_ranks = np.unique(dps, return_inverse=True)
+    groups = type_codes * (len(dps) + 1)
+    sorted_keys = np.sort(groups + dps_ranks)
+    at_or_below = np.searchsorted(sorted_keys, groups + dps_ranks, side='right') - np.searchsorted(sorted_keys, groups)
+    group_sizes = np.bincount(type_codes, minlength=1)[type_codes]
+    return {
+        'dps': dps,
+        'damage_per_magazine': (damage * capacity).astype(np.int64),
+        'time_to_empty': time_to_empty,
+        'dps_percentile': (100 * at_or_below / np.maximum(group_sizes, 1)).round(2),
+    }
+
+
+def refresh_weapon_stats(model, batch_size=None):
+    """
+    Recompute the derived stats of every weapon of `model` and write the rows whose stats changed.
+
+    Weapons without a type are ranked together. Returns (rows read, rows written).
+    """
+    rows = list(model._base_manager.order_by('pk').values_list(
+        'pk', 'type_id', 'damage', 'capacity', 'fire_rate', *WEAPON_STATS
+    ))
+    if not rows:
+        return 0, 0
+    # Type codes from 1, 0 being the weapons without a type
+    type_ids = sorted({row[1] for row in rows if row[1] is not None})
+    codes = {type_id: code for code, type_id in enumerate(type_ids, 1)}
+    columns = list(zip(*rows))
+    stats = weapon_stats(columns[2], columns[3], columns[4], [codes.get(type_id, 0) for type_id in columns[1]])
+
+    stored = np.array([row[5:] for row in rows], dtype=np.float64)
+    computed = np.column_stack([stats[name] for name in WEAPON_STATS]).astype(np.float64)
+    changed = np.flatnonzero((stored != computed).any(axis=1))
+    objs = []
+    for index in changed:
+        obj = model(pk=rows[index][0])
+        for name in WEAPON_STATS:
+            setattr(obj, name, stats[name][index].item())
+        objs.append(obj)
+    with transaction.atomic():
+        model._base_manager.bulk_update(objs, WEAPON_STATS, batch_size=get_batch_size(batch_size))
+    return len(rows), len(objs)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class BuilderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Helldivers_2_Database.api'
+
+    def ready(self):
+        from .compiled import compile_serializers
+        from . import serializers  # noqa: F401
+
+        compile_serializers()
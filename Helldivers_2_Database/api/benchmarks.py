@@ -0,0 +1,36 @@
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+
+
+def current_commit():
+    """
+    Return the git commit the benchmark runs at, or None outside of a git checkout.
+    """
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+@contextmanager
+def throwaway_database(keepdb=False):
+    """
+    Run the block against a freshly migrated test database instead of the configured one.
+
+    API snapshots rendered by imports in the block go to a temporary directory as well.
+    """
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb, serialize=False)
+    try:
+        with tempfile.TemporaryDirectory() as snapshot_dir, override_settings(API_SNAPSHOT_DIR=snapshot_dir):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
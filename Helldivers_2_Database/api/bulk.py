@@ -0,0 +1,195 @@
+from django.conf import settings
+from django.db import connections, router
+
+from .pgcopy import copy_upsert
+
+LOADERS = ('orm', 'copy')
+
+
+def get_batch_size(batch_size=None):
+    """
+    Return the batch size to use for bulk writes, falling back to settings.IMPORT_BATCH_SIZE.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'IMPORT_BATCH_SIZE', 500)
+    if batch_size <= 0:
+        raise ValueError("Batch size must be a positive integer.")
+    return batch_size
+
+
+def chunked(items, size):
+    """
+    Yield successive lists of at most `size` items.
+    """
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def get_loader(loader=None):
+    """
+    Return the loader to use for bulk writes, falling back to settings.IMPORT_LOADER.
+    """
+    if loader is None:
+        loader = getattr(settings, 'IMPORT_LOADER', 'orm')
+    if loader not in LOADERS:
+        raise ValueError(f"Unknown import loader {loader!r}, expected one of {', '.join(LOADERS)}.")
+    return loader
+
+
+def bulk_upsert(model, objs, update_fields=None, batch_size=None, loader=None):
+    """
+    Insert or update model instances keyed on their primary key, one batch at a time.
+
+    Each batch costs one query to find the existing primary keys and one
+    INSERT ... ON CONFLICT DO UPDATE. Backends that cannot update on conflict
+    fall back to bulk_update for existing rows and bulk_create for new ones.
+    With the 'copy' loader on PostgreSQL the rows are streamed through
+    copy_upsert() instead; other backends keep using the ORM path.
+    Returns a (created, updated) tuple.
+    """
+    batch_size = get_batch_size(batch_size)
+    opts = model._meta
+    if update_fields is None:
+        update_fields = [field.name for field in opts.concrete_fields if not field.primary_key]
+    connection = connections[router.db_for_write(model)]
+    if get_loader(loader) == 'copy' and connection.vendor == 'postgresql':
+        return copy_upsert(model, objs, update_fields=update_fields)
+    can_upsert = connection.features.supports_update_conflicts_with_target
+
+    created = updated = 0
+    for batch in chunked(objs, batch_size):
+        existing = set(
+            model._base_manager.filter(pk__in=[obj.pk for obj in batch]).values_list('pk', flat=True)
+        )
+        if can_upsert:
+            model._base_manager.bulk_create(
+                batch,
+                update_conflicts=True,
+                update_fields=update_fields,
+                unique_fields=[opts.pk.name],
+            )
+        else:
+            to_update = [obj for obj in batch if obj.pk in existing]
+            to_create = [obj for obj in batch if obj.pk not in existing]
+            if to_update and update_fields:
+                model._base_manager.bulk_update(to_update, update_fields)
+            if to_create:
+                model._base_manager.bulk_create(to_create)
+        updated += len(existing)
+        created += len(batch) - len(existing)
+    return created, updated
+
+
+def sync_m2m(model, field_name, links, batch_size=None):
+    """
+    Make the many-to-many `field_name` of `model` match `links` for the given source rows.
+
+    `links` maps a source primary key to the target primary keys it should be
+    linked to; sources that are not in `links` are left untouched. The current
+    rows of the through table are read once, diffed against the desired set and
+    only the difference is written, so re-applying the same links touches no rows.
+    Unknown target keys are skipped. Returns an (added, removed, missing) tuple
+    where `missing` is a list of (source, target) pairs.
+    """
+    batch_size = get_batch_size(batch_size)
+    field = model._meta.get_field(field_name)
+    through = field.remote_field.through
+    source_column = field.m2m_field_name() + '_id'
+    target_column = field.m2m_reverse_field_name() + '_id'
+    target_model = field.related_model
+
+    wanted_targets = {target for targets in links.values() for target in targets}
+    known_targets = set()
+    for batch in chunked(wanted_targets, batch_size):
+        known_targets.update(target_model._base_manager.filter(pk__in=batch).values_list('pk', flat=True))
+
+    desired = set()
+    missing = []
+    for source, targets in links.items():
+        for target in targets:
+            if target in known_targets:
+                desired.add((source, target))
+            else:
+                missing.append((source, target))
+
+    existing = {}
+    for batch in chunked(links, batch_size):
+        rows = through._base_manager.filter(**{f'{source_column}__in': batch}).values_list(
+            'pk', source_column, target_column
+        )
+        for pk, source, target in rows:
+            existing[(source, target)] = pk
+
+    to_remove = [pk for pair, pk in existing.items() if pair not in desired]
+    to_add = [
+        through(**{source_column: source, target_column: target})
+        for source, target in desired if (source, target) not in existing
+    ]
+    if to_remove:
+        through._base_manager.filter(pk__in=to_remove).delete()
+    if to_add:
+        through._base_manager.bulk_create(to_add, batch_size=batch_size)
+    return len(to_add), len(to_remove), missing
+
+
+class ForeignKeyResolver:
+    """
+    Resolve foreign keys against lookup tables that are loaded once into memory.
+
+    Every lookup table is read with a single query the first time it is needed.
+    References that cannot be resolved are collected and reported together by
+    report() instead of one warning per record.
+    """
+
+    def __init__(self):
+        self._lookups = {}
+        self.missing = {}
+
+    def _lookup(self, model, field):
+        key = (model, field)
+        if key not in self._lookups:
+            self._lookups[key] = dict(model._base_manager.values_list(field, 'pk'))
+        return self._lookups[key]
+
+    def resolve(self, model, value, referrer, field='pk'):
+        """
+        Return the primary key of the `model` row whose `field` equals `value`, or None if there is none.
+        """
+        lookup = self._lookup(model, field)
+        if value in lookup:
+            return lookup[value]
+        self.record_missing(model, value, referrer)
+        return None
+
+    def resolve_or_create(self, model, field, values):
+        """
+        Return a {value: pk} mapping for `field`, creating rows for unknown values in one batch.
+        """
+        lookup = self._lookup(model, field)
+        new_objs = [model(**{field: value}) for value in dict.fromkeys(values) if value not in lookup]
+        if new_objs:
+            model._base_manager.bulk_create(new_objs)
+            if any(obj.pk is None for obj in new_objs):
+                # The backend could not return the new primary keys, read them back
+                del self._lookups[(model, field)]
+                lookup = self._lookup(model, field)
+            else:
+                lookup.update((getattr(obj, field), obj.pk) for obj in new_objs)
+        return lookup
+
+    def record_missing(self, model, value, referrer):
+        self.missing.setdefault((model._meta.verbose_name, value), []).append(referrer)
+
+    def report(self, log=print):
+        """
+        Write one summary of every reference that could not be resolved through `log`.
+        """
+        if not self.missing:
+            return
+        log(f"Warning: {len(self.missing)} missing references:")
+        for (model_name, value), referrers in self.missing.items():
+            shown = ', '.join(str(referrer) for referrer in referrers[:5])
+            if len(referrers) > 5:
+                shown += ', ...'
+            log(f"  {model_name} {value!r} referenced by {len(referrers)} record(s): {shown}")
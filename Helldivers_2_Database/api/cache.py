@@ -0,0 +1,183 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import DatasetVersion
+
+VERSION_KEY = 'hd2:dataset-state'
+COUNTER_KEYS = {
+    'hits': 'hd2:response-cache:hits',
+    'misses': 'hd2:response-cache:misses',
+}
+MISSING = object()
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def dataset_state():
+    """
+    Return the current (dataset version, time it was bumped), from the cache when another request looked it up recently.
+
+    The time is None until the first import.
+    """
+    cache = get_cache()
+    state = cache.get(VERSION_KEY)
+    if state is None:
+        state = DatasetVersion.objects.filter(pk=1).values_list('version', 'updated_at').first() or (0, None)
+        cache.set(VERSION_KEY, tuple(state), settings.API_CACHE_VERSION_TIMEOUT)
+    return tuple(state)
+
+
+def dataset_version():
+    return dataset_state()[0]
+
+
+def bump_dataset_version():
+    """
+    Record that the catalog changed and return the new (dataset version, time it was bumped).
+
+    Cached responses of older versions are no longer looked up. With a cache
+    shared between processes (file, Redis...) they are dropped at once;
+    processes with their own local-memory cache see the new version within
+    API_CACHE_VERSION_TIMEOUT seconds.
+    """
+    DatasetVersion.objects.get_or_create(pk=1)
+    DatasetVersion.objects.filter(pk=1).update(version=F('version') + 1, updated_at=timezone.now())
+    state = tuple(DatasetVersion.objects.values_list('version', 'updated_at').get(pk=1))
+    # Inside a transaction, readers must not look for the new version before it is committed
+    transaction.on_commit(lambda: get_cache().set(VERSION_KEY, state, settings.API_CACHE_VERSION_TIMEOUT))
+    return state
+
+
+def response_cache_key(request, version):
+    # The absolute URI covers the host and scheme that end up in pagination links
+    uri = request.build_absolute_uri()
+    return f'hd2:response:{version}:{hashlib.sha256(uri.encode()).hexdigest()}'
+
+
+def _count(name):
+    cache = get_cache()
+    key = COUNTER_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def response_cache_stats():
+    """
+    Return the hit and miss counters of the response cache along with the current dataset version.
+    """
+    counters = get_cache().get_many(COUNTER_KEYS.values())
+    stats = {name: counters.get(key, 0) for name, key in COUNTER_KEYS.items()}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else None
+    stats['dataset_version'] = dataset_version()
+    return stats
+
+
+def reset_response_cache_stats():
+    get_cache().delete_many(COUNTER_KEYS.values())
+
+
+class ResponseCacheMixin:
+    """
+    Answer list and detail requests from Django's cache while the dataset version is unchanged.
+
+    Responses are keyed on the absolute URI (path and query string) and the
+    dataset version that the importer bumps, so an import makes every cached
+    response unreachable. The serialized data is cached rather than rendered
+    bytes, so content negotiation still happens per request. Authentication
+    and permissions are checked before the cache is looked up.
+    """
+
+    response_cache = True
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not (settings.API_RESPONSE_CACHE and self.response_cache):
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = response_cache_key(request, dataset_version())
+        data = cache.get(key, MISSING)
+        if data is not MISSING:
+            _count('hits')
+            return Response(data)
+        _count('misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        return response
+
+
+def response_etag(request, version):
+    # Strong: the same version, URI and renderer always produce the same bytes
+    variant = f'{version}:{request.build_absolute_uri()}:{request.accepted_media_type}'
+    return '"%s"' % hashlib.sha256(variant.encode()).hexdigest()[:32]
+
+
+def encoded_etag(etag, encoding):
+    # Each content coding is a different representation, so a strong ETag must differ too
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def not_modified(request, etag, last_modified):
+    """
+    Return whether the client's copy, described by If-None-Match or else If-Modified-Since, is current.
+
+    The copy may be in any content coding of the same response.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        etags = [tag[2:] if tag.startswith('W/') else tag for tag in parse_etags(if_none_match)]
+        return any(tag in ('*', etag) or tag.startswith(etag[:-1] + '-') for tag in etags)
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since'))
+    return last_modified is not None and if_modified_since is not None and last_modified <= if_modified_since
+
+
+class ConditionalGetMixin:
+    """
+    Tag list and detail responses with an ETag and Last-Modified from the dataset version, and answer 304 when unchanged.
+
+    The check only needs the (cached) dataset version, so an unchanged poll
+    is answered before any queryset is evaluated or serialized. Permissions
+    and content negotiation have already run, and the negotiated media type
+    is part of the ETag.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        version, updated_at = dataset_state()
+        etag = response_etag(request, version)
+        last_modified = int(updated_at.timestamp()) if updated_at is not None else None
+        if not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        encoding = response.get('Content-Encoding')
+        response['ETag'] = encoded_etag(etag, encoding) if encoding else etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,649 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+from .cache import dataset_state
+from .fastpath import values_serializer
+from .mixins import related_ordering
+from .pagination import cursor_columns
+
+MAGIC = b'HD2COLS1'
+CATALOG_NAME = 'catalog.bin'
+# Buffers start on a multiple of 8 bytes, so every array can be cast in place
+ALIGNMENT = 8
+# Comparisons StoredRows.filter() understands, as in QuerySet.filter()
+LOOKUPS = ('exact', 'gt', 'gte', 'lt', 'lte')
+# Key of the row index in the dicts of StoredRows, never a column name
+ROW = object()
+
+
+class Unsupported(Exception):
+    pass
+
+
+def catalog_models():
+    """
+    Return the models of the router's viewsets, in registration order.
+    """
+    from .urls import router
+
+    return list(dict.fromkeys(viewset.queryset.model for _, viewset, _ in router.registry))
+
+
+def column_kind(field):
+    # Array typecode of a concrete column: 's' string IDs and 'r' row indexes are stored as 'i', -1 standing for NULL
+    if field.is_relation:
+        return 'r'
+    internal_type = field.get_internal_type()
+    if internal_type in ('CharField', 'TextField'):
+        return 's'
+    if internal_type == 'FloatField':
+        return 'd'
+    if internal_type == 'BooleanField':
+        return 'b'
+    if internal_type in ('AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField'):
+        return 'q'
+    raise Unsupported(f'{field.model.__name__}.{field.name}')
+
+
+def pk_position(fields):
+    return next(index for index, field in enumerate(fields) if field.primary_key)
+
+
+def bisect(key, value, low, high, right=False):
+    """
+    Return the first index of [low, high) whose key is at or above `value`, or above it when `right`.
+
+    Keys must be sorted over the range, as for bisect.bisect_left(), whose
+    `key` argument Python only has from 3.10.
+    """
+    while low < high:
+        middle = (low + high) // 2
+        current = key(middle)
+        if current < value or right and current == value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class CatalogWriter:
+    """
+    Write the catalog tables to one read-only file of typed arrays, for CatalogStore.
+
+    Rows are stored in primary key order, one array per column. Strings
+    (names, descriptions...) are interned: each distinct string is stored
+    once and columns hold its index in the table of strings. Foreign keys
+    are stored as the row index of their target, and many-to-many relations
+    as CSR arrays (per row, an offset into one array of target row indexes,
+    in the related model's ordering), both ways.
+
+    Each column also gets its sort permutation, the row indexes in the
+    order of `ORDER BY column, pk`, and its inverse. Both orders are the
+    database's, with its collation and its place for NULLs, so the store
+    sorts and compares rows as the database would.
+    """
+
+    def __init__(self, models):
+        self.tables = {}
+        for model in models:
+            fields = list(model._meta.concrete_fields)
+            rows = list(model._base_manager.order_by('pk').values_list(*(field.attname for field in fields)))
+            self.tables[model._meta.label_lower] = (model, fields, rows)
+
+    def build(self):
+        """
+        Return the (header, buffers) of the file.
+        """
+        strings = sorted({
+            value for model, fields, rows in self.tables.values()
+            for position, field in enumerate(fields) if column_kind(field) == 's'
+            for value in (row[position] for row in rows) if value is not None
+        })
+        string_ids = {value: index for index, value in enumerate(strings)}
+        row_indexes = {
+            label: {row[pk_position(fields)]: index for index, row in enumerate(rows)}
+            for label, (model, fields, rows) in self.tables.items()
+        }
+        buffers = []
+
+        def add(data):
+            buffers.append(data)
+            return len(buffers) - 1
+
+        encoded = [value.encode() for value in strings]
+        offsets = array('q', [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        header = {'strings': {'count': len(strings), 'offsets': add(offsets), 'data': add(b''.join(encoded))}}
+
+        tables = header['tables'] = {}
+        for label, (model, fields, rows) in self.tables.items():
+            table = tables[label] = {'count': len(rows), 'columns': {}, 'many': {}}
+            for position, field in enumerate(fields):
+                kind = column_kind(field)
+                values = [row[position] for row in rows]
+                column = table['columns'][field.attname] = {'kind': kind}
+                if kind == 'r':
+                    target = row_indexes[field.related_model._meta.label_lower]
+                    column['to'] = field.related_model._meta.label_lower
+                    column['values'] = add(array('i', (-1 if value is None else target[value] for value in values)))
+                elif kind == 's':
+                    column['values'] = add(array('i', (-1 if value is None else string_ids[value] for value in values)))
+                else:
+                    column['values'] = add(array(kind, (0 if value is None else value for value in values)))
+                    if any(value is None for value in values):
+                        column['nulls'] = add(array('b', (value is None for value in values)))
+                self.order(model, field, values, row_indexes[label], string_ids, column, add)
+            for field in model._meta.many_to_many:
+                table['many'][field.name] = self.many(field, row_indexes, add)
+        return header, buffers
+
+    def order(self, model, field, values, row_indexes, string_ids, column, add):
+        if field.primary_key:
+            order = range(len(values))
+        else:
+            pks = model._base_manager.order_by(field.attname, 'pk').values_list('pk', flat=True)
+            order = [row_indexes[pk] for pk in pks]
+        positions = array('i', [0]) * len(order)
+        for position, row in enumerate(order):
+            positions[row] = position
+        column['order'] = add(array('i', order))
+        column['positions'] = add(positions)
+        # NULLs come first or last depending on the database, the other values between these positions
+        nulls = sum(value is None for value in values)
+        column['nonnull'] = [nulls, len(values)] if nulls and values[order[0]] is None else [0, len(values) - nulls]
+        if column['kind'] == 's':
+            # Distinct strings and the range of positions of each, to place a value without comparing strings
+            runs = {}
+            for position, row in enumerate(order):
+                if values[row] is not None:
+                    runs.setdefault(string_ids[values[row]], [position, position])[1] = position + 1
+            column['strings'] = add(array('i', sorted(runs)))
+            column['runs'] = add(array('i', (bound for string in sorted(runs) for bound in runs[string])))
+
+    def many(self, field, row_indexes, add):
+        source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+        ordering = [f'{target}__{name}' for name in related_ordering(field.related_model)]
+        links = field.remote_field.through._base_manager.order_by(*ordering).values_list(
+            f'{source}_id', f'{target}_id'
+        )
+        sources = row_indexes[field.model._meta.label_lower]
+        targets = row_indexes[field.related_model._meta.label_lower]
+        per_row = [[] for _ in range(len(sources))]
+        for source_pk, target_pk in links:
+            per_row[sources[source_pk]].append(targets[target_pk])
+        per_target = [[] for _ in range(len(targets))]
+        for row, row_targets in enumerate(per_row):
+            for target in row_targets:
+                per_target[target].append(row)
+        return {
+            'to': field.related_model._meta.label_lower,
+            'offsets': add(self.offsets(per_row)),
+            'targets': add(array('i', (target for row_targets in per_row for target in row_targets))),
+            'source_offsets': add(self.offsets(per_target)),
+            'sources': add(array('i', (row for sources in per_target for row in sources))),
+        }
+
+    def offsets(self, lists):
+        offsets = array('q', [0])
+        for items in lists:
+            offsets.append(offsets[-1] + len(items))
+        return offsets
+
+    def write(self, path):
+        """
+        Write the file to `path` and return its size in bytes.
+
+        Arrays are in the machine's byte order: the file is read by the processes of the host that wrote it.
+        """
+        header, buffers = self.build()
+        body = []
+        position = 0
+        for index, data in enumerate(buffers):
+            data = data.tobytes() if isinstance(data, array) else data
+            padding = -position % ALIGNMENT
+            body.append(b'\0' * padding + data)
+            position += padding
+            buffers[index] = [position, len(data)]
+            position += len(data)
+        header['buffers'] = buffers
+        encoded = json.dumps(header, separators=(',', ':')).encode()
+        start = len(MAGIC) + 8 + len(encoded)
+        with open(path, 'wb') as file:
+            file.write(MAGIC + struct.pack('<Q', len(encoded)) + encoded + b'\0' * (-start % ALIGNMENT))
+            file.write(b''.join(body))
+            return file.tell()
+
+
+def write_catalog(path):
+    """
+    Write the catalog of the router's models to `path`, see CatalogWriter.
+    """
+    return CatalogWriter(catalog_models()).write(path)
+
+
+class Column:
+    """
+    One stored column, read in place from the mapped file.
+    """
+
+    def __init__(self, store, spec):
+        self.store = store
+        self.kind = spec['kind']
+        self.values = store.buffer(spec['values'], 'i' if self.kind in 'rs' else self.kind)
+        self.nulls = store.buffer(spec['nulls'], 'b') if 'nulls' in spec else None
+        self.order = store.buffer(spec['order'], 'i')
+        self.positions = store.buffer(spec['positions'], 'i')
+        self.nonnull = tuple(spec['nonnull'])
+        if self.kind == 's':
+            self.strings = store.buffer(spec['strings'], 'i')
+            self.runs = store.buffer(spec['runs'], 'i')
+
+    def __call__(self, row):
+        if self.kind in 'rs':
+            value = self.values[row]
+            if value < 0:
+                return None
+            return self.store.string(value) if self.kind == 's' else value
+        if self.nulls is not None and self.nulls[row]:
+            return None
+        value = self.values[row]
+        return bool(value) if self.kind == 'b' else value
+
+    def bounds(self, value):
+        """
+        Return the positions in `order` of the first value at or above `value` and of the first one above it.
+
+        Returns None for a value the column doesn't hold when only the
+        database's collation could place it: a string, or the row index of
+        a foreign key target that doesn't exist (None).
+        """
+        low, high = self.nonnull
+        if self.kind == 's':
+            strings = self.store.strings
+            index = bisect(self.store.string, value, 0, strings)
+            if index == strings or self.store.string(index) != value:
+                return None
+            at = bisect(self.strings.__getitem__, index, 0, len(self.strings))
+            if at == len(self.strings) or self.strings[at] != index:
+                return None
+            return self.runs[2 * at], self.runs[2 * at + 1]
+        if value is None:
+            return None
+        # Row indexes of foreign keys are in the order of the target's primary key, as the column's values
+        read = self.values.__getitem__ if self.kind == 'r' else self
+
+        def key(position):
+            return read(self.order[position])
+        return bisect(key, value, low, high), bisect(key, value, low, high, right=True)
+
+
+class StoredTable:
+    """
+    The rows of one model in a CatalogStore.
+    """
+
+    def __init__(self, store, model, spec):
+        self.store = store
+        self.model = model
+        self.count = spec['count']
+        self.columns = {name: Column(store, column) for name, column in spec['columns'].items()}
+        self.many = {
+            name: (
+                store.buffer(many['offsets'], 'q'), store.buffer(many['targets'], 'i'), many['to'],
+                store.buffer(many['source_offsets'], 'q'), store.buffer(many['sources'], 'i'),
+            )
+            for name, many in spec['many'].items()
+        }
+        self.pk = model._meta.pk.attname
+        self.getters = {}
+
+    def getter(self, path):
+        """
+        Return a function of a row index giving the value .values(path) would, following foreign keys.
+        """
+        if path not in self.getters:
+            name, _, rest = path.partition('__')
+            if name == 'pk':
+                name = self.pk
+            field = self.model._meta.get_field(name)
+            if field.many_to_many or not field.concrete:
+                raise Unsupported(path)
+            column = self.columns[field.attname]
+            if field.is_relation:
+                target = self.store.tables[field.related_model._meta.label_lower]
+                inner = target.getter(rest or target.pk)
+
+                def getter(row):
+                    target_row = column(row)
+                    return None if target_row is None else inner(target_row)
+            elif rest:
+                raise Unsupported(path)
+            else:
+                getter = column
+            self.getters[path] = getter
+        return self.getters[path]
+
+    def find(self, pk):
+        """
+        Return the row index of a primary key, or None.
+        """
+        column = self.columns[self.pk]
+        bounds = column.bounds(pk)
+        if bounds is None or bounds[0] == bounds[1]:
+            return None
+        return column.order[bounds[0]]
+
+    def targets(self, name, row):
+        offsets, targets = self.many[name][:2]
+        return targets[offsets[row]:offsets[row + 1]]
+
+    def sources(self, name, target_row):
+        """
+        Return the row indexes linked to the row `target_row` of the related table by the many-to-many `name`.
+        """
+        offsets, sources = self.many[name][3:]
+        return sources[offsets[target_row]:offsets[target_row + 1]]
+
+
+class StoredRows:
+    """
+    The part of the QuerySet API that filter backends and paginators use, over the rows of a StoredTable.
+
+    Rows come out as dicts of the `columns`, like a .values() queryset, in
+    primary key order unless ordered otherwise. A filter narrows the rows
+    to the positions of a column's sort permutation that match, found by
+    binary search, and an ordering reads the rows in the permutation of its
+    column, so neither compares the rows one by one. Filters and orderings
+    that the store can't evaluate raise Unsupported.
+    """
+
+    ordered = True
+
+    def __init__(self, table, columns, matched=None, column=None, descending=False, window=None):
+        self.table = table
+        self.model = table.model
+        self.columns = columns
+        # The rows left by filters on other columns than the ordering, None for all of them
+        self.matched = matched
+        self.column = column or table.columns[table.pk]
+        self.descending = descending
+        # The positions of the ordering column's permutation left by filters on that column
+        self.window = window or (0, table.count)
+        self.rows = None
+
+    def _clone(self, **kwargs):
+        state = dict(matched=self.matched, column=self.column, descending=self.descending, window=self.window)
+        state.update(kwargs)
+        return StoredRows(self.table, self.columns, **state)
+
+    def _bounds(self, path, value):
+        # The column of a lookup and the positions of its permutation that match
+        name, _, lookup = path.partition('__')
+        if lookup not in LOOKUPS + ('',):
+            raise Unsupported(path)
+        column = self.table.columns[self._field(name).attname]
+        bounds = column.bounds(value)
+        if bounds is None:
+            if lookup not in ('', 'exact'):
+                raise Unsupported(path)
+            return column, (0, 0)
+        low, high = column.nonnull
+        return column, {
+            '': bounds,
+            'exact': bounds,
+            'gt': (bounds[1], high),
+            'gte': (bounds[0], high),
+            'lt': (low, bounds[0]),
+            'lte': (low, bounds[1]),
+        }[lookup]
+
+    def _field(self, name):
+        return self.model._meta.get_field(self.table.pk if name == 'pk' else name)
+
+    def filter(self, **lookups):
+        matched, window = self.matched, self.window
+        for path, value in lookups.items():
+            field = self._field(path.partition('__')[0])
+            if field.many_to_many:
+                if path != field.name and path != f'{field.name}__exact':
+                    raise Unsupported(path)
+                target = self.table.store.tables[field.related_model._meta.label_lower]
+                target_row = target.find(field.target_field.to_python(value))
+                rows = set() if target_row is None else set(self.table.sources(field.name, target_row))
+            else:
+                if field.is_relation:
+                    target = self.table.store.tables[field.related_model._meta.label_lower]
+                    value = target.find(field.target_field.to_python(value))
+                else:
+                    value = field.to_python(value)
+                column, (low, high) = self._bounds(path, value)
+                if column is self.column:
+                    window = (max(window[0], low), min(window[1], high))
+                    continue
+                rows = set(column.order[low:high])
+            matched = rows if matched is None else matched & rows
+        return self._clone(matched=matched, window=window)
+
+    def order_by(self, *fields):
+        # One column, or one column then the primary key in the same direction, as the cursor paginator orders
+        names = [field.lstrip('-') for field in fields]
+        descending = {field.startswith('-') for field in fields}
+        if not 1 <= len(fields) <= 2 or len(descending) > 1 or names[1:] not in ([], ['pk'], [self.table.pk]):
+            raise Unsupported(', '.join(fields))
+        column = self.table.columns[self._field(names[0]).attname]
+        matched = self.matched
+        if self.window != (0, self.table.count):
+            rows = set(self.column.order[self.window[0]:self.window[1]])
+            matched = rows if matched is None else matched & rows
+        return self._clone(matched=matched, column=column, descending=descending.pop(), window=None)
+
+    def indexes(self):
+        """
+        Return the row indexes, in order.
+        """
+        if self.rows is None:
+            low, high = self.window
+            if self.matched is None:
+                rows = self.column.order[low:high] if low < high else []
+            else:
+                positions = self.column.positions
+                rows = [row for row in self.matched if low <= positions[row] < high]
+                rows.sort(key=positions.__getitem__)
+            self.rows = rows[::-1] if self.descending else rows
+        return self.rows
+
+    def row(self, index):
+        values = {column: self.table.getter(column)(index) for column in self.columns}
+        values[ROW] = index
+        return values
+
+    def count(self):
+        return len(self.indexes())
+
+    def __len__(self):
+        return len(self.indexes())
+
+    def __iter__(self):
+        return (self.row(index) for index in self.indexes())
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.row(index) for index in self.indexes()[key]]
+        return self.row(self.indexes()[key])
+
+
+class CatalogStore:
+    """
+    A catalog file written by CatalogWriter, mapped read-only into memory.
+
+    The pages of the file are shared by every process mapping it, and read
+    in place: no table is copied or decoded when the store is opened.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mmap)
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} is not a catalog file.')
+        (length,) = struct.unpack_from('<Q', view, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(bytes(view[start:start + length]))
+        start += length
+        self.body = view[start + -start % ALIGNMENT:]
+        self.buffers = header['buffers']
+        strings = header['strings']
+        self.strings = strings['count']
+        self.string_offsets = self.buffer(strings['offsets'], 'q')
+        self.string_data = self.buffer(strings['data'], 'B')
+        models = {model._meta.label_lower: model for model in catalog_models()}
+        self.tables = {}
+        for label, table in header['tables'].items():
+            if label in models:
+                self.tables[label] = StoredTable(self, models[label], table)
+
+    def buffer(self, index, typecode):
+        offset, length = self.buffers[index]
+        return self.body[offset:offset + length].cast(typecode)
+
+    def string(self, index):
+        return str(self.string_data[self.string_offsets[index]:self.string_offsets[index + 1]], 'utf-8')
+
+    def table(self, model):
+        return self.tables.get(model._meta.label_lower)
+
+    def rows(self, serializer, *extra):
+        """
+        Return the StoredRows of a ValuesSerializer's model with its columns and the `extra` ones.
+        """
+        return StoredRows(self.table(serializer.model), list(dict.fromkeys((*serializer.columns, *extra))))
+
+    def related(self, serializer, rows):
+        """
+        Return the many-to-many items of `rows` as ValuesSerializer.related() would, from the store.
+        """
+        table = self.table(serializer.model)
+        pk = serializer.columns[0]
+        related = {}
+        for kind, name, spec in serializer.fields:
+            if kind == 'many':
+                field_name, _, _, nested, _ = spec
+                target = self.tables[table.many[field_name][2]]
+                # Nested columns are paths from the through table, e.g. environmental__name
+                getters = [
+                    (nested_name, target.getter(column.split('__', 1)[1]), convert)
+                    for nested_name, column, convert in nested
+                ]
+                links = related[name] = {}
+                for row in rows:
+                    links[row[pk]] = [
+                        nested_item(getters, target_row) for target_row in table.targets(field_name, row[ROW])
+                    ]
+        return related
+
+
+def nested_item(getters, row):
+    item = {}
+    for name, getter, convert in getters:
+        value = getter(row)
+        item[name] = None if value is None else convert(value)
+    return item
+
+
+_store = (None, None)
+_store_lock = threading.Lock()
+
+
+def catalog_store():
+    """
+    Return the CatalogStore of the current dataset version, or None when it has no catalog file.
+
+    The file is mapped on the first request after an import; processes
+    still on the previous version keep reading its file until they see the bump.
+    A version whose file isn't written yet (a shadow import renders it after
+    the swap) is looked up again on the next request.
+    """
+    global _store
+    if not (settings.API_CATALOG_STORE and settings.API_SNAPSHOT_DIR):
+        return None
+    state = dataset_state()
+    if state[1] is None:
+        return None
+    if _store[0] != state:
+        from .snapshots import snapshot_dir
+
+        with _store_lock:
+            if _store[0] != state:
+                path = os.path.join(snapshot_dir(state), CATALOG_NAME)
+                if not os.path.exists(path):
+                    return None
+                _store = (state, CatalogStore(path))
+    return _store[1]
+
+
+class CatalogStoreMixin:
+    """
+    Answer list and detail requests from the catalog file of the current dataset version, without the database.
+
+    The viewset's filters, ordering, pagination and fieldset apply as they
+    would on the database, and the output is the same: rows are sorted and
+    compared in the orders the database gave when the file was written.
+    Serializers that the values() path doesn't support, filters and
+    orderings the store can't evaluate (e.g. a range from a string the
+    column doesn't hold) and versions without a catalog file are answered
+    from the database.
+    """
+
+    serve_catalog = True
+
+    def get_queryset(self):
+        # Unordered lists come in primary key order from the database too, so pages agree whichever answers
+        queryset = super().get_queryset()
+        return queryset if queryset.ordered else queryset.order_by('pk')
+
+    def stored_serializer(self):
+        store = catalog_store() if self.serve_catalog else None
+        if store is None:
+            return None, None
+        serializer = values_serializer(self.get_serializer_class(), **self.get_fieldset())
+        if serializer is None or store.table(serializer.model) is None:
+            return None, None
+        return store, serializer
+
+    def list(self, request, *args, **kwargs):
+        store, serializer = self.stored_serializer()
+        if store is None:
+            return super().list(request, *args, **kwargs)
+        try:
+            rows = self.filter_queryset(store.rows(serializer, *cursor_columns(self)))
+            page = self.paginate_queryset(rows)
+        except Unsupported:
+            return super().list(request, *args, **kwargs)
+        rows = list(rows) if page is None else page
+        data = serializer.serialize(rows, store.related(serializer, rows))
+        return Response(data) if page is None else self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        store, serializer = self.stored_serializer()
+        if store is None:
+            return super().retrieve(request, *args, **kwargs)
+        rows = store.rows(serializer)
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            row = rows.table.find(serializer.model._meta.pk.to_python(pk))
+        except (DjangoValidationError, TypeError, ValueError):
+            row = None
+        if row is None:
+            raise Http404
+        rows = [rows.row(row)]
+        return Response(serializer.serialize(rows, store.related(serializer, rows))[0])
@@ -0,0 +1,146 @@
+from collections import OrderedDict
+
+from rest_framework import serializers
+
+from .fastpath import Unsupported, _flat_field, _model_field
+
+# Conversions DRF does with a builtin, as long as the field class doesn't override them
+BUILTIN_CONVERSIONS = {
+    serializers.CharField.to_representation: 'str',
+    serializers.IntegerField.to_representation: 'int',
+}
+
+MAX_COMPILED_VARIANTS = 64
+
+
+class _Compiler:
+    """
+    Generate the source of one to_representation() function per serializer and nested serializer.
+    """
+
+    def __init__(self):
+        self.namespace = {}
+        self.sources = []
+        self.counter = 0
+
+    def name(self, prefix):
+        self.counter += 1
+        return f'{prefix}_{self.counter}'
+
+    def conversion(self, convert):
+        builtin = BUILTIN_CONVERSIONS.get(getattr(convert, '__func__', None))
+        if builtin:
+            return builtin
+        name = self.name('convert')
+        self.namespace[name] = convert
+        return name
+
+    def compile(self, serializer):
+        model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+        if model is None:
+            raise Unsupported(type(serializer).__name__)
+        function = self.name('to_representation')
+        body, items = [], []
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            value = self.name('value')
+            if isinstance(field, serializers.ListSerializer):
+                model_field = _model_field(model, field)
+                if not model_field.is_relation:
+                    raise Unsupported(field.field_name)
+                child = self.compile(field.child)
+                body.append(f'    {value} = [{child}(item) for item in instance.{field.source}.all()]')
+            elif isinstance(field, serializers.BaseSerializer):
+                model_field = _model_field(model, field)
+                if not model_field.many_to_one and not model_field.one_to_one:
+                    raise Unsupported(field.field_name)
+                nested = self.compile(field)
+                body.append(f'    {value} = instance.{field.source}')
+                body.append(f'    {value} = None if {value} is None else {nested}({value})')
+            else:
+                _, attname, convert = _flat_field(field, model)
+                body.append(f'    {value} = instance.{attname}')
+                body.append(f'    {value} = None if {value} is None else {self.conversion(convert)}({value})')
+            items.append(f'({field.field_name!r}, {value})')
+        self.sources.append(
+            f'def {function}(instance):\n' + '\n'.join(body) + f'\n    return OrderedDict(({", ".join(items)},))\n'
+        )
+        return function
+
+    def build(self, serializer):
+        function = self.compile(serializer)
+        namespace = dict(self.namespace, OrderedDict=OrderedDict)
+        exec(compile('\n'.join(self.sources), f'<compiled {type(serializer).__name__}>', 'exec'), namespace)
+        return namespace[function]
+
+
+def compile_serializer(serializer):
+    """
+    Return a function that does serializer.to_representation(instance) in one pass, or None if unsupported.
+
+    Concrete columns, nested serializers of forward relations and nested
+    many=True serializers are supported; anything else (method fields,
+    dotted sources, related fields...) makes the whole serializer fall back
+    to DRF.
+    """
+    try:
+        return _Compiler().build(serializer)
+    except Unsupported:
+        return None
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        compiled = self.child.compiled()
+        if compiled is None:
+            return super().to_representation(data)
+        iterable = data.all() if hasattr(data, 'all') else data
+        return [compiled(item) for item in iterable]
+
+
+class CompiledModelSerializer(serializers.ModelSerializer):
+    """
+    A ModelSerializer whose to_representation() runs a function generated for its fields.
+
+    Functions are compiled per class and set of fields (instances may drop
+    or rename fields) and cached; serializers the compiler does not support keep DRF's
+    own to_representation().
+    """
+
+    _compiled_cache = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._compiled_cache = {}
+        meta = getattr(cls, 'Meta', None)
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            # many=True lists go through the compiled function too
+            meta.list_serializer_class = CompiledListSerializer
+
+    def compiled(self):
+        key = tuple((name, field.source) for name, field in self.fields.items())
+        cache = type(self)._compiled_cache
+        if key not in cache:
+            if len(cache) >= MAX_COMPILED_VARIANTS:
+                cache.clear()
+            cache[key] = compile_serializer(self)
+        return cache[key]
+
+    def to_representation(self, instance):
+        compiled = self.compiled()
+        if compiled is None:
+            return super().to_representation(instance)
+        return compiled(instance)
+
+
+def compile_serializers():
+    """
+    Compile the default fields of every CompiledModelSerializer subclass, so the first request doesn't pay for it.
+    """
+    pending = list(CompiledModelSerializer.__subclasses__())
+    while pending:
+        serializer_class = pending.pop()
+        pending.extend(serializer_class.__subclasses__())
+        if getattr(getattr(serializer_class, 'Meta', None), 'model', None) is not None:
+            serializer_class().compiled()
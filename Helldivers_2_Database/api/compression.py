@@ -0,0 +1,121 @@
+import gzip
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .cache import encoded_etag, get_cache
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip only without it
+    brotli = None
+
+# Smallest body worth compressing
+MIN_LENGTH = 200
+# Not HTML: the browsable API pages carry a CSRF token
+COMPRESSIBLE_TYPES = ('application/json',)
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.API_BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical content
+    return gzip.compress(content, compresslevel=settings.API_GZIP_LEVEL, mtime=0)
+
+
+def available_encodings():
+    """
+    Return the content codings the server can produce, in order of preference.
+    """
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parse_accept_encoding(header):
+    """
+    Return {coding: quality} from an Accept-Encoding header.
+    """
+    qualities = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities
+
+
+def negotiate_encoding(header):
+    """
+    Return the best coding of available_encodings() the client accepts, or None for the identity.
+    """
+    qualities = parse_accept_encoding(header or '')
+    best, best_quality = None, 0.0
+    for coding in available_encodings():
+        quality = qualities.get(coding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compressed_variant(content, encoding):
+    """
+    Return `content` compressed with `encoding`, compressing only the first time this exact body is seen.
+
+    Variants are kept in the API cache under a hash of the body, so every
+    process with a shared cache compresses a given payload once.
+    """
+    cache = get_cache()
+    key = f'hd2:compressed:{encoding}:{hashlib.sha256(content).hexdigest()}'
+    variant = cache.get(key)
+    if variant is None:
+        variant = compress(content, encoding)
+        cache.set(key, variant, settings.API_CACHE_TIMEOUT)
+    return variant
+
+
+class PrecompressedResponseMiddleware:
+    """
+    Serve API responses gzip or brotli encoded, from compressed variants produced once per body.
+
+    Unlike GZipMiddleware, which compresses every response again, identical
+    bodies (cached responses, snapshots) reuse the variant compressed the
+    first time. The catalog carries no secrets, so no padding against
+    compression side channels is added. Responses that already have a
+    Content-Encoding (e.g. precompressed snapshots) are left alone.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.status_code != 200
+            or response.has_header('Content-Encoding')
+            or len(response.content) < MIN_LENGTH
+            or response.get('Content-Type', '').split(';')[0] not in COMPRESSIBLE_TYPES
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+        variant = compressed_variant(response.content, encoding)
+        if len(variant) >= len(response.content):
+            return response
+        response.content = variant
+        response['Content-Length'] = str(len(variant))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = encoded_etag(etag, encoding)
+        return response
@@ -0,0 +1,188 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .mixins import related_ordering
+from .pagination import cursor_columns
+
+
+class Unsupported(Exception):
+    pass
+
+
+def _model_field(model, field):
+    if not field.source or field.source == '*' or '.' in field.source:
+        raise Unsupported(field.field_name)
+    try:
+        return model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        raise Unsupported(field.field_name)
+
+
+def _flat_field(field, model):
+    """
+    Return (name, column, to_representation) for a serializer field of a concrete, non-relational column.
+    """
+    if isinstance(field, (serializers.BaseSerializer, serializers.RelatedField, serializers.ManyRelatedField)):
+        raise Unsupported(field.field_name)
+    model_field = _model_field(model, field)
+    if model_field.is_relation or not model_field.concrete:
+        raise Unsupported(field.field_name)
+    return field.field_name, model_field.attname, field.to_representation
+
+
+def _flat_fields(serializer, model):
+    return [_flat_field(field, model) for field in serializer.fields.values()]
+
+
+class ValuesSerializer:
+    """
+    Produce the output of a ModelSerializer from .values() rows instead of model instances.
+
+    Concrete fields and nested serializers of single forward relations are
+    read as columns of one .values() query; nested serializers of many-to-many
+    relations are filled from one query on the through table per relation,
+    for all rows at once. Field values still go through the serializer
+    fields' to_representation(), so the output is the same as the serializer's.
+    Raises Unsupported for serializers with anything else (method fields,
+    dotted sources, deeper nesting...). A `fieldset` (see
+    SparseFieldsetSerializer) narrows the serializer, and so the columns.
+    """
+
+    def __init__(self, serializer_class, **fieldset):
+        model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+        if model is None:
+            raise Unsupported(serializer_class.__name__)
+        serializer = serializer_class(**fieldset)
+        self.model = model
+        self.columns = [model._meta.pk.attname]
+        self.fields = []
+        for field in serializer.fields.values():
+            if isinstance(field, serializers.ListSerializer):
+                model_field = _model_field(model, field)
+                if not model_field.many_to_many or not model_field.concrete:
+                    raise Unsupported(field.field_name)
+                self.fields.append(('many', field.field_name, self._many(model_field, field.child)))
+            elif isinstance(field, serializers.BaseSerializer):
+                model_field = _model_field(model, field)
+                if not model_field.many_to_one or not model_field.concrete:
+                    raise Unsupported(field.field_name)
+                nested = [
+                    (name, f'{model_field.name}__{source}', convert)
+                    for name, source, convert in _flat_fields(field, model_field.related_model)
+                ]
+                self.columns.append(model_field.attname)
+                self.columns.extend(column for _, column, _ in nested)
+                self.fields.append(('nested', field.field_name, (model_field.attname, nested)))
+            else:
+                name, source, convert = _flat_field(field, model)
+                self.columns.append(source)
+                self.fields.append(('flat', name, (source, convert)))
+        self.columns = list(dict.fromkeys(self.columns))
+
+    def _many(self, model_field, child):
+        through = model_field.remote_field.through
+        source = model_field.m2m_field_name()
+        target = model_field.m2m_reverse_field_name()
+        nested = [
+            (name, f'{target}__{column}', convert)
+            for name, column, convert in _flat_fields(child, model_field.related_model)
+        ]
+        ordering = [f'{target}__{field}' for field in related_ordering(model_field.related_model)]
+        return model_field.name, through, source, nested, ordering
+
+    def rows(self, queryset, *extra):
+        """
+        Return the .values() queryset that serialize() expects, keeping the filters and ordering of `queryset`.
+
+        `extra` columns are selected as well, e.g. for a paginator to order by.
+        """
+        columns = dict.fromkeys((*self.columns, *extra))
+        return queryset.select_related(None).prefetch_related(None).values(*columns)
+
+    def related(self, rows):
+        """
+        Return {field name: {primary key: [nested items]}} of the many-to-many fields, one query per relation.
+        """
+        pk = self.columns[0]
+        related = {}
+        for kind, name, spec in self.fields:
+            if kind == 'many':
+                _, through, source, nested, ordering = spec
+                links = {}
+                values = through._base_manager.filter(
+                    **{f'{source}__in': [row[pk] for row in rows]}
+                ).order_by(*ordering).values_list(f'{source}_id', *(column for _, column, _ in nested))
+                for source_pk, *columns in values:
+                    links.setdefault(source_pk, []).append({
+                        nested_name: None if value is None else convert(value)
+                        for (nested_name, _, convert), value in zip(nested, columns)
+                    })
+                related[name] = links
+        return related
+
+    def serialize(self, rows, related=None):
+        """
+        Return the serialized rows, their many-to-many items read with related() unless given.
+        """
+        rows = list(rows)
+        pk = self.columns[0]
+        if related is None:
+            related = self.related(rows)
+
+        data = []
+        for row in rows:
+            item = {}
+            for kind, name, spec in self.fields:
+                if kind == 'flat':
+                    source, convert = spec
+                    value = row[source]
+                    item[name] = None if value is None else convert(value)
+                elif kind == 'nested':
+                    attname, nested = spec
+                    if row[attname] is None:
+                        item[name] = None
+                    else:
+                        item[name] = {
+                            nested_name: None if row[column] is None else convert(row[column])
+                            for nested_name, column, convert in nested
+                        }
+                else:
+                    item[name] = related[name].get(row[pk], [])
+            data.append(item)
+        return data
+
+
+@lru_cache(maxsize=256)
+def values_serializer(serializer_class, **fieldset):
+    """
+    Return the ValuesSerializer for a serializer class and fieldset, or None when it is not supported.
+    """
+    try:
+        return ValuesSerializer(serializer_class, **fieldset)
+    except Unsupported:
+        return None
+
+
+class ValuesListMixin:
+    """
+    Serve list requests from .values() rows when the viewset's serializer allows it.
+
+    The response is the same as ListModelMixin.list() would return, without
+    building a model instance or running a nested serializer per row. The
+    serializer is narrowed by the viewset's get_fieldset() (see
+    EagerLoadingMixin).
+    """
+
+    def list(self, request, *args, **kwargs):
+        fast = values_serializer(self.get_serializer_class(), **self.get_fieldset())
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+        # The cursor of a page is read from the columns it is ordered by
+        rows = fast.rows(self.filter_queryset(self.get_queryset()), *cursor_columns(self))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize(rows))
@@ -0,0 +1,95 @@
+from rest_framework.exceptions import ValidationError
+
+from .compiled import CompiledModelSerializer
+
+FIELDS_PARAM = 'fields'
+LANGUAGE_PARAM = 'lang'
+
+
+def column_language(column):
+    # name_fr_FR -> fr-fr
+    return '-'.join(column.split('_')[-2:]).lower()
+
+
+def language_column(language, columns):
+    """
+    Return the column of `columns` for a language tag ('fr-FR', 'fr_fr', or just 'fr'), or raise a ValidationError.
+    """
+    wanted = language.replace('_', '-').lower()
+    for column in columns:
+        if column_language(column) == wanted:
+            return column
+    for column in columns:
+        if column_language(column).split('-')[0] == wanted:
+            return column
+    choices = ', '.join(column_language(column) for column in columns)
+    raise ValidationError({LANGUAGE_PARAM: [f"Unknown language '{language}', expected one of: {choices}."]})
+
+
+class SparseFieldsetSerializer(CompiledModelSerializer):
+    """
+    A CompiledModelSerializer that can be narrowed to some of its fields and to a single language.
+
+    `fields` keeps only the named top-level fields. `lang` replaces the
+    per-locale columns listed in Meta.localized_fields ({output field:
+    [column, ...]}) by the output field alone, reading the column of that
+    language: `localized_name` from `name_fr_FR` for 'fr-FR'. The narrowed
+    fields are what the eager loading, the values() path and the compiled
+    functions work from, so the columns left out are not selected either.
+    Unknown fields or languages raise a ValidationError.
+    """
+
+    def __init__(self, *args, fields=None, lang=None, **kwargs):
+        self.requested_fields = fields
+        self.language = lang
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.language is not None:
+            for name, columns in getattr(self.Meta, 'localized_fields', {}).items():
+                column = language_column(self.language, columns)
+                localized = fields[column]
+                localized.source = column
+                for column in columns:
+                    del fields[column]
+                fields[name] = localized
+        if self.requested_fields is not None:
+            unknown = sorted(set(self.requested_fields) - set(fields))
+            if unknown:
+                raise ValidationError({
+                    FIELDS_PARAM: [f"Unknown fields: {', '.join(unknown)}, expected any of: {', '.join(fields)}."]
+                })
+            for name in list(fields):
+                if name not in self.requested_fields:
+                    del fields[name]
+        return fields
+
+
+class SparseFieldsetMixin:
+    """
+    Narrow the viewset's serializer with the `?fields=` and `?lang=` query parameters.
+
+    `?fields=id,name,biome` lists the fields to return, `?lang=fr-FR` returns
+    one `localized_name` instead of every `name_*` column. Both only apply to
+    SparseFieldsetSerializer subclasses and are ignored elsewhere.
+    """
+
+    def get_fieldset(self):
+        """
+        Return the serializer keyword arguments of the request's fieldset, normalized so equal fieldsets share caches.
+        """
+        request = getattr(self, 'request', None)
+        if request is None or not issubclass(self.get_serializer_class(), SparseFieldsetSerializer):
+            return {}
+        fieldset = {}
+        fields = request.query_params.get(FIELDS_PARAM)
+        if fields:
+            fieldset['fields'] = tuple(sorted({name.strip() for name in fields.split(',') if name.strip()}))
+        language = request.query_params.get(LANGUAGE_PARAM)
+        if language:
+            fieldset['lang'] = language.replace('_', '-').lower()
+        return fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, **{**self.get_fieldset(), **kwargs})
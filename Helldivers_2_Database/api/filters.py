@@ -0,0 +1,30 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import BooleanField
+from rest_framework import fields
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class CatalogFilterBackend(BaseFilterBackend):
+    """
+    Filter a catalog queryset with the query parameters listed in the viewset's `filter_fields`.
+
+    `filter_fields` maps a query parameter to the lookup it applies, e.g.
+    {'min_damage': 'damage__gte'}. Values are converted by the model field,
+    booleans also reading 'true'/'false' like DRF does, and one that
+    doesn't convert answers 400. Every lookup has an index to
+    use (see migration 0006 and the foreign key indexes).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for param, lookup in getattr(view, 'filter_fields', {}).items():
+            value = request.query_params.get(param, '')
+            if value == '':
+                continue
+            try:
+                if isinstance(queryset.model._meta.get_field(lookup.split('__')[0]), BooleanField):
+                    value = fields.BooleanField().to_internal_value(value)
+                queryset = queryset.filter(**{lookup: value})
+            except (DjangoValidationError, ValidationError, TypeError, ValueError):
+                raise ValidationError({param: [f"Invalid value '{value}'."]})
+        return queryset
@@ -0,0 +1,939 @@
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .analytics import WEAPON_STATS, refresh_weapon_stats
+from .cache import bump_dataset_version
+from .snapshots import write_snapshots
+from .bulk import ForeignKeyResolver, bulk_upsert, sync_m2m
+from .manifest import ManifestDiff
+from .scheduler import ImportStep, check_dag, run_steps
+from .shadow import ShadowImport
+from .models import (
+    Faction, Sector, Biome, Environmental, Planet,
+    WeaponType, FireMode, WeaponTrait, Weapon,
+    ArmorSlot, ArmorPassive, Armor, Booster, Item
+)
+
+
+class StageReport:
+    """
+    Progress messages and row, query and time counters of one import stage.
+
+    Messages are buffered and written as one block when the stage finishes, so
+    stages running on parallel workers don't interleave their output. Without
+    buffering (e.g. when an importer is called directly) they are written
+    immediately. `quiet` drops everything but errors. With `track_memory` the
+    peak of tracemalloc during the stage is recorded, which is only meaningful
+    when stages run one at a time.
+    """
+
+    def __init__(self, name, stdout=None, quiet=False, buffered=False, track_memory=False):
+        self.name = name
+        self.stdout = stdout or sys.stdout
+        self.quiet = quiet
+        self.buffered = buffered
+        self.track_memory = track_memory
+        self.lines = []
+        self.errors = []
+        self.rows_read = self.rows_written = self.queries = 0
+        self.seconds = 0.0
+        self.peak_memory = None
+
+    def _write(self, message):
+        if self.buffered:
+            self.lines.append(message)
+        else:
+            self.stdout.write(message + '\n')
+
+    def log(self, message):
+        if not self.quiet:
+            self._write(message)
+
+    def error(self, message):
+        self.errors.append(message)
+        self._write(message)
+
+    def flush(self):
+        if self.lines:
+            self.stdout.write('\n'.join(self.lines) + '\n')
+            self.lines = []
+
+    def add_changes(self, changes):
+        """
+        Count the records a ManifestDiff has read and the rows it created, updated or deleted.
+        """
+        self.rows_read += changes.read
+        self.rows_written += changes.written
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def run(self, func):
+        """
+        Call `func` while timing it and counting the queries it issues on this thread's connection.
+        """
+        track_memory = self.track_memory and tracemalloc.is_tracing()
+        if track_memory:
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            else:
+                # Python < 3.9 can only reset the peak by clearing the traces
+                tracemalloc.stop()
+                tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self._count_query):
+                func()
+        finally:
+            self.seconds += time.perf_counter() - started
+            if track_memory:
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+            self.flush()
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.seconds if self.seconds else 0.0
+
+
+def data_path(name, data_dir=None):
+    """
+    Return the path of a JSON resource file, relative to settings.IMPORT_DATA_DIR by default.
+    """
+    return os.path.join(data_dir or settings.IMPORT_DATA_DIR, name)
+
+
+def import_factions(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('factions')
+    report.log("Importing factions data...")
+    json_file_path = data_path('factions.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, Faction, force=force)
+        if changes.unchanged:
+            report.log("Factions unchanged (0 changed)")
+            return
+        with transaction.atomic():
+            for batch in changes.batches(batch_size):
+                factions = [
+                    Faction(id=int(faction_id), name=faction_name)
+                    for faction_id, faction_name in batch.items()
+                ]
+                changes.tally(bulk_upsert(Faction, factions, batch_size=batch_size, loader=loader))
+            changes.delete_removed(to_pk=int)
+            changes.save()
+        report.add_changes(changes)
+        report.log(f"Factions import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing factions: {e}")
+
+
+def import_biomes(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('biomes')
+    report.log("Importing biomes data...")
+    json_file_path = data_path('planets/biomes.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, Biome, force=force)
+        if changes.unchanged:
+            report.log("Biomes unchanged (0 changed)")
+            return
+        with transaction.atomic():
+            for batch in changes.batches(batch_size):
+                biomes = [
+                    Biome(id=biome_id, name=biome_info['name'], description=biome_info['description'])
+                    for biome_id, biome_info in batch.items()
+                ]
+                changes.tally(bulk_upsert(Biome, biomes, batch_size=batch_size, loader=loader))
+            changes.delete_removed()
+            changes.save()
+        report.add_changes(changes)
+        report.log(f"Biomes import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing biomes: {e}")
+
+
+def import_environmentals(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('environmentals')
+    report.log("Importing environmentals data...")
+    json_file_path = data_path('planets/environmentals.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, Environmental, force=force)
+        if changes.unchanged:
+            report.log("Environmentals unchanged (0 changed)")
+            return
+        with transaction.atomic():
+            for batch in changes.batches(batch_size):
+                environmentals = [
+                    Environmental(id=env_id, name=env_info['name'], description=env_info['description'])
+                    for env_id, env_info in batch.items()
+                ]
+                changes.tally(bulk_upsert(Environmental, environmentals, batch_size=batch_size, loader=loader))
+            changes.delete_removed()
+            changes.save()
+        report.add_changes(changes)
+        report.log(f"Environmentals import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing environmentals: {e}")
+
+
+def import_planets(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('planets')
+    report.log("Importing planets data...")
+    json_file_path = data_path('planets/planets.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, Planet, force=force)
+        if changes.unchanged:
+            report.log("Planets unchanged (0 changed)")
+            return
+
+        resolver = ForeignKeyResolver()
+        links_added = links_removed = 0
+        with transaction.atomic():
+            for planets_data in changes.batches(batch_size):
+                # Create every missing sector of the batch at once
+                sector_ids = resolver.resolve_or_create(
+                    Sector, 'name', (planet_info.get('sector', 'Unknown') for planet_info in planets_data.values())
+                )
+
+                planets = []
+                planet_environmentals = {}
+                for planet_id, planet_info in planets_data.items():
+                    planet = Planet(
+                        id=int(planet_id),
+                        name=planet_info['name'],
+                        sector_id=sector_ids[planet_info.get('sector', 'Unknown')],
+                    )
+
+                    # Get biome (if exists)
+                    biome_id = planet_info.get('biome')
+                    if biome_id:
+                        planet.biome_id = resolver.resolve(Biome, biome_id, planet_info['name'])
+                        if planet.biome_id is None:
+                            changes.retry(planet_id)
+
+                    # Add localized names if available
+                    if 'names' in planet_info:
+                        names = planet_info['names']
+                        for lang, name in names.items():
+                            lang_field = f'name_{lang.replace("-", "_")}'
+                            if hasattr(Planet, lang_field):
+                                setattr(planet, lang_field, name)
+
+                    planets.append(planet)
+                    if 'environmentals' in planet_info:
+                        planet_environmentals[planet.pk] = planet_info['environmentals']
+
+                changes.tally(bulk_upsert(Planet, planets, batch_size=batch_size, loader=loader))
+
+                # Link environmentals
+                added, removed, missing = sync_m2m(Planet, 'environmentals', planet_environmentals, batch_size=batch_size)
+                for planet_id, env_id in missing:
+                    resolver.record_missing(Environmental, env_id, planets_data[str(planet_id)]['name'])
+                    changes.retry(str(planet_id))
+                links_added += added
+                links_removed += removed
+
+            changes.delete_removed(to_pk=int)
+            changes.save()
+
+        report.rows_written += links_added + links_removed
+        report.log(f"Environmental links: {links_added} added, {links_removed} removed")
+        resolver.report(report.log)
+        report.add_changes(changes)
+        report.log(f"Planets import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing planets: {e}")
+
+
+def import_weapon_types(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('weapon_types')
+    report.log("Importing weapon types data...")
+    json_file_path = data_path('items/weapons/types.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, WeaponType, force=force)
+        if changes.unchanged:
+            report.log("Weapon types unchanged (0 changed)")
+            return
+        with transaction.atomic():
+            for batch in changes.batches(batch_size):
+                weapon_types = [
+                    WeaponType(id=int(type_id), name=type_name)
+                    for type_id, type_name in batch.items()
+                ]
+                changes.tally(bulk_upsert(WeaponType, weapon_types, batch_size=batch_size, loader=loader))
+            changes.delete_removed(to_pk=int)
+            changes.save()
+        report.add_changes(changes)
+        report.log(f"Weapon types import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing weapon types: {e}")
+
+
+def import_fire_modes(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('fire_modes')
+    report.log("Importing fire modes data...")
+    json_file_path = data_path('items/weapons/fire_modes.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, FireMode, force=force)
+        if changes.unchanged:
+            report.log("Fire modes unchanged (0 changed)")
+            return
+        with transaction.atomic():
+            for batch in changes.batches(batch_size):
+                fire_modes = [
+                    FireMode(id=int(mode_id), name=mode_name)
+                    for mode_id, mode_name in batch.items()
+                ]
+                changes.tally(bulk_upsert(FireMode, fire_modes, batch_size=batch_size, loader=loader))
+            changes.delete_removed(to_pk=int)
+            changes.save()
+        report.add_changes(changes)
+        report.log(f"Fire modes import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing fire modes: {e}")
+
+
+def import_weapon_traits(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('weapon_traits')
+    report.log("Importing weapon traits data...")
+    json_file_path = data_path('items/weapons/traits.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, WeaponTrait, force=force)
+        if changes.unchanged:
+            report.log("Weapon traits unchanged (0 changed)")
+            return
+        with transaction.atomic():
+            for batch in changes.batches(batch_size):
+                traits = []
+                for trait_id, trait_info in batch.items():
+                    # traits.json maps ids to plain names; richer entries carry a description
+                    if isinstance(trait_info, str):
+                        trait_info = {'name': trait_info}
+                    traits.append(WeaponTrait(
+                        id=int(trait_id),
+                        name=trait_info['name'],
+                        description=trait_info.get('description', '')
+                    ))
+                changes.tally(bulk_upsert(WeaponTrait, traits, batch_size=batch_size, loader=loader))
+            changes.delete_removed(to_pk=int)
+            changes.save()
+        report.add_changes(changes)
+        report.log(f"Weapon traits import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing weapon traits: {e}")
+
+
+WEAPON_FIELDS = [
+    field.name for field in Weapon._meta.concrete_fields if not field.primary_key and field.name not in WEAPON_STATS
+]
+
+
+def import_weapons(file_path, is_primary=False, is_secondary=False, is_grenade=False, report=None, batch_size=None, force=False, loader=None):
+    report = report or StageReport('weapons')
+    report.log(f"Importing weapons from {file_path}...")
+    try:
+        changes = ManifestDiff(file_path, Weapon, force=force)
+        if changes.unchanged:
+            report.log(f"Weapons from {file_path} unchanged (0 changed)")
+            return
+
+        resolver = ForeignKeyResolver()
+        fire_mode_links = [0, 0]
+        trait_links = [0, 0]
+        with transaction.atomic():
+            for weapons_data in changes.batches(batch_size):
+                weapons = []
+                weapon_fire_modes = {}
+                weapon_traits = {}
+                for weapon_id, weapon_info in weapons_data.items():
+                    weapon = Weapon(
+                        id=weapon_id,
+                        name=weapon_info['name'],
+                        description=weapon_info.get('description', ''),
+                        damage=weapon_info.get('damage', 0),
+                        capacity=weapon_info.get('capacity', 0),
+                        recoil=weapon_info.get('recoil', 0),
+                        fire_rate=weapon_info.get('fire_rate', 0),
+                        is_primary=is_primary,
+                        is_secondary=is_secondary,
+                        is_grenade=is_grenade,
+                    )
+
+                    # Get weapon type if exists
+                    if 'type' in weapon_info:
+                        weapon.type_id = resolver.resolve(WeaponType, weapon_info['type'], weapon.name)
+                        if weapon.type_id is None:
+                            changes.retry(weapon_id)
+
+                    weapons.append(weapon)
+                    if 'fire_mode' in weapon_info:
+                        weapon_fire_modes[weapon.pk] = weapon_info['fire_mode']
+                    if 'traits' in weapon_info:
+                        weapon_traits[weapon.pk] = weapon_info['traits']
+
+                # The stats keep their values until the weapon_stats stage recomputes them
+                changes.tally(bulk_upsert(
+                    Weapon, weapons, update_fields=WEAPON_FIELDS, batch_size=batch_size, loader=loader
+                ))
+
+                # Link fire modes
+                added, removed, missing = sync_m2m(Weapon, 'fire_modes', weapon_fire_modes, batch_size=batch_size)
+                for weapon_id, mode_id in missing:
+                    resolver.record_missing(FireMode, mode_id, weapons_data[weapon_id]['name'])
+                    changes.retry(weapon_id)
+                fire_mode_links[0] += added
+                fire_mode_links[1] += removed
+
+                # Link traits
+                added, removed, missing = sync_m2m(Weapon, 'traits', weapon_traits, batch_size=batch_size)
+                for weapon_id, trait_id in missing:
+                    resolver.record_missing(WeaponTrait, trait_id, weapons_data[weapon_id]['name'])
+                    changes.retry(weapon_id)
+                trait_links[0] += added
+                trait_links[1] += removed
+
+            changes.delete_removed()
+            changes.save()
+
+        report.rows_written += sum(fire_mode_links) + sum(trait_links)
+        report.log(f"Fire mode links: {fire_mode_links[0]} added, {fire_mode_links[1]} removed")
+        report.log(f"Trait links: {trait_links[0]} added, {trait_links[1]} removed")
+        resolver.report(report.log)
+        report.add_changes(changes)
+        report.log(f"Weapons import from {file_path} completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {file_path}")
+    except Exception as e:
+        report.error(f"Error importing weapons from {file_path}: {e}")
+
+
+def import_all_weapons(batch_size=None, force=False, loader=None, data_dir=None):
+    options = {'batch_size': batch_size, 'force': force, 'loader': loader}
+    import_weapon_types(data_dir=data_dir, **options)
+    import_fire_modes(data_dir=data_dir, **options)
+    import_weapon_traits(data_dir=data_dir, **options)
+
+    # Import primary weapons
+    import_weapons(data_path('items/weapons/primary.json', data_dir), is_primary=True, **options)
+
+    # Import secondary weapons
+    import_weapons(data_path('items/weapons/secondary.json', data_dir), is_secondary=True, **options)
+
+    # Import grenades
+    import_weapons(data_path('items/weapons/grenades.json', data_dir), is_grenade=True, **options)
+
+    import_weapon_stats(batch_size=batch_size)
+
+
+def import_weapon_stats(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    # DPS, damage per magazine, time to empty and DPS percentile of every weapon, recomputed after the weapon files
+    report = report or StageReport('weapon_stats')
+    report.log("Computing weapon stats...")
+    try:
+        rows_read, rows_written = refresh_weapon_stats(Weapon, batch_size=batch_size)
+        report.rows_read += rows_read
+        report.rows_written += rows_written
+        report.log(f"Weapon stats computed successfully! ({rows_written} changed)")
+    except Exception as e:
+        report.error(f"Error computing weapon stats: {e}")
+
+
+def import_armor_slots(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('armor_slots')
+    report.log("Importing armor slots data...")
+    json_file_path = data_path('items/armor/slot.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, ArmorSlot, force=force)
+        if changes.unchanged:
+            report.log("Armor slots unchanged (0 changed)")
+            return
+        with transaction.atomic():
+            for batch in changes.batches(batch_size):
+                slots = [
+                    ArmorSlot(id=int(slot_id), name=slot_name)
+                    for slot_id, slot_name in batch.items()
+                ]
+                changes.tally(bulk_upsert(ArmorSlot, slots, batch_size=batch_size, loader=loader))
+            changes.delete_removed(to_pk=int)
+            changes.save()
+        report.add_changes(changes)
+        report.log(f"Armor slots import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing armor slots: {e}")
+
+
+def import_armor_passives(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('armor_passives')
+    report.log("Importing armor passives data...")
+    json_file_path = data_path('items/armor/passive.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, ArmorPassive, force=force)
+        if changes.unchanged:
+            report.log("Armor passives unchanged (0 changed)")
+            return
+        with transaction.atomic():
+            for batch in changes.batches(batch_size):
+                passives = [
+                    ArmorPassive(id=int(passive_id), name=passive_info['name'], description=passive_info.get('description', ''))
+                    for passive_id, passive_info in batch.items()
+                ]
+                changes.tally(bulk_upsert(ArmorPassive, passives, batch_size=batch_size, loader=loader))
+            changes.delete_removed(to_pk=int)
+            changes.save()
+        report.add_changes(changes)
+        report.log(f"Armor passives import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing armor passives: {e}")
+
+
+def import_armors(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('armors')
+    report.log("Importing armors data...")
+    json_file_path = data_path('items/armor/armor.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, Armor, force=force)
+        if changes.unchanged:
+            report.log("Armors unchanged (0 changed)")
+            return
+
+        resolver = ForeignKeyResolver()
+        with transaction.atomic():
+            for batch in changes.batches(batch_size):
+                armors = []
+                for armor_id, armor_info in batch.items():
+                    armor = Armor(
+                        id=armor_id,
+                        name=armor_info['name'],
+                        description=armor_info.get('description', ''),
+                        type=armor_info.get('type', 0),
+                        armor_rating=armor_info.get('armor_rating', 100),
+                        speed=armor_info.get('speed', 100),
+                        stamina_regen=armor_info.get('stamina_regen', 100),
+                    )
+
+                    # Get armor slot if exists
+                    if 'slot' in armor_info:
+                        armor.slot_id = resolver.resolve(ArmorSlot, armor_info['slot'], armor.name)
+                        if armor.slot_id is None:
+                            changes.retry(armor_id)
+
+                    # Get armor passive if exists
+                    if 'passive' in armor_info and armor_info['passive'] != 0:
+                        armor.passive_id = resolver.resolve(ArmorPassive, armor_info['passive'], armor.name)
+                        if armor.passive_id is None:
+                            changes.retry(armor_id)
+
+                    armors.append(armor)
+
+                changes.tally(bulk_upsert(Armor, armors, batch_size=batch_size, loader=loader))
+
+            changes.delete_removed()
+            changes.save()
+
+        resolver.report(report.log)
+        report.add_changes(changes)
+        report.log(f"Armors import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing armors: {e}")
+
+
+def import_all_armors(batch_size=None, force=False, loader=None, data_dir=None):
+    options = {'batch_size': batch_size, 'force': force, 'loader': loader, 'data_dir': data_dir}
+    import_armor_slots(**options)
+    import_armor_passives(**options)
+    import_armors(**options)
+
+
+def import_boosters(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('boosters')
+    report.log("Importing boosters data...")
+    json_file_path = data_path('items/boosters.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, Booster, force=force)
+        if changes.unchanged:
+            report.log("Boosters unchanged (0 changed)")
+            return
+        with transaction.atomic():
+            for batch in changes.batches(batch_size):
+                boosters = [
+                    Booster(id=booster_id, name=booster_info['name'], description=booster_info.get('description', ''))
+                    for booster_id, booster_info in batch.items()
+                ]
+                changes.tally(bulk_upsert(Booster, boosters, batch_size=batch_size, loader=loader))
+            changes.delete_removed()
+            changes.save()
+        report.add_changes(changes)
+        report.log(f"Boosters import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing boosters: {e}")
+
+
+def import_items(report=None, batch_size=None, force=False, loader=None, data_dir=None):
+    report = report or StageReport('items')
+    report.log("Importing items data...")
+    json_file_path = data_path('items/item_names.json', data_dir)
+    try:
+        changes = ManifestDiff(json_file_path, Item, force=force)
+        if changes.unchanged:
+            report.log("Items unchanged (0 changed)")
+            return
+        with transaction.atomic():
+            for batch in changes.batches(batch_size):
+                items = [
+                    Item(id=item_id, name=item_info['name'])
+                    for item_id, item_info in batch.items()
+                ]
+                changes.tally(bulk_upsert(Item, items, batch_size=batch_size, loader=loader))
+            changes.delete_removed()
+            changes.save()
+        report.add_changes(changes)
+        report.log(f"Items import completed successfully! ({changes.summary()})")
+    except FileNotFoundError:
+        report.error(f"Error: JSON file not found at {json_file_path}")
+    except json.JSONDecodeError:
+        report.error(f"Error: Invalid JSON format in file {json_file_path}")
+    except Exception as e:
+        report.error(f"Error importing items: {e}")
+
+
+class StageFailed(Exception):
+    pass
+
+
+def run_stage(report, func):
+    """
+    Run an importer through its report, raising StageFailed if it reported an error.
+
+    Importers log their errors to the report instead of raising, so
+    run_steps() still sees the failure and skips the dependent stages.
+    """
+    report.run(func)
+    if report.errors:
+        raise StageFailed(report.errors[-1])
+
+
+def import_steps(batch_size=None, force=False, loader=None, data_dir=None, reports=None):
+    """
+    The import work as a DAG: the planet, weapon and armor groups only depend on their own lookup tables.
+
+    When a {name: StageReport} mapping is given, each step runs through its report and
+    fails, skipping the steps that depend on it, when the importer reported an error.
+    """
+    options = {'batch_size': batch_size, 'force': force, 'loader': loader}
+    weapon_path = partial(data_path, data_dir=data_dir)
+    stages = [
+        ('factions', partial(import_factions, data_dir=data_dir, **options), []),
+        ('biomes', partial(import_biomes, data_dir=data_dir, **options), []),
+        ('environmentals', partial(import_environmentals, data_dir=data_dir, **options), []),
+        ('planets', partial(import_planets, data_dir=data_dir, **options), ['biomes', 'environmentals']),
+        ('weapon_types', partial(import_weapon_types, data_dir=data_dir, **options), []),
+        ('fire_modes', partial(import_fire_modes, data_dir=data_dir, **options), []),
+        ('weapon_traits', partial(import_weapon_traits, data_dir=data_dir, **options), []),
+        (
+            'primary_weapons',
+            partial(import_weapons, weapon_path('items/weapons/primary.json'), is_primary=True, **options),
+            ['weapon_types', 'fire_modes', 'weapon_traits'],
+        ),
+        # The weapon files share a table, keep them in file order
+        (
+            'secondary_weapons',
+            partial(import_weapons, weapon_path('items/weapons/secondary.json'), is_secondary=True, **options),
+            ['primary_weapons'],
+        ),
+        (
+            'grenades',
+            partial(import_weapons, weapon_path('items/weapons/grenades.json'), is_grenade=True, **options),
+            ['secondary_weapons'],
+        ),
+        ('weapon_stats', partial(import_weapon_stats, data_dir=data_dir, **options), ['grenades']),
+        ('armor_slots', partial(import_armor_slots, data_dir=data_dir, **options), []),
+        ('armor_passives', partial(import_armor_passives, data_dir=data_dir, **options), []),
+        ('armors', partial(import_armors, data_dir=data_dir, **options), ['armor_slots', 'armor_passives']),
+        ('boosters', partial(import_boosters, data_dir=data_dir, **options), []),
+        ('items', partial(import_items, data_dir=data_dir, **options), []),
+    ]
+    steps = []
+    for name, func, depends_on in stages:
+        if reports is not None:
+            report = reports[name]
+            func = partial(run_stage, report, partial(func, report=report))
+        steps.append(ImportStep(name, func, depends_on=depends_on))
+    return steps
+
+
+STAGE_NAMES = [step.name for step in import_steps()]
+# Stages derived from other stages' rows, run whenever any of those is
+DERIVED_STAGES = {'weapon_stats': ('primary_weapons', 'secondary_weapons', 'grenades')}
+
+
+def select_steps(steps, only):
+    """
+    Keep the named steps and the DERIVED_STAGES of any of them, dropping dependencies on steps that are not selected.
+    """
+    unknown = [name for name in only if name not in STAGE_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown import stage(s) {', '.join(unknown)}, expected one of {', '.join(STAGE_NAMES)}.")
+    only = set(only)
+    only |= {name for name, sources in DERIVED_STAGES.items() if only.intersection(sources)}
+    return [
+        ImportStep(step.name, step.func, depends_on=[name for name in step.depends_on if name in only])
+        for step in steps if step.name in only
+    ]
+
+
+class ImportRun:
+    """
+    The outcome of import_all_data(): one StageReport per stage plus totals.
+    """
+
+    def __init__(self, reports, workers, failed, seconds, peak_memory, dry_run=False, shadow=False,
+                 swap_seconds=None, dataset_version=None, snapshot_error=None):
+        self.reports = reports
+        self.workers = workers
+        self.failed = failed
+        self.seconds = seconds
+        self.peak_memory = peak_memory
+        self.dry_run = dry_run
+        self.shadow = shadow
+        self.swap_seconds = swap_seconds
+        self.dataset_version = dataset_version
+        self.snapshot_error = snapshot_error
+
+    @staticmethod
+    def succeeded(reports, failed):
+        return not failed and not any(report.errors for report in reports)
+
+    @property
+    def ok(self):
+        return self.succeeded(self.reports, self.failed)
+
+    def table(self):
+        """
+        Return the per-stage report as a list of text lines.
+        """
+        header = f"{'stage':<18} {'read':>9} {'written':>9} {'queries':>8} {'seconds':>8} {'rows/s':>10}"
+        lines = [header, '-' * len(header)]
+        for report in self.reports:
+            lines.append(
+                f"{report.name:<18} {report.rows_read:>9} {report.rows_written:>9} {report.queries:>8} "
+                f"{report.seconds:>8.2f} {report.rows_per_second:>10.0f}"
+            )
+        lines.append('-' * len(header))
+        rows_read = sum(report.rows_read for report in self.reports)
+        lines.append(
+            f"{'total':<18} {rows_read:>9} {sum(report.rows_written for report in self.reports):>9} "
+            f"{sum(report.queries for report in self.reports):>8} {self.seconds:>8.2f} "
+            f"{rows_read / self.seconds if self.seconds else 0:>10.0f}"
+        )
+        return lines
+
+
+class DatasetPublisher:
+    """
+    Bump the dataset version once an import run wrote rows, in the same transaction as the last of them.
+
+    stage() wraps each import stage in a transaction; stages commit one at
+    a time, and the one committing after every other stage has finished
+    calls publish() just before its commit. The rows of the run and the new
+    version thus become visible together: no reader can cache new rows under
+    the previous version, and a crash can't leave them unpublished.
+    publish() also renders the snapshots of the new version in that
+    transaction unless `snapshots` is False, see write_snapshots().
+    """
+
+    def __init__(self, reports, names=(), snapshots=True):
+        self.reports = reports
+        self.pending = set(names)
+        self.snapshots = snapshots
+        self.lock = threading.Lock()
+        self.state = self.snapshot_error = None
+
+    def stage(self, name, func):
+        return partial(self.run_stage, name, func)
+
+    def run_stage(self, name, func):
+        locked = False
+        try:
+            with transaction.atomic():
+                try:
+                    func()
+                finally:
+                    # Held until the commit, so the other stages have all committed when the last one publishes
+                    self.lock.acquire()
+                    locked = True
+                    self.pending.discard(name)
+                if not self.pending:
+                    self.publish()
+        finally:
+            if locked:
+                self.lock.release()
+
+    def publish(self):
+        """
+        Bump the dataset version in the current transaction if the run wrote any row.
+        """
+        if self.state is not None or not any(report.rows_written for report in self.reports):
+            return
+        self.state = bump_dataset_version()
+        if self.snapshots:
+            self.write_snapshots()
+
+    def write_snapshots(self):
+        """
+        Render the snapshots of the new version, recording any error in `snapshot_error`.
+        """
+        if self.state is None or not settings.API_SNAPSHOT_DIR:
+            return
+        try:
+            with transaction.atomic():
+                write_snapshots(self.state)
+        except Exception as e:
+            # The API answers live without snapshots, the new data must still be published
+            self.snapshot_error = e
+
+
+def import_all_data(batch_size=None, force=False, loader=None, workers=None, only=None, dry_run=False,
+                    quiet=False, data_dir=None, stdout=None, trace_memory=True, shadow=False):
+    """
+    Run the import stages and return an ImportRun.
+
+    `only` restricts the run to the named stages. `dry_run` runs every stage
+    on the calling thread inside one transaction that is rolled back.
+    `shadow` keeps readers off half-imported data: on PostgreSQL the stages
+    write to a shadow schema that is swapped in once they all succeeded, on
+    other backends they run in one transaction that is rolled back if any
+    stage fails. When the run changed any row the dataset version is bumped,
+    which retires cached API responses, in the transaction of the last stage
+    (see DatasetPublisher) or of the shadow swap, and the API snapshots are
+    rendered for it. Tracing memory slows the import down; without it
+    peak_memory is None.
+    """
+    if dry_run and shadow:
+        raise ValueError("A dry run cannot also be a shadow import.")
+    if workers is None:
+        workers = settings.IMPORT_WORKERS
+    shadow_import = ShadowImport() if shadow and connection.vendor == 'postgresql' else None
+    if connection.vendor == 'sqlite' or dry_run or (shadow and shadow_import is None):
+        # SQLite allows a single writer at a time, a dry run or a single-transaction import needs one connection
+        workers = 1
+    reports = {
+        name: StageReport(name, stdout=stdout, quiet=quiet, buffered=True, track_memory=workers == 1)
+        for name in STAGE_NAMES
+    }
+    steps = import_steps(batch_size=batch_size, force=force, loader=loader, data_dir=data_dir, reports=reports)
+    if only:
+        steps = select_steps(steps, only)
+    check_dag(steps)
+    reports = [reports[step.name] for step in steps]
+    publisher = DatasetPublisher(reports, [step.name for step in steps], snapshots=shadow_import is None)
+    if not dry_run and shadow_import is None:
+        steps = [ImportStep(step.name, publisher.stage(step.name, step.func), step.depends_on) for step in steps]
+
+    peak_memory = None
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        if shadow_import is not None:
+            shadow_import.prepare()
+            try:
+                with shadow_import.active():
+                    finished, failed = run_steps(steps, max_workers=workers)
+            except BaseException:
+                shadow_import.discard()
+                raise
+        elif dry_run or shadow:
+            with transaction.atomic():
+                finished, failed = run_steps(steps, max_workers=workers)
+                transaction.set_rollback(dry_run or not ImportRun.succeeded(reports, failed))
+        else:
+            finished, failed = run_steps(steps, max_workers=workers)
+        if trace_memory:
+            _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    if peak_memory is not None:
+        # Stages reset the peak as they start, so the overall peak is the largest of theirs
+        peak_memory = max([peak_memory] + [report.peak_memory for report in reports if report.peak_memory is not None])
+
+    swap_seconds = None
+    if shadow_import is not None:
+        if ImportRun.succeeded(reports, failed):
+            swap_seconds = shadow_import.swap(before_commit=publisher.publish)
+            # Rendered once the swap released its locks, the API answers live meanwhile
+            publisher.write_snapshots()
+        else:
+            shadow_import.discard()
+
+    kept = not dry_run and (not shadow or ImportRun.succeeded(reports, failed))
+    if kept and publisher.state is None:
+        # A stage was skipped after another failed, so none of them was the last: publish what did commit
+        with transaction.atomic():
+            publisher.publish()
+    version = publisher.state[0] if kept and publisher.state is not None else None
+    return ImportRun(
+        reports,
+        workers,
+        failed,
+        time.perf_counter() - started,
+        peak_memory,
+        dry_run=dry_run,
+        shadow=shadow,
+        swap_seconds=swap_seconds,
+        dataset_version=version,
+        snapshot_error=publisher.snapshot_error if kept else None,
+    )
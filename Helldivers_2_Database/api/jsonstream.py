@@ -0,0 +1,100 @@
+import codecs
+import json
+from json.decoder import scanstring
+
+WHITESPACE = ' \t\n\r'
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+class _NeedMore(Exception):
+    pass
+
+
+class ObjectStreamReader:
+    """
+    Incrementally decode the members of a top-level JSON object from a binary file.
+
+    Only the member being decoded and one read chunk are held in memory, so
+    files much larger than the records they contain can be walked with a flat
+    memory profile. Every chunk read is also fed to `on_chunk` (e.g. a hash).
+    """
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE, on_chunk=None):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.on_chunk = on_chunk
+        self.decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if self.on_chunk is not None and chunk:
+            self.on_chunk(chunk)
+        self.eof = not chunk
+        # Drop what has already been consumed before appending
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+        return True
+
+    def _error(self, message):
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def _skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def _expect(self, characters):
+        self._skip_whitespace()
+        if self.pos >= len(self.buffer):
+            raise self._error("Unexpected end of JSON input")
+        character = self.buffer[self.pos]
+        if character not in characters:
+            raise self._error(f"Expecting {' or '.join(repr(character) for character in characters)}")
+        self.pos += 1
+        return character
+
+    def _decode(self, decode):
+        while True:
+            try:
+                value, end = decode()
+                if end >= len(self.buffer) and not self.eof:
+                    # A number or literal may continue in the next chunk
+                    raise _NeedMore
+            except (json.JSONDecodeError, _NeedMore):
+                if not self._fill():
+                    raise
+                continue
+            self.pos = end
+            return value
+
+    def __iter__(self):
+        self._expect('{')
+        self._skip_whitespace()
+        if self.buffer[self.pos:self.pos + 1] == '}':
+            self.pos += 1
+            return
+        while True:
+            self._expect('"')
+            key = self._decode(lambda: scanstring(self.buffer, self.pos))
+            self._expect(':')
+            self._skip_whitespace()
+            value = self._decode(lambda: _decoder.raw_decode(self.buffer, self.pos))
+            yield key, value
+            if self._expect(',}') == '}':
+                return
+
+
+def iter_object_items(file, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """
+    Yield the (key, value) members of the top-level JSON object in `file`, one at a time.
+    """
+    return iter(ObjectStreamReader(file, chunk_size=chunk_size, on_chunk=on_chunk))
@@ -0,0 +1,166 @@
+import threading
+
+import numpy as np
+
+from .cache import dataset_state
+from .models import Armor, Weapon
+
+ARMOR_FEATURES = ('armor_rating', 'speed', 'stamina_regen')
+WEAPON_FEATURES = ('damage', 'capacity', 'fire_rate', 'recoil')
+ROLES = ('primary', 'secondary', 'grenade')
+# Features are scaled to 0..1 within each role before weighting, a negative weight prefers low values
+DEFAULT_WEIGHTS = {
+    'armor_rating': 1.0,
+    'speed': 1.0,
+    'stamina_regen': 1.0,
+    'damage': 1.0,
+    'capacity': 0.5,
+    'fire_rate': 0.5,
+    'recoil': -0.5,
+}
+# Constraints on weapons apply to primaries and secondaries, grenades only have a damage
+WEAPON_CONSTRAINTS = {
+    'min_damage': ('damage', np.greater_equal),
+    'min_capacity': ('capacity', np.greater_equal),
+    'max_recoil': ('recoil', np.less_equal),
+}
+ARMOR_CONSTRAINTS = ('min_armor_rating', 'passive', 'slot')
+
+
+def scaled(features):
+    """
+    Return the columns of `features` scaled to 0..1, a constant column being all 0.
+    """
+    if not len(features):
+        return features
+    low, high = features.min(axis=0), features.max(axis=0)
+    spread = np.where(high > low, high - low, 1.0)
+    return (features - low) / spread
+
+
+def top_indices(scores, k):
+    """
+    Return the indices of the `k` highest `scores`, highest first, ties in index order.
+    """
+    if len(scores) > k:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def merge_top(scores, combos, other_scores, other_indices, k):
+    """
+    Return the `k` best (score, combo) of every combo extended with one of the other candidates.
+
+    Scores add up, so the best k extensions only ever use the best k combos and the best k candidates.
+    """
+    totals = (scores[:, None] + other_scores[None, :]).ravel()
+    best = top_indices(totals, k)
+    rows, columns = np.divmod(best, len(other_scores))
+    return totals[best], np.column_stack((combos[rows], other_indices[columns]))
+
+
+class LoadoutCatalog:
+    """
+    Armor and weapon stats as NumPy columns, to rank armor × primary × secondary × grenade loadouts.
+
+    A loadout scores the sum of its parts, each part the dot product of its
+    scaled features with the weights. Since the sum is separable, only the k
+    best candidates of each part can be in the k best loadouts: every part
+    is filtered and cut to its top k, then the parts are combined pairwise,
+    keeping the top k after each step, instead of scoring the whole product.
+    """
+
+    def __init__(self, armors, weapons):
+        # armors: (id, slot_id, passive_id, *ARMOR_FEATURES)
+        # weapons: (id, is_primary, is_secondary, is_grenade, *WEAPON_FEATURES)
+        self.armor_ids = np.array([row[0] for row in armors], dtype=object)
+        self.armor_slots = np.array([-1 if row[1] is None else row[1] for row in armors], dtype=np.int64)
+        self.armor_passives = np.array([-1 if row[2] is None else row[2] for row in armors], dtype=np.int64)
+        self.armor_raw = np.array([row[3:] for row in armors], dtype=np.float64).reshape(-1, len(ARMOR_FEATURES))
+        self.armor_features = scaled(self.armor_raw)
+        self.weapons = {}
+        for position, role in enumerate(ROLES):
+            rows = [row for row in weapons if row[1 + position]]
+            raw = np.array([row[4:] for row in rows], dtype=np.float64).reshape(-1, len(WEAPON_FEATURES))
+            self.weapons[role] = (np.array([row[0] for row in rows], dtype=object), raw, scaled(raw))
+
+    @classmethod
+    def from_database(cls):
+        armors = Armor.objects.order_by('pk').values_list('pk', 'slot_id', 'passive_id', *ARMOR_FEATURES)
+        weapons = Weapon.objects.order_by('pk').values_list(
+            'pk', 'is_primary', 'is_secondary', 'is_grenade', *WEAPON_FEATURES
+        )
+        return cls(list(armors), list(weapons))
+
+    def armor_candidates(self, constraints, weights):
+        keep = np.ones(len(self.armor_ids), dtype=bool)
+        if constraints.get('min_armor_rating') is not None:
+            keep &= self.armor_raw[:, ARMOR_FEATURES.index('armor_rating')] >= constraints['min_armor_rating']
+        if constraints.get('passive') is not None:
+            keep &= self.armor_passives == constraints['passive']
+        if constraints.get('slot') is not None:
+            keep &= self.armor_slots == constraints['slot']
+        indices = np.flatnonzero(keep)
+        vector = np.array([weights[name] for name in ARMOR_FEATURES])
+        return indices, self.armor_features[indices] @ vector
+
+    def weapon_candidates(self, role, constraints, weights):
+        ids, raw, features = self.weapons[role]
+        keep = np.ones(len(ids), dtype=bool)
+        if role != 'grenade':
+            for name, (feature, compare) in WEAPON_CONSTRAINTS.items():
+                if constraints.get(name) is not None:
+                    keep &= compare(raw[:, WEAPON_FEATURES.index(feature)], constraints[name])
+        indices = np.flatnonzero(keep)
+        vector = np.array([weights[name] for name in WEAPON_FEATURES])
+        return indices, features[indices] @ vector
+
+    def best_loadouts(self, constraints=None, weights=None, k=10):
+        """
+        Return (loadouts, candidate counts) for the `k` best loadouts meeting `constraints`.
+
+        Each loadout is a dict of the score and the armor, primary, secondary
+        and grenade IDs. `weights` override DEFAULT_WEIGHTS by feature name.
+        """
+        constraints = constraints or {}
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        parts = [('armor', self.armor_ids, *self.armor_candidates(constraints, weights))]
+        for role in ROLES:
+            parts.append((role, self.weapons[role][0], *self.weapon_candidates(role, constraints, weights)))
+        counts = {name: len(indices) for name, _, indices, _ in parts}
+        if not all(counts.values()):
+            return [], counts
+
+        scores, combos = None, None
+        for _, _, indices, part_scores in parts:
+            best = top_indices(part_scores, k)
+            if scores is None:
+                scores, combos = part_scores[best], indices[best][:, None]
+            else:
+                scores, combos = merge_top(scores, combos, part_scores[best], indices[best], k)
+        loadouts = []
+        for score, combo in zip(scores, combos):
+            loadout = {'score': round(float(score), 4)}
+            for (name, ids, _, _), index in zip(parts, combo):
+                loadout[name] = ids[index]
+            loadouts.append(loadout)
+        return loadouts, counts
+
+
+_catalog = (None, None)
+_catalog_lock = threading.Lock()
+
+
+def loadout_catalog():
+    """
+    Return the LoadoutCatalog of the current dataset version, building it on the first request after an import.
+    """
+    global _catalog
+    state = dataset_state()
+    if _catalog[0] != state:
+        with _catalog_lock:
+            if _catalog[0] != state:
+                _catalog = (state, LoadoutCatalog.from_database())
+    return _catalog[1]
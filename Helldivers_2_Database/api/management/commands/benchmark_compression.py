@@ -0,0 +1,97 @@
+import json
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from ...benchmarks import current_commit, throwaway_database
+from ...compression import available_encodings
+from ...importer import import_all_data
+from ...models import Planet
+from ...synthetic import generate_dataset
+
+PRECOMPRESSED = 'Helldivers_2_Database.api.compression.PrecompressedResponseMiddleware'
+
+
+def cpu_per_request(client, path, repeat, **headers):
+    """
+    Return (body bytes, CPU seconds per request) of `repeat` requests for `path`, after one warm-up request.
+    """
+    response = client.get(path, **headers)
+    if response.status_code != 200:
+        raise CommandError(f"{path} answered {response.status_code}.")
+    started = time.process_time()
+    for _ in range(repeat):
+        client.get(path, **headers)
+    return len(response.content), (time.process_time() - started) / repeat
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare bytes on the wire and CPU per request of the API without compression, with GZipMiddleware "
+        "compressing every response, and with precompressed variants, in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--planets', type=int, default=2000, help="Number of synthetic planets (default: 2000).")
+        parser.add_argument('--page-size', type=int, default=100, help="Page size of the list requests (default: 100).")
+        parser.add_argument('--repeat', type=int, default=200, help="Requests per measurement (default: 200).")
+        parser.add_argument('--keepdb', action='store_true', help="Keep the test database between runs.")
+        parser.add_argument('--output', help="File to write the JSON results to.")
+
+    def handle(self, *args, **options):
+        if min(options['planets'], options['page_size'], options['repeat']) < 1:
+            raise CommandError("--planets, --page-size and --repeat must be positive.")
+        without = [name for name in settings.MIDDLEWARE if name != PRECOMPRESSED]
+        modes = [('identity', without, '')]
+        modes.append(('gzip per request', ['django.middleware.gzip.GZipMiddleware'] + without, 'gzip'))
+        modes.extend((f'{encoding} precompressed', settings.MIDDLEWARE, encoding) for encoding in available_encodings())
+
+        results = []
+        setup_test_environment()
+        try:
+            with tempfile.TemporaryDirectory() as data_dir, throwaway_database(keepdb=options['keepdb']):
+                generate_dataset(data_dir, planets=options['planets'], weapons=200, armors=200)
+                import_all_data(data_dir=data_dir, workers=1, quiet=True, stdout=self.stderr, trace_memory=False)
+                user = User.objects.create_user('benchmark')
+                paths = [
+                    f'/{prefix}/?page_size={options["page_size"]}' for prefix in ('planets', 'weapons', 'armors')
+                ]
+                # A detail without query parameters is served from its snapshot
+                paths.append(f'/planets/{Planet.objects.order_by("pk").values_list("pk", flat=True).first()}/')
+                for mode, middleware, encoding in modes:
+                    with override_settings(MIDDLEWARE=middleware):
+                        client = Client()
+                        client.force_login(user)
+                        for path in paths:
+                            size, cpu = cpu_per_request(
+                                client, path, options['repeat'], HTTP_ACCEPT_ENCODING=encoding
+                            )
+                            results.append({'path': path, 'mode': mode, 'bytes': size, 'cpu_ms': round(cpu * 1000, 3)})
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f"{'path':<28} {'mode':<20} {'bytes':>9} {'cpu/request':>12}")
+        for result in results:
+            self.stdout.write(
+                f"{result['path']:<28} {result['mode']:<20} {result['bytes']:>9} {result['cpu_ms']:>10.3f}ms"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'commit': current_commit(),
+                    'database': connection.vendor,
+                    'planets': options['planets'],
+                    'page_size': options['page_size'],
+                    'repeat': options['repeat'],
+                    'results': results,
+                }, file, indent=2)
+                file.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,120 @@
+import json
+import tempfile
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ...benchmarks import current_commit, throwaway_database
+from ...importer import import_all_data
+from ...synthetic import generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a dataset into a throwaway test database and write wall time, queries "
+        "and peak memory per stage as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            help="Import this dataset instead of generating a synthetic one.",
+        )
+        parser.add_argument('--planets', type=int, default=10000, help="Planets in the synthetic dataset.")
+        parser.add_argument('--weapons', type=int, default=1000, help="Weapons in the synthetic dataset.")
+        parser.add_argument('--armors', type=int, default=1000, help="Armors in the synthetic dataset.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic dataset.")
+        parser.add_argument('--batch-size', type=int, help="Rows per bulk statement (default: IMPORT_BATCH_SIZE).")
+        parser.add_argument('--copy', action='store_true', help="Load rows with PostgreSQL COPY.")
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="Stages run in parallel (default: 1, peak memory per stage is only recorded with 1).",
+        )
+        parser.add_argument(
+            '--no-memory',
+            action='store_true',
+            help="Don't trace memory; tracing slows the import down, so wall times are lower without it.",
+        )
+        parser.add_argument('--keepdb', action='store_true', help="Keep the test database between runs.")
+        parser.add_argument('--output', help="File to write the JSON results to (default: stdout).")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1.")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = options['data_dir']
+            dataset = {'data_dir': data_dir}
+            if data_dir is None:
+                data_dir = temp_dir
+                dataset = {
+                    'planets': options['planets'],
+                    'weapons': options['weapons'],
+                    'armors': options['armors'],
+                    'seed': options['seed'],
+                    'files': generate_dataset(
+                        data_dir,
+                        planets=options['planets'],
+                        weapons=options['weapons'],
+                        armors=options['armors'],
+                        seed=options['seed'],
+                    ),
+                }
+
+            # Never benchmark against the configured database, the import would overwrite it
+            with throwaway_database(keepdb=options['keepdb']):
+                run = import_all_data(
+                    batch_size=options['batch_size'],
+                    force=True,
+                    loader='copy' if options['copy'] else None,
+                    workers=options['workers'],
+                    quiet=True,
+                    data_dir=data_dir,
+                    stdout=self.stderr,
+                    trace_memory=not options['no_memory'],
+                )
+
+        results = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'commit': current_commit(),
+            'database': connection.vendor,
+            'dataset': dataset,
+            'options': {
+                'batch_size': options['batch_size'] or settings.IMPORT_BATCH_SIZE,
+                'loader': 'copy' if options['copy'] else settings.IMPORT_LOADER,
+                'workers': run.workers,
+                'trace_memory': not options['no_memory'],
+            },
+            'stages': [
+                {
+                    'name': report.name,
+                    'rows_read': report.rows_read,
+                    'rows_written': report.rows_written,
+                    'queries': report.queries,
+                    'seconds': round(report.seconds, 4),
+                    'peak_memory_bytes': report.peak_memory,
+                    'errors': report.errors,
+                }
+                for report in run.reports
+            ],
+            'total': {
+                'rows_read': sum(report.rows_read for report in run.reports),
+                'rows_written': sum(report.rows_written for report in run.reports),
+                'queries': sum(report.queries for report in run.reports),
+                'seconds': round(run.seconds, 4),
+                'peak_memory_bytes': run.peak_memory,
+                'failed': {name: str(error) for name, error in run.failed.items()},
+            },
+        }
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+        for line in run.table():
+            self.stderr.write(line)
@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ...benchmarks import current_commit, throwaway_database
+from ...importer import import_all_data
+from ...search import NgramIndex, database_search
+
+QUERIES = ['Super Terre', 'スーパーアース', 'liberat', 'Liberatr', 'padding', 'B-01', 'stamina', 'su']
+
+
+def median_seconds(search, queries, repeat, limit):
+    """
+    Return the median time of `repeat` searches of each query, after one warm-up search.
+    """
+    search(queries[0], limit)
+    durations = []
+    for query in queries * repeat:
+        started = time.perf_counter()
+        search(query, limit)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time /search/ queries on the game dataset with the in-memory index and, on PostgreSQL, pg_trgm, "
+        "in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            default=os.path.join(settings.BASE_DIR, 'Ressources', 'Json'),
+            help="Directory of the JSON files to search (default: the game dataset).",
+        )
+        parser.add_argument('--repeat', type=int, default=20, help="Searches of each query (default: 20).")
+        parser.add_argument('--limit', type=int, default=20, help="Results per search (default: 20).")
+        parser.add_argument('--keepdb', action='store_true', help="Keep the test database between runs.")
+        parser.add_argument('--output', help="File to write the JSON results to.")
+
+    def handle(self, *args, **options):
+        if min(options['repeat'], options['limit']) < 1:
+            raise CommandError("--repeat and --limit must be positive.")
+        results = []
+        with throwaway_database(keepdb=options['keepdb']):
+            import_all_data(
+                data_dir=options['data_dir'], workers=1, quiet=True, stdout=io.StringIO(), trace_memory=False
+            )
+            backends = [('ngram', NgramIndex.from_database().search)]
+            if connection.vendor == 'postgresql':
+                backends.append(('database', database_search))
+            for backend, search in backends:
+                seconds = median_seconds(search, QUERIES, options['repeat'], options['limit'])
+                results.append({'backend': backend, 'median_ms': round(seconds * 1000, 3)})
+
+        self.stdout.write(f"{'backend':<10} {'median':>10}")
+        for result in results:
+            self.stdout.write(f"{result['backend']:<10} {result['median_ms']:>8.3f}ms")
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'commit': current_commit(),
+                    'database': connection.vendor,
+                    'queries': QUERIES,
+                    'repeat': options['repeat'],
+                    'results': results,
+                }, file, indent=2)
+                file.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,93 @@
+import json
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+
+from ...benchmarks import current_commit, throwaway_database
+from ...fastpath import values_serializer
+from ...importer import import_all_data
+from ...synthetic import generate_dataset
+from ...views import ArmorViewSet, PlanetViewSet, WeaponViewSet
+
+ENDPOINTS = {
+    'planets': PlanetViewSet,
+    'weapons': WeaponViewSet,
+    'armors': ArmorViewSet,
+}
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the serializer and .values() list paths of the catalog endpoints on a synthetic dataset "
+        "in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[1000, 10000], help="Row counts to serialize (default: 1000 10000)."
+        )
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement, the best is kept.")
+        parser.add_argument('--keepdb', action='store_true', help="Keep the test database between runs.")
+        parser.add_argument('--output', help="File to write the JSON results to.")
+
+    def handle(self, *args, **options):
+        if min(options['rows']) < 1 or options['repeat'] < 1:
+            raise CommandError("--rows and --repeat must be positive.")
+        size = max(options['rows'])
+        renderer = JSONRenderer()
+        results = []
+        with tempfile.TemporaryDirectory() as data_dir, throwaway_database(keepdb=options['keepdb']):
+            generate_dataset(data_dir, planets=size, weapons=size, armors=size)
+            import_all_data(data_dir=data_dir, workers=1, quiet=True, stdout=self.stderr, trace_memory=False)
+
+            for endpoint, viewset in ENDPOINTS.items():
+                serializer_class = viewset.serializer_class
+                fast = values_serializer(serializer_class)
+                queryset = viewset().get_queryset().order_by('pk')
+                for rows in sorted(options['rows']):
+                    serializer_seconds = best_of(
+                        options['repeat'],
+                        lambda: renderer.render(serializer_class(queryset[:rows], many=True).data),
+                    )
+                    values_seconds = best_of(
+                        options['repeat'],
+                        lambda: renderer.render(fast.serialize(fast.rows(queryset)[:rows])),
+                    )
+                    results.append({
+                        'endpoint': endpoint,
+                        'rows': rows,
+                        'serializer_seconds': round(serializer_seconds, 4),
+                        'values_seconds': round(values_seconds, 4),
+                        'speedup': round(serializer_seconds / values_seconds, 2),
+                    })
+
+        self.stdout.write(f"{'endpoint':<10} {'rows':>7} {'serializer':>11} {'values':>9} {'speedup':>8}")
+        for result in results:
+            self.stdout.write(
+                f"{result['endpoint']:<10} {result['rows']:>7} {result['serializer_seconds']:>10.3f}s "
+                f"{result['values_seconds']:>8.3f}s {result['speedup']:>7.1f}x"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'commit': current_commit(),
+                    'database': connection.vendor,
+                    'repeat': options['repeat'],
+                    'results': results,
+                }, file, indent=2)
+                file.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
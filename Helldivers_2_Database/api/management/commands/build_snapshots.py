@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...cache import dataset_state
+from ...snapshots import write_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the API snapshots of the current dataset version, e.g. after a deploy "
+        "(imports render them on their own)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help="Directory to write the snapshots to (default: API_SNAPSHOT_DIR).")
+
+    def handle(self, *args, **options):
+        root = options['dir'] or settings.API_SNAPSHOT_DIR
+        if not root:
+            raise CommandError("API_SNAPSHOT_DIR is empty, snapshots are turned off.")
+        state = dataset_state()
+        if state[1] is None:
+            raise CommandError("Nothing was imported yet, there is nothing to snapshot.")
+        count = write_snapshots(state, root=root)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} snapshot(s) of dataset version {state[0]} to {root}"))
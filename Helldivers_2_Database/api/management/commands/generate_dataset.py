@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...synthetic import generate_dataset
+
+
+class Command(BaseCommand):
+    help = "Write a synthetic dataset shaped like Ressources/Json, at a configurable scale."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help="Directory to write the JSON files to.")
+        parser.add_argument('--planets', type=int, default=10000, help="Number of planets (default: 10000).")
+        parser.add_argument('--weapons', type=int, default=1000, help="Number of weapons (default: 1000).")
+        parser.add_argument('--armors', type=int, default=1000, help="Number of armors (default: 1000).")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, the same seed gives the same files.")
+
+    def handle(self, *args, **options):
+        if min(options['planets'], options['weapons'], options['armors']) < 0:
+            raise CommandError("Record counts cannot be negative.")
+        counts = generate_dataset(
+            options['output_dir'],
+            planets=options['planets'],
+            weapons=options['weapons'],
+            armors=options['armors'],
+            seed=options['seed'],
+        )
+        for relative_path, count in counts.items():
+            self.stdout.write(f"{relative_path}: {count} records")
+        self.stdout.write(self.style.SUCCESS(f"Dataset written to {options['output_dir']}"))
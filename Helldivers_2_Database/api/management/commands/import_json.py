@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...importer import STAGE_NAMES, import_all_data
+
+
+class Command(BaseCommand):
+    help = "Import the JSON resource files into the database and report rows, queries and time per stage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            action='append',
+            default=[],
+            help=f"Comma-separated stages to import (default: all of {', '.join(STAGE_NAMES)}).",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Run the import and roll it back.")
+        parser.add_argument('--batch-size', type=int, help="Rows per bulk statement (default: IMPORT_BATCH_SIZE).")
+        parser.add_argument('--workers', type=int, help="Stages run in parallel (default: IMPORT_WORKERS).")
+        parser.add_argument('--force', action='store_true', help="Re-import files even if they are unchanged.")
+        parser.add_argument('--copy', action='store_true', help="Load rows with PostgreSQL COPY.")
+        parser.add_argument('--data-dir', help="Directory of the JSON files (default: IMPORT_DATA_DIR).")
+        parser.add_argument(
+            '--shadow',
+            action='store_true',
+            help="Import into a shadow schema and swap it in at the end, so readers never see a partial import.",
+        )
+        parser.add_argument('--quiet', action='store_true', help="Only print errors and the final report.")
+
+    def handle(self, *args, **options):
+        only = [name.strip() for value in options['only'] for name in value.split(',') if name.strip()]
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError("--workers must be at least 1.")
+        try:
+            run = import_all_data(
+                batch_size=options['batch_size'],
+                force=options['force'],
+                loader='copy' if options['copy'] else None,
+                workers=options['workers'],
+                only=only,
+                dry_run=options['dry_run'],
+                quiet=options['quiet'],
+                data_dir=options['data_dir'],
+                stdout=self.stdout,
+                shadow=options['shadow'],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        for name, error in run.failed.items():
+            self.stderr.write(f"Error: import stage {name} did not complete: {error}")
+        self.stdout.write('')
+        for line in run.table():
+            self.stdout.write(line)
+        self.stdout.write(
+            f"Ran {len(run.reports)} import stage(s) on {run.workers} worker(s) in {run.seconds:.2f}s "
+            f"(peak memory {run.peak_memory / 2 ** 20:.1f} MiB)"
+        )
+        if run.dry_run:
+            self.stdout.write("Dry run, all changes were rolled back.")
+        elif run.shadow and not run.ok:
+            self.stdout.write("Shadow import incomplete, the live tables were left untouched.")
+        elif run.swap_seconds is not None:
+            self.stdout.write(f"Swapped the shadow tables in, holding the locks for {run.swap_seconds * 1000:.1f} ms.")
+        if run.dataset_version is not None:
+            self.stdout.write(f"Dataset version is now {run.dataset_version}.")
+        if run.snapshot_error is not None:
+            # The data is imported and published, but the servers are left answering live
+            raise CommandError(f"Could not write the API snapshots, the API answers live: {run.snapshot_error}")
+        if run.ok and not run.dry_run:
+            self.stdout.write(self.style.SUCCESS("All data imported successfully!"))
@@ -0,0 +1,154 @@
+import hashlib
+import json
+
+from .bulk import get_batch_size
+from .jsonstream import CHUNK_SIZE, iter_object_items
+from .models import ImportManifest
+
+
+def content_hash(data):
+    """
+    Return the sha256 hex digest of raw bytes or of a JSON-serializable record.
+    """
+    if not isinstance(data, bytes):
+        data = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(file_path, chunk_size=CHUNK_SIZE):
+    """
+    Return the sha256 hex digest of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ManifestDiff:
+    """
+    Compare a JSON resource file with the manifest of its previous import.
+
+    The file is first hashed in chunks; when the hash matches the manifest
+    `unchanged` is True and the file is never decoded. Otherwise batches()
+    streams the records and yields only those whose content hash differs from
+    the last import. Once it is exhausted `removed` holds the keys that
+    disappeared from the file and `read` the number of records decoded.
+    `force` treats every record as changed. Records passed to retry() are
+    saved without a hash, so the next import writes them again. When the
+    import creates or deletes rows, the manifests of the models referencing
+    this one are invalidated, see invalidate_dependents().
+    """
+
+    def __init__(self, file_path, model, force=False):
+        self.file_path = file_path
+        self.model = model
+        self.force = force
+        self.file_hash = file_hash(file_path)
+        self.manifest = ImportManifest.objects.filter(file_path=file_path).first()
+        self.unchanged = not force and self.manifest is not None and self.manifest.file_hash == self.file_hash
+        self.record_hashes = {}
+        self.retried = set()
+        self.removed = []
+        self.read = self.changed = self.created = self.updated = self.deleted = 0
+
+    def batches(self, batch_size=None):
+        """
+        Stream the file and yield {key: record} dicts of at most `batch_size` changed records.
+        """
+        batch_size = get_batch_size(batch_size)
+        previous = self.manifest.record_hashes if self.manifest else {}
+        streamed = hashlib.sha256()
+        batch = {}
+        with open(self.file_path, 'rb') as file:
+            for key, record in iter_object_items(file, on_chunk=streamed.update):
+                self.read += 1
+                digest = content_hash(record)
+                self.record_hashes[key] = digest
+                if self.force or previous.get(key) != digest:
+                    batch[key] = record
+                    if len(batch) >= batch_size:
+                        self.changed += len(batch)
+                        yield batch
+                        batch = {}
+        if batch:
+            self.changed += len(batch)
+            yield batch
+        # Record what was actually decoded, even if the file changed since it was first hashed
+        self.file_hash = streamed.hexdigest()
+        self.removed = [key for key in previous if key not in self.record_hashes]
+
+    def retry(self, key):
+        """
+        Have the next import write the record `key` again, e.g. because a reference of it could not be resolved.
+
+        Its row was written with that reference left NULL; once the referenced
+        row exists, the next import fills it in even if the file hasn't changed.
+        """
+        self.retried.add(key)
+
+    def tally(self, counts):
+        """
+        Add a (created, updated) result of bulk_upsert() to the totals of this file.
+        """
+        created, updated = counts
+        self.created += created
+        self.updated += updated
+
+    def delete_removed(self, to_pk=str):
+        """
+        Delete the rows of records that disappeared from the file and return how many were deleted.
+
+        Keys that another file of the same model still provides (e.g. a weapon
+        moving from primary.json to secondary.json) are kept.
+        """
+        if not self.removed:
+            return 0
+        still_provided = set()
+        others = ImportManifest.objects.filter(model_label=self.model._meta.label).exclude(file_path=self.file_path)
+        for record_hashes in others.values_list('record_hashes', flat=True):
+            still_provided.update(record_hashes)
+        removed = [to_pk(key) for key in self.removed if key not in still_provided]
+        if removed:
+            self.model._base_manager.filter(pk__in=removed).delete()
+        self.deleted = len(removed)
+        return self.deleted
+
+    def invalidate_dependents(self):
+        """
+        Have the next import write every record of the models with a foreign key or many-to-many to this model again.
+
+        Deleting a row set their references to it to NULL (or deleted their
+        links), and a row coming back doesn't restore them: the records
+        holding the reference are unchanged and would be skipped.
+        """
+        labels = {relation.related_model._meta.label for relation in self.model._meta.related_objects}
+        for manifest in ImportManifest.objects.filter(model_label__in=labels):
+            manifest.file_hash = ''
+            manifest.record_hashes = dict.fromkeys(manifest.record_hashes, '')
+            manifest.save(update_fields=['file_hash', 'record_hashes'])
+
+    def save(self):
+        """
+        Record the hashes of this import; call it inside the transaction that writes the records.
+        """
+        if self.created or self.deleted:
+            self.invalidate_dependents()
+        # An empty hash matches no content, so the file and the retried records are read again
+        record_hashes = {key: '' if key in self.retried else digest for key, digest in self.record_hashes.items()}
+        ImportManifest.objects.update_or_create(
+            file_path=self.file_path,
+            defaults={
+                'model_label': self.model._meta.label,
+                'file_hash': '' if self.retried else self.file_hash,
+                'record_hashes': record_hashes,
+            }
+        )
+
+    @property
+    def written(self):
+        return self.created + self.updated + self.deleted
+
+    def summary(self):
+        return f"{self.changed} changed: {self.created} created, {self.updated} updated, {self.deleted} deleted"
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-18 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_armorpassive_armorslot_biome_booster_environmental_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportManifest',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('file_path', models.CharField(max_length=255, unique=True)),
+                ('model_label', models.CharField(max_length=100)),
+                ('file_hash', models.CharField(max_length=64)),
+                ('record_hashes', models.JSONField(default=dict)),
+                ('imported_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Import Manifest',
+                'verbose_name_plural': 'Import Manifests',
+                'db_table': 'import_manifests',
+            },
+        ),
+    ]
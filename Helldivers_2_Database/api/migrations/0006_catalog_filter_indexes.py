@@ -0,0 +1,65 @@
+# Generated by Django 4.2 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_dataset_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='planet',
+            index=models.Index(fields=['name', 'id'], name='planets_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['name', 'id'], name='weapons_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['damage', 'id'], name='weapons_damage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['fire_rate', 'id'], name='weapons_fire_rate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['type', 'damage'], name='weapons_type_damage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['is_primary', 'damage'], name='weapons_primary_damage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['is_secondary', 'damage'], name='weapons_secondary_damage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['is_grenade', 'damage'], name='weapons_grenade_damage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='armor',
+            index=models.Index(fields=['name', 'id'], name='armors_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='armor',
+            index=models.Index(fields=['armor_rating', 'id'], name='armors_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='armor',
+            index=models.Index(fields=['speed', 'id'], name='armors_speed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='armor',
+            index=models.Index(fields=['slot', 'passive'], name='armors_slot_passive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='armor',
+            index=models.Index(fields=['type'], name='armors_type_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2 on 2026-10-18 19:10
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Columns searched by /search/, see search.searched_models()
+SEARCHED_COLUMNS = {
+    'planets': [
+        'name', 'name_en_US', 'name_en_GB', 'name_pt_BR', 'name_de_DE', 'name_es_ES', 'name_fr_FR',
+        'name_it_IT', 'name_ja_JP', 'name_ko_KO', 'name_ms_MY', 'name_pl_PL',
+    ],
+    'weapons': ['name'],
+    'armors': ['name'],
+    'boosters': ['name'],
+    'items': ['name'],
+}
+
+
+def index_name(table, column):
+    return f'{table}_{column.lower()}_trgm'
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # GIN trigram indexes serve ILIKE '%...%' and the word similarity operators; other databases search in memory
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for table, columns in SEARCHED_COLUMNS.items():
+        for column in columns:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {quote(index_name(table, column))} '
+                f'ON {quote(table)} USING gin ({quote(column)} gin_trgm_ops)'
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, columns in SEARCHED_COLUMNS.items():
+        for column in columns:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(index_name(table, column))}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_catalog_filter_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2 on 2026-10-18 16:21
+
+import bisect
+
+from django.db import migrations, models
+
+
+def compute_weapon_stats(apps, schema_editor):
+    # Weapons imported before this migration get their stats without a re-import. Same formulas as
+    # analytics.weapon_stats(), copied so the migration keeps working whatever that module becomes
+    Weapon = apps.get_model('api', 'Weapon')
+    weapons = list(Weapon.objects.order_by('pk'))
+    dps_by_type = {}
+    for weapon in weapons:
+        rounds_per_second = weapon.fire_rate / 60
+        firing = rounds_per_second > 0
+        weapon.dps = round(weapon.damage * rounds_per_second, 2) if firing else 0.0
+        weapon.damage_per_magazine = weapon.damage * weapon.capacity
+        weapon.time_to_empty = round(weapon.capacity / rounds_per_second, 2) if firing else 0.0
+        # Weapons without a type are ranked together
+        dps_by_type.setdefault(weapon.type_id, []).append(weapon.dps)
+    for group in dps_by_type.values():
+        group.sort()
+    for weapon in weapons:
+        group = dps_by_type[weapon.type_id]
+        weapon.dps_percentile = round(100 * bisect.bisect_right(group, weapon.dps) / len(group), 2)
+    Weapon.objects.bulk_update(
+        weapons, ['dps', 'damage_per_magazine', 'time_to_empty', 'dps_percentile'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weapon',
+            name='damage_per_magazine',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='weapon',
+            name='dps',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='weapon',
+            name='dps_percentile',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='weapon',
+            name='time_to_empty',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['dps', 'id'], name='weapons_dps_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['damage_per_magazine', 'id'], name='weapons_magazine_damage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['time_to_empty', 'id'], name='weapons_time_to_empty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['dps_percentile', 'id'], name='weapons_dps_percentile_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weapon',
+            index=models.Index(fields=['type', 'dps'], name='weapons_type_dps_idx'),
+        ),
+        migrations.RunPython(compute_weapon_stats, migrations.RunPython.noop),
+    ]
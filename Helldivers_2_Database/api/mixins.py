@@ -0,0 +1,146 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+
+from .pagination import cursor_columns
+
+
+def related_ordering(model):
+    """
+    Return the order in which related rows of `model` are listed, the model's own ordering or its primary key.
+    """
+    return list(model._meta.ordering) or ['pk']
+
+
+def _related_model(model, path):
+    for name in path.split('__'):
+        model = model._meta.get_field(name).related_model
+    return model
+
+
+def _related_field(model, source):
+    try:
+        return model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+
+
+def _collect(serializer, model, prefix, in_prefetch, select, prefetch):
+    for field in serializer.fields.values():
+        if field.source == '*' or not field.source:
+            continue
+        model_field = _related_field(model, field.source.split('.')[0])
+        if model_field is None or not model_field.is_relation:
+            continue
+        path = prefix + model_field.name
+        # A single forward relation can be joined, anything to-many needs its own query
+        joinable = (model_field.many_to_one or model_field.one_to_one) and model_field.concrete
+
+        if isinstance(field, serializers.ListSerializer):
+            prefetch.add(path)
+            _collect(field.child, model_field.related_model, path + '__', True, select, prefetch)
+        elif isinstance(field, serializers.BaseSerializer):
+            if joinable and not in_prefetch:
+                select.add(path)
+            else:
+                prefetch.add(path)
+            _collect(field, model_field.related_model, path + '__', in_prefetch or not joinable, select, prefetch)
+        elif isinstance(field, ManyRelatedField):
+            prefetch.add(path)
+        elif isinstance(field, PrimaryKeyRelatedField) and joinable:
+            # The primary key is read from the local column, no join needed
+            continue
+        elif isinstance(field, RelatedField):
+            if joinable and not in_prefetch:
+                select.add(path)
+            else:
+                prefetch.add(path)
+
+
+@lru_cache(maxsize=256)
+def eager_loading(serializer_class, **fieldset):
+    """
+    Return the (select_related, prefetch_related) paths a serializer class needs to avoid N+1 queries.
+
+    Nested serializers and related fields are followed recursively: single
+    forward relations are joined with select_related, to-many relations and
+    anything below them are prefetched. Prefetched rows are ordered (see
+    related_ordering()) so nested lists come out in a stable order. A
+    `fieldset` (see SparseFieldsetSerializer) leaves out the relations of the
+    fields it drops.
+    """
+    model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+    if model is None:
+        return (), ()
+    select, prefetch = set(), set()
+    _collect(serializer_class(**fieldset), model, '', False, select, prefetch)
+    # Prefetching a path also prefetches its parents
+    prefetch = {path for path in prefetch if not any(other.startswith(path + '__') for other in prefetch)}
+
+    def ordered(path):
+        related_model = _related_model(model, path)
+        return Prefetch(path, queryset=related_model._default_manager.order_by(*related_ordering(related_model)))
+
+    return tuple(sorted(select)), tuple(ordered(path) for path in sorted(prefetch))
+
+
+def _loaded(serializer, model, prefix, columns):
+    for field in serializer.fields.values():
+        if not field.source or field.source == '*' or '.' in field.source:
+            return False
+        model_field = _related_field(model, field.source)
+        if model_field is None:
+            return False
+        if model_field.many_to_many or model_field.one_to_many:
+            # Prefetched with a query of its own
+            continue
+        columns.append(prefix + model_field.name)
+        if isinstance(field, serializers.BaseSerializer):
+            if not _loaded(field, model_field.related_model, f'{prefix}{model_field.name}__', columns):
+                return False
+    return True
+
+
+@lru_cache(maxsize=256)
+def loaded_columns(serializer_class, **fieldset):
+    """
+    Return the fields to pass to .only() so a queryset selects nothing the serializer leaves out, or None.
+
+    None stands for serializers with fields whose columns cannot be told
+    (method fields, dotted sources...), which keep every column.
+    """
+    model = serializer_class.Meta.model
+    columns = []
+    if not _loaded(serializer_class(**fieldset), model, '', columns):
+        return None
+    return tuple(dict.fromkeys(columns))
+
+
+class EagerLoadingMixin:
+    """
+    Apply the select_related/prefetch_related that the viewset's serializer needs to its queryset.
+
+    When the request narrows the serializer (see SparseFieldsetMixin), the
+    queryset is also restricted with .only() to the columns still serialized,
+    plus those the paginator may order by.
+    """
+
+    def get_fieldset(self):
+        return {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        fieldset = self.get_fieldset()
+        select, prefetch = eager_loading(serializer_class, **fieldset)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        columns = loaded_columns(serializer_class, **fieldset) if fieldset else None
+        if columns is not None:
+            queryset = queryset.only(*columns, *cursor_columns(self))
+        return queryset
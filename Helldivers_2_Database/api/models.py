@@ -74,6 +74,10 @@ class Planet(models.Model):
         verbose_name = "Planet"
         verbose_name_plural = "Planets"
         db_table = "planets"
+        # Sector, biome and environmental filters use the foreign key indexes
+        indexes = [
+            models.Index(fields=['name', 'id'], name='planets_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -130,11 +134,31 @@ class Weapon(models.Model):
     is_primary = models.BooleanField(default=False)
     is_secondary = models.BooleanField(default=False)
     is_grenade = models.BooleanField(default=False)
+    # Derived from damage, capacity and fire_rate by the weapon_stats import stage
+    dps = models.FloatField(default=0)
+    damage_per_magazine = models.IntegerField(default=0)
+    time_to_empty = models.FloatField(default=0)
+    dps_percentile = models.FloatField(default=0)
 
     class Meta:
         verbose_name = "Weapon"
         verbose_name_plural = "Weapons"
         db_table = "weapons"
+        # Back the filters and orderings of the weapon list
+        indexes = [
+            models.Index(fields=['name', 'id'], name='weapons_name_idx'),
+            models.Index(fields=['damage', 'id'], name='weapons_damage_idx'),
+            models.Index(fields=['fire_rate', 'id'], name='weapons_fire_rate_idx'),
+            models.Index(fields=['type', 'damage'], name='weapons_type_damage_idx'),
+            models.Index(fields=['is_primary', 'damage'], name='weapons_primary_damage_idx'),
+            models.Index(fields=['is_secondary', 'damage'], name='weapons_secondary_damage_idx'),
+            models.Index(fields=['is_grenade', 'damage'], name='weapons_grenade_damage_idx'),
+            models.Index(fields=['dps', 'id'], name='weapons_dps_idx'),
+            models.Index(fields=['damage_per_magazine', 'id'], name='weapons_magazine_damage_idx'),
+            models.Index(fields=['time_to_empty', 'id'], name='weapons_time_to_empty_idx'),
+            models.Index(fields=['dps_percentile', 'id'], name='weapons_dps_percentile_idx'),
+            models.Index(fields=['type', 'dps'], name='weapons_type_dps_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -180,6 +204,14 @@ class Armor(models.Model):
         verbose_name = "Armor"
         verbose_name_plural = "Armors"
         db_table = "armors"
+        # Back the filters and orderings of the armor list
+        indexes = [
+            models.Index(fields=['name', 'id'], name='armors_name_idx'),
+            models.Index(fields=['armor_rating', 'id'], name='armors_rating_idx'),
+            models.Index(fields=['speed', 'id'], name='armors_speed_idx'),
+            models.Index(fields=['slot', 'passive'], name='armors_slot_passive_idx'),
+            models.Index(fields=['type'], name='armors_type_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -208,3 +240,33 @@ class Item(models.Model):
 
     def __str__(self):
         return self.name
+
+# Import bookkeeping
+class ImportManifest(models.Model):
+    id = models.AutoField(primary_key=True)
+    file_path = models.CharField(max_length=255, unique=True)
+    model_label = models.CharField(max_length=100)
+    file_hash = models.CharField(max_length=64)
+    record_hashes = models.JSONField(default=dict)  # Record key from JSON -> content hash
+    imported_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Import Manifest"
+        verbose_name_plural = "Import Manifests"
+        db_table = "import_manifests"
+
+    def __str__(self):
+        return self.file_path
+
+class DatasetVersion(models.Model):
+    id = models.AutoField(primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)  # Bumped every time an import changes the catalog
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Dataset Version"
+        verbose_name_plural = "Dataset Versions"
+        db_table = "dataset_versions"
+
+    def __str__(self):
+        return str(self.version)
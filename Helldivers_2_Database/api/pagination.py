@@ -0,0 +1,44 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CatalogCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the large catalog endpoints.
+
+    Pages are fetched with `WHERE <ordering> > <last value> LIMIT n` instead
+    of an OFFSET and a COUNT(*), so a deep page costs the same as the first
+    one. Results are ordered by primary key, or by one of the view's
+    `ordering_fields` (name by default, ties broken by primary key) with
+    e.g. `?ordering=name` / `?ordering=-name`; clients pick the page size
+    with `?page_size=`, capped at API_MAX_PAGE_SIZE.
+    """
+
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    ordering_param = 'ordering'
+    ordering_fields = ('name',)
+
+    def get_ordering_fields(self, view):
+        return tuple(getattr(view, 'ordering_fields', self.ordering_fields))
+
+    def get_ordering(self, request, queryset, view):
+        pk = queryset.model._meta.pk.attname
+        requested = request.query_params.get(self.ordering_param, '')
+        field = requested.lstrip('-')
+        if field in self.get_ordering_fields(view):
+            descending = '-' if requested.startswith('-') else ''
+            return (f'{descending}{field}', f'{descending}{pk}')
+        if field in ('pk', pk) and requested.startswith('-'):
+            return (f'-{pk}',)
+        return (pk,)
+
+
+def cursor_columns(view):
+    """
+    Return the columns the view's paginator may order a page by, which the rows must carry for its cursor.
+    """
+    paginator = view.paginator
+    if isinstance(paginator, CatalogCursorPagination):
+        return paginator.get_ordering_fields(view)
+    return ()
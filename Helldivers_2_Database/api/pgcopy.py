@@ -0,0 +1,101 @@
+import itertools
+
+from django.db import connections, router, transaction
+
+_staging_counter = itertools.count()
+
+
+def _copy_text(value):
+    """
+    Format a database value for COPY ... FROM STDIN in PostgreSQL's text format.
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+class CopyStream:
+    """
+    File-like object that feeds rows to COPY FROM STDIN as psycopg2 reads them,
+    so the payload for a whole file is never held in memory at once.
+    """
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while self._lines is not None and (size < 0 or len(self._buffer) < size):
+            try:
+                self._buffer += next(self._lines)
+            except StopIteration:
+                self._lines = None
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    readline = read
+
+
+def copy_upsert(model, objs, update_fields=None):
+    """
+    Upsert model instances with COPY into a temporary staging table and one INSERT ... ON CONFLICT.
+
+    This is the PostgreSQL fast path of bulk_upsert(): the rows are streamed
+    with COPY FROM STDIN into a staging table shaped like the target, then
+    merged with a single statement that only rewrites rows whose content
+    differs. Returns a (created, updated) tuple like bulk_upsert().
+    """
+    opts = model._meta
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor != 'postgresql':
+        raise ValueError("copy_upsert() requires PostgreSQL.")
+    objs = list(objs)
+    if not objs:
+        return 0, 0
+
+    qn = connection.ops.quote_name
+    fields = opts.concrete_fields
+    if update_fields is None:
+        update_fields = [field.name for field in fields if not field.primary_key]
+    update_columns = [opts.get_field(name).column for name in update_fields]
+    table = qn(opts.db_table)
+    staging = qn(f'{opts.db_table}_staging_{next(_staging_counter)}')
+    columns = ', '.join(qn(field.column) for field in fields)
+
+    def lines():
+        for obj in objs:
+            values = (field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields)
+            yield '\t'.join(_copy_text(value) for value in values) + '\n'
+
+    if update_columns:
+        assignments = ', '.join(f'{qn(column)} = EXCLUDED.{qn(column)}' for column in update_columns)
+        current = ', '.join(f'target.{qn(column)}' for column in update_columns)
+        incoming = ', '.join(f'EXCLUDED.{qn(column)}' for column in update_columns)
+        on_conflict = (
+            f'DO UPDATE SET {assignments} '
+            f'WHERE ROW({current}) IS DISTINCT FROM ROW({incoming})'
+        )
+    else:
+        on_conflict = 'DO NOTHING'
+
+    with transaction.atomic(using=connection.alias, savepoint=False):
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TEMPORARY TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP')
+            cursor.copy_expert(f'COPY {staging} ({columns}) FROM STDIN', CopyStream(lines()))
+            cursor.execute(
+                f'INSERT INTO {table} AS target ({columns}) SELECT {columns} FROM {staging} '
+                f'ON CONFLICT ({qn(opts.pk.column)}) {on_conflict} '
+                f'RETURNING (xmax = 0)'
+            )
+            created = sum(1 for (inserted,) in cursor.fetchall() if inserted)
+    return created, len(objs) - created
@@ -0,0 +1,116 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.db import connections
+
+
+class ImportStep:
+    """
+    A named unit of import work and the names of the steps it must wait for.
+    """
+
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+    def __repr__(self):
+        return f"ImportStep({self.name!r})"
+
+
+def check_dag(steps):
+    """
+    Validate that every dependency exists and that the steps contain no cycle.
+
+    Returns the steps in an order where every step comes after its dependencies.
+    """
+    by_name = {step.name: step for step in steps}
+    if len(by_name) != len(steps):
+        raise ValueError("Import step names must be unique.")
+    for step in steps:
+        for dependency in step.depends_on:
+            if dependency not in by_name:
+                raise ValueError(f"Import step {step.name!r} depends on unknown step {dependency!r}.")
+
+    visiting, done = set(), {}
+
+    def visit(name, path):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Import steps contain a cycle: {' -> '.join(path + [name])}")
+        visiting.add(name)
+        for dependency in by_name[name].depends_on:
+            visit(dependency, path + [name])
+        visiting.discard(name)
+        done[name] = by_name[name]
+
+    for step in steps:
+        visit(step.name, [])
+    return list(done.values())
+
+
+def _run_step(step):
+    started = time.perf_counter()
+    step.func()
+    return time.perf_counter() - started
+
+
+def _run_step_in_worker(step):
+    try:
+        return _run_step(step)
+    finally:
+        # Every worker thread has its own connection; don't leave it open once the step is done
+        connections.close_all()
+
+
+def run_steps(steps, max_workers=1):
+    """
+    Run the steps as soon as their dependencies have finished, at most `max_workers` at a time.
+
+    Independent branches run concurrently on a thread pool, each thread using
+    its own database connection. A step whose dependency failed is skipped.
+    Returns a {name: seconds} mapping for the steps that ran and a
+    {name: error} mapping for the ones that failed or were skipped.
+
+    With a single worker the steps run one after the other in the calling
+    thread, so they share its connection and any transaction it has open.
+    """
+    ordered = check_dag(steps)
+    finished, failed = {}, {}
+
+    if max_workers == 1:
+        for step in ordered:
+            blocked_by = [name for name in step.depends_on if name in failed]
+            if blocked_by:
+                failed[step.name] = f"skipped, {blocked_by[0]} failed"
+                continue
+            try:
+                finished[step.name] = _run_step(step)
+            except Exception as e:
+                failed[step.name] = e
+        return finished, failed
+
+    pending = list(steps)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while pending or running:
+            for step in list(pending):
+                blocked_by = [name for name in step.depends_on if name in failed]
+                if blocked_by:
+                    failed[step.name] = f"skipped, {blocked_by[0]} failed"
+                    pending.remove(step)
+                elif all(name in finished for name in step.depends_on):
+                    running[executor.submit(_run_step_in_worker, step)] = step
+                    pending.remove(step)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    finished[step.name] = future.result()
+                except Exception as e:
+                    failed[step.name] = e
+    return finished, failed
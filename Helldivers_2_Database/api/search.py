@@ -0,0 +1,222 @@
+import re
+import threading
+import unicodedata
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Lookup, Value
+from django.db.models.functions import Greatest
+
+from .cache import dataset_state
+from .models import Armor, Booster, Item, Planet, Weapon
+
+# Share of the query's trigrams a name must contain to match without containing the query itself,
+# the default pg_trgm.word_similarity_threshold
+SIMILARITY_THRESHOLD = 0.6
+WORD_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def planet_columns():
+    # The name and every name_* locale column
+    return tuple(field.attname for field in Planet._meta.concrete_fields if field.name.startswith('name'))
+
+
+def searched_models():
+    """
+    Return {result type: (model, columns searched)}.
+    """
+    return {
+        'planet': (Planet, planet_columns()),
+        'weapon': (Weapon, ('name',)),
+        'armor': (Armor, ('name',)),
+        'booster': (Booster, ('name',)),
+        'item': (Item, ('name',)),
+    }
+
+
+def normalize(text):
+    # Full-width and half-width forms compare equal, case is ignored in every script, and
+    # punctuation separates words like a space does ('SUPER-TERRE' is found as 'super terre')
+    return ' '.join(WORD_SEPARATORS.split(unicodedata.normalize('NFKC', text).casefold())).strip()
+
+
+def trigrams(text):
+    if len(text) < 3:
+        return {text} if text else set()
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+def score(query, text):
+    """
+    Return how well a normalized name matches a normalized query, from 0 to 1.
+
+    An exact name ranks first, then names starting with the query, then names
+    containing it, then names sharing enough of its trigrams (typos).
+    """
+    if text == query:
+        return 1.0
+    if text.startswith(query):
+        return 0.95
+    if query in text:
+        return 0.9
+    wanted = trigrams(query)
+    shared = len(wanted & trigrams(text)) / len(wanted) if wanted else 0.0
+    return 0.8 * shared if shared >= SIMILARITY_THRESHOLD else 0.0
+
+
+def best_match(query, names, normalized=None):
+    """
+    Return (score, name) of the best matching of `names` for a normalized query.
+
+    `normalized` are the names already normalized, when the caller has them.
+    """
+    if normalized is None:
+        normalized = [normalize(name) if name else None for name in names]
+    return max(
+        ((score(query, text), name) for name, text in zip(names, normalized) if text), default=(0.0, None)
+    )
+
+
+class Ilike(Lookup):
+    # icontains compares UPPER() of the column, which the trigram index of the column itself can't serve
+    lookup_name = 'ilike'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} ILIKE {rhs}', lhs_params + rhs_params
+
+
+def like_pattern(query):
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def result(kind, pk, names, rank, matched):
+    return {'type': kind, 'id': pk, 'name': names[0], 'matched': matched, 'rank': round(rank, 4)}
+
+
+class NgramIndex:
+    """
+    An in-process trigram index of the searched names, for databases without pg_trgm.
+
+    Every normalized name of a row is cut into trigrams, and each trigram
+    maps to the rows having it. A query only scores the rows sharing at least
+    SIMILARITY_THRESHOLD of its trigrams, which every row containing the
+    query does.
+    """
+
+    def __init__(self, documents):
+        # documents: (result type, primary key, names) with the display name first
+        self.documents = []
+        self.postings = {}
+        for position, (kind, pk, names) in enumerate(documents):
+            normalized = [normalize(name) if name else None for name in names]
+            self.documents.append((kind, pk, names, normalized))
+            grams = set()
+            for text in normalized:
+                if text:
+                    grams |= trigrams(text)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+
+    @classmethod
+    def from_database(cls):
+        documents = []
+        for kind, (model, columns) in searched_models().items():
+            for pk, *names in model.objects.values_list('pk', *columns).iterator(chunk_size=2000):
+                documents.append((kind, pk, names))
+        return cls(documents)
+
+    def search(self, query, limit):
+        query = normalize(query)
+        if not query:
+            return []
+        wanted = trigrams(query)
+        if len(query) < 3:
+            # Too short to have a trigram of its own: every name containing it
+            candidates = [
+                position for gram, positions in self.postings.items() if query in gram for position in positions
+            ]
+        else:
+            counts = Counter()
+            for gram in wanted:
+                counts.update(self.postings.get(gram, ()))
+            minimum = SIMILARITY_THRESHOLD * len(wanted)
+            candidates = [position for position, count in counts.items() if count >= minimum]
+        results = []
+        for position in set(candidates):
+            kind, pk, names, normalized = self.documents[position]
+            rank, matched = best_match(query, names, normalized)
+            if rank:
+                results.append(result(kind, pk, names, rank, matched))
+        results.sort(key=lambda item: (-item['rank'], item['type'], str(item['id'])))
+        return results[:limit]
+
+
+_index = (None, None)
+_index_lock = threading.Lock()
+
+
+def ngram_index():
+    """
+    Return the NgramIndex of the current dataset version, building it on the first search after an import.
+    """
+    global _index
+    state = dataset_state()
+    if _index[0] != state:
+        with _index_lock:
+            if _index[0] != state:
+                _index = (state, NgramIndex.from_database())
+    return _index[1]
+
+
+def database_search(query, limit):
+    """
+    Search with pg_trgm, the GIN trigram indexes of migration 0007 serving both the substring and the similarity test.
+
+    The query is normalized first, as NgramIndex.search() does. The names
+    are compared as stored: ILIKE only ignores their case, not accents or
+    full-width forms, and the trigram similarity, which also skips
+    punctuation, catches names that differ from the query that way. The
+    matches are then scored on their normalized names.
+    """
+    query = normalize(query)
+    if not query:
+        return []
+    pattern = like_pattern(query)
+    results = []
+    for kind, (model, columns) in searched_models().items():
+        matches = reduce(or_, (
+            Ilike(F(column), Value(pattern)) | TrigramWordSimilar(F(column), Value(query)) for column in columns
+        ))
+        similarity = [TrigramWordSimilarity(Value(query), column) for column in columns]
+        if len(similarity) > 1:
+            similarity = [Greatest(*similarity, output_field=FloatField())]
+        rows = model.objects.filter(matches).annotate(similarity=similarity[0]).order_by('-similarity')
+        for pk, word_similarity, *names in rows.values_list('pk', 'similarity', *columns)[:limit]:
+            rank, matched = best_match(query, names)
+            if not rank:
+                # Similar enough for pg_trgm, whose word boundaries differ from score()'s
+                rank, matched = 0.8 * (word_similarity or 0.0), names[0]
+            results.append(result(kind, pk, names, rank, matched))
+    results.sort(key=lambda item: (-item['rank'], item['type'], str(item['id'])))
+    return results[:limit]
+
+
+def search_catalog(query, limit=20):
+    """
+    Return the planets, weapons, armors, boosters and items whose name matches `query`, best first.
+
+    Planets match on their name in any language. Each result carries its
+    type, primary key, name, the name that matched and a rank from 0 to 1;
+    a query without letters or digits matches nothing. PostgreSQL searches with its trigram indexes, other databases with an
+    NgramIndex kept in memory per dataset version.
+    """
+    if connection.vendor == 'postgresql':
+        return database_search(query, limit)
+    return ngram_index().search(query, limit)
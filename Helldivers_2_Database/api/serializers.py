@@ -1,31 +1,32 @@
-from rest_framework import serializers
+from .compiled import CompiledModelSerializer
+from .fieldsets import SparseFieldsetSerializer
 from .models import (
     Faction, Sector, Biome, Environmental, Planet,
     WeaponType, FireMode, WeaponTrait, Weapon,
     ArmorSlot, ArmorPassive, Armor, Booster, Item
 )
 
-class FactionSerializer(serializers.ModelSerializer):
+class FactionSerializer(CompiledModelSerializer):
     class Meta:
         model = Faction
         fields = ['id', 'name']
 
-class SectorSerializer(serializers.ModelSerializer):
+class SectorSerializer(CompiledModelSerializer):
     class Meta:
         model = Sector
         fields = ['id', 'name']
 
-class BiomeSerializer(serializers.ModelSerializer):
+class BiomeSerializer(CompiledModelSerializer):
     class Meta:
         model = Biome
         fields = ['id', 'name', 'description']
 
-class EnvironmentalSerializer(serializers.ModelSerializer):
+class EnvironmentalSerializer(CompiledModelSerializer):
     class Meta:
         model = Environmental
         fields = ['id', 'name', 'description']
 
-class PlanetSerializer(serializers.ModelSerializer):
+class PlanetSerializer(SparseFieldsetSerializer):
     sector = SectorSerializer(read_only=True)
     biome = BiomeSerializer(read_only=True)
     environmentals = EnvironmentalSerializer(many=True, read_only=True)
@@ -38,23 +39,31 @@ class PlanetSerializer(serializers.ModelSerializer):
             'name_es_ES', 'name_fr_FR', 'name_it_IT', 'name_ja_JP',
             'name_ko_KO', 'name_ms_MY', 'name_pl_PL'
         ]
-
-class WeaponTypeSerializer(serializers.ModelSerializer):
+        # Served as one `localized_name` with ?lang=
+        localized_fields = {
+            'localized_name': [
+                'name_en_US', 'name_en_GB', 'name_pt_BR', 'name_de_DE',
+                'name_es_ES', 'name_fr_FR', 'name_it_IT', 'name_ja_JP',
+                'name_ko_KO', 'name_ms_MY', 'name_pl_PL'
+            ]
+        }
+
+class WeaponTypeSerializer(CompiledModelSerializer):
     class Meta:
         model = WeaponType
         fields = ['id', 'name']
 
-class FireModeSerializer(serializers.ModelSerializer):
+class FireModeSerializer(CompiledModelSerializer):
     class Meta:
         model = FireMode
         fields = ['id', 'name']
 
-class WeaponTraitSerializer(serializers.ModelSerializer):
+class WeaponTraitSerializer(CompiledModelSerializer):
     class Meta:
         model = WeaponTrait
         fields = ['id', 'name', 'description']
 
-class WeaponSerializer(serializers.ModelSerializer):
+class WeaponSerializer(SparseFieldsetSerializer):
     type = WeaponTypeSerializer(read_only=True)
     fire_modes = FireModeSerializer(many=True, read_only=True)
     traits = WeaponTraitSerializer(many=True, read_only=True)
@@ -64,20 +73,21 @@ class WeaponSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'description', 'type', 'damage', 'capacity',
             'recoil', 'fire_rate', 'fire_modes', 'traits',
-            'is_primary', 'is_secondary', 'is_grenade'
+            'is_primary', 'is_secondary', 'is_grenade',
+            'dps', 'damage_per_magazine', 'time_to_empty', 'dps_percentile'
         ]
 
-class ArmorSlotSerializer(serializers.ModelSerializer):
+class ArmorSlotSerializer(CompiledModelSerializer):
     class Meta:
         model = ArmorSlot
         fields = ['id', 'name']
 
-class ArmorPassiveSerializer(serializers.ModelSerializer):
+class ArmorPassiveSerializer(CompiledModelSerializer):
     class Meta:
         model = ArmorPassive
         fields = ['id', 'name', 'description']
 
-class ArmorSerializer(serializers.ModelSerializer):
+class ArmorSerializer(SparseFieldsetSerializer):
     slot = ArmorSlotSerializer(read_only=True)
     passive = ArmorPassiveSerializer(read_only=True)
 
@@ -88,12 +98,12 @@ class ArmorSerializer(serializers.ModelSerializer):
             'armor_rating', 'speed', 'stamina_regen', 'passive'
         ]
 
-class BoosterSerializer(serializers.ModelSerializer):
+class BoosterSerializer(CompiledModelSerializer):
     class Meta:
         model = Booster
         fields = ['id', 'name', 'description']
 
-class ItemSerializer(serializers.ModelSerializer):
+class ItemSerializer(CompiledModelSerializer):
     class Meta:
         model = Item
         fields = ['id', 'name']
@@ -0,0 +1,201 @@
+import time
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.backends.signals import connection_created
+
+from .models import (
+    Faction, Sector, Biome, Environmental, Planet,
+    WeaponType, FireMode, WeaponTrait, Weapon,
+    ArmorSlot, ArmorPassive, Armor, Booster, Item, ImportManifest
+)
+
+SHADOW_SCHEMA = 'import_shadow'
+RETIRED_SCHEMA = 'import_retired'
+
+# Pairs the shadow indexes with the live ones they were cloned from, by definition without the name and schema
+CLONED_INDEXES_SQL = r"""
+    SELECT shadow.indexname, live.indexname
+    FROM pg_indexes live
+    JOIN pg_indexes shadow
+      ON shadow.tablename = live.tablename
+     AND regexp_replace(shadow.indexdef, ' INDEX \S+ ON \S+ ', ' INDEX ON ')
+       = regexp_replace(live.indexdef, ' INDEX \S+ ON \S+ ', ' INDEX ON ')
+    WHERE live.schemaname = %s AND shadow.schemaname = %s AND live.tablename = ANY(%s)
+"""
+# Same for the check constraints, the others being backed by an index or re-created by swap()
+CLONED_CONSTRAINTS_SQL = """
+    SELECT rel.relname, shadow.conname, live.conname
+    FROM pg_constraint live
+    JOIN pg_class rel ON rel.oid = live.conrelid
+    JOIN pg_namespace live_ns ON live_ns.oid = rel.relnamespace
+    JOIN pg_constraint shadow
+      ON shadow.contype = live.contype AND pg_get_constraintdef(shadow.oid) = pg_get_constraintdef(live.oid)
+    JOIN pg_class shadow_rel ON shadow_rel.oid = shadow.conrelid AND shadow_rel.relname = rel.relname
+    JOIN pg_namespace shadow_ns ON shadow_ns.oid = shadow_rel.relnamespace
+    WHERE live.contype = 'c' AND live_ns.nspname = %s AND shadow_ns.nspname = %s AND rel.relname = ANY(%s)
+"""
+
+IMPORTED_MODELS = (
+    Faction, Sector, Biome, Environmental, Planet,
+    WeaponType, FireMode, WeaponTrait, Weapon,
+    ArmorSlot, ArmorPassive, Armor, Booster, Item, ImportManifest,
+)
+
+
+def imported_models():
+    """
+    Return the models the importer writes, including the auto-created many-to-many through models.
+    """
+    models = []
+    for model in IMPORTED_MODELS:
+        models.append(model)
+        for field in model._meta.local_many_to_many:
+            if field.remote_field.through._meta.auto_created:
+                models.append(field.remote_field.through)
+    return models
+
+
+class ShadowImport:
+    """
+    Build a new dataset in a shadow schema and swap it in with one short transaction.
+
+    prepare() clones every imported table into the shadow schema, with its
+    indexes, constraints, defaults and identity columns under their live
+    names, and copies the current rows so the import stays incremental. Inside active() every connection of the alias
+    resolves table names to the shadow schema, so API readers keep querying
+    the untouched live tables without contending on row locks. swap() then
+    moves the live tables out and the shadow tables in and re-creates the
+    foreign keys as NOT VALID; they are validated after the swap has committed,
+    which doesn't block readers. PostgreSQL only.
+    """
+
+    def __init__(self, models=None, using=DEFAULT_DB_ALIAS):
+        self.models = models or imported_models()
+        self.using = using
+        self.connection = connections[using]
+        if self.connection.vendor != 'postgresql':
+            raise ValueError("Shadow imports require PostgreSQL.")
+        self.tables = [model._meta.db_table for model in self.models]
+        self.swap_seconds = None
+
+    def _execute(self, *statements):
+        with self.connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    @property
+    def live_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT current_schema()')
+            return cursor.fetchone()[0]
+
+    def prepare(self):
+        qn = self.connection.ops.quote_name
+        live, shadow = qn(self.live_schema), qn(SHADOW_SCHEMA)
+        self._execute(f'DROP SCHEMA IF EXISTS {shadow} CASCADE', f'CREATE SCHEMA {shadow}')
+        for table in map(qn, self.tables):
+            self._execute(
+                f'CREATE TABLE {shadow}.{table} (LIKE {live}.{table} INCLUDING ALL)',
+                f'INSERT INTO {shadow}.{table} OVERRIDING SYSTEM VALUE SELECT * FROM {live}.{table}',
+            )
+        self._restore_names()
+        # The cloned identity columns start from 1, move them past the copied rows
+        with self.active():
+            self._execute(*self.connection.ops.sequence_reset_sql(no_style(), self.models))
+
+    def _restore_names(self):
+        """
+        Give the indexes and constraints of the shadow tables the names of the live ones they were cloned from.
+
+        LIKE ... INCLUDING ALL names the cloned indexes by PostgreSQL's default
+        rules, and the primary key and unique constraints after their index;
+        migrations that later alter or drop them look them up by the names
+        Django gave them. Renaming an index renames the constraint it backs.
+        """
+        qn = self.connection.ops.quote_name
+        live, shadow = self.live_schema, qn(SHADOW_SCHEMA)
+        with self.connection.cursor() as cursor:
+            cursor.execute(CLONED_INDEXES_SQL, [live, SHADOW_SCHEMA, self.tables])
+            indexes = cursor.fetchall()
+            cursor.execute(CLONED_CONSTRAINTS_SQL, [live, SHADOW_SCHEMA, self.tables])
+            constraints = cursor.fetchall()
+        renamed = set()
+        for cloned, name in indexes:
+            # Identical indexes pair with each other, give each cloned one a single live name
+            if cloned != name and cloned not in renamed and name not in renamed:
+                self._execute(f'ALTER INDEX {shadow}.{qn(cloned)} RENAME TO {qn(name)}')
+                renamed.update((cloned, name))
+        for table, cloned, name in constraints:
+            if cloned != name and (table, cloned) not in renamed and (table, name) not in renamed:
+                self._execute(f'ALTER TABLE {shadow}.{qn(table)} RENAME CONSTRAINT {qn(cloned)} TO {qn(name)}')
+                renamed.update(((table, cloned), (table, name)))
+
+    def _route_to_shadow(self, sender, connection, **kwargs):
+        if connection.alias == self.using:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SET search_path TO {connection.ops.quote_name(SHADOW_SCHEMA)}')
+
+    @contextmanager
+    def active(self):
+        """
+        Point this connection, and any connection opened meanwhile (e.g. by import workers), at the shadow schema.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute('SHOW search_path')
+            search_path = cursor.fetchone()[0]
+        self._route_to_shadow(None, self.connection)
+        connection_created.connect(self._route_to_shadow)
+        try:
+            yield
+        finally:
+            connection_created.disconnect(self._route_to_shadow)
+            with self.connection.cursor() as cursor:
+                cursor.execute('SELECT set_config(%s, %s, false)', ['search_path', search_path])
+
+    def swap(self, before_commit=None):
+        """
+        Replace the live tables with the shadow ones in one transaction and return how long it held the locks.
+
+        `before_commit` is called last in that transaction, e.g. to bump the dataset version along.
+        """
+        qn = self.connection.ops.quote_name
+        live = self.live_schema
+        qualified = [f'{qn(live)}.{qn(table)}' for table in self.tables]
+        started = time.perf_counter()
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            # Foreign keys follow the tables they were declared on, capture them before anything moves
+            cursor.execute(
+                """
+                SELECT con.conname, rel.relname, pg_get_constraintdef(con.oid)
+                FROM pg_constraint con
+                JOIN pg_class rel ON rel.oid = con.conrelid
+                WHERE con.contype = 'f'
+                  AND (con.conrelid = ANY(%s::regclass[]) OR con.confrelid = ANY(%s::regclass[]))
+                """,
+                [qualified, qualified],
+            )
+            foreign_keys = cursor.fetchall()
+            cursor.execute(f'DROP SCHEMA IF EXISTS {qn(RETIRED_SCHEMA)} CASCADE')
+            cursor.execute(f'CREATE SCHEMA {qn(RETIRED_SCHEMA)}')
+            cursor.execute(f'LOCK TABLE {", ".join(qualified)} IN ACCESS EXCLUSIVE MODE')
+            for table in map(qn, self.tables):
+                cursor.execute(f'ALTER TABLE {qn(live)}.{table} SET SCHEMA {qn(RETIRED_SCHEMA)}')
+                cursor.execute(f'ALTER TABLE {qn(SHADOW_SCHEMA)}.{table} SET SCHEMA {qn(live)}')
+            for name, table, definition in foreign_keys:
+                if table not in self.tables:
+                    # Declared on a table outside the import, it still points at the retired table
+                    cursor.execute(f'ALTER TABLE {qn(live)}.{qn(table)} DROP CONSTRAINT {qn(name)}')
+                cursor.execute(f'ALTER TABLE {qn(live)}.{qn(table)} ADD CONSTRAINT {qn(name)} {definition} NOT VALID')
+            if before_commit is not None:
+                before_commit()
+        self.swap_seconds = time.perf_counter() - started
+
+        for name, table, definition in foreign_keys:
+            self._execute(f'ALTER TABLE {qn(live)}.{qn(table)} VALIDATE CONSTRAINT {qn(name)}')
+        self._execute(f'DROP SCHEMA {qn(RETIRED_SCHEMA)} CASCADE', f'DROP SCHEMA {qn(SHADOW_SCHEMA)} CASCADE')
+        return self.swap_seconds
+
+    def discard(self):
+        self._execute(f'DROP SCHEMA IF EXISTS {self.connection.ops.quote_name(SHADOW_SCHEMA)} CASCADE')
@@ -0,0 +1,179 @@
+import os
+import shutil
+import tempfile
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from .cache import dataset_state
+from .columnar import CATALOG_NAME, write_catalog
+from .compression import MIN_LENGTH, available_encodings, compress, negotiate_encoding
+
+# Stands in for the scheme and host of the request in the links of rendered pages
+PLACEHOLDER_ORIGIN = 'http://snapshot.invalid'
+CONTENT_TYPE = 'application/json'
+# Versions kept on disk: the current one, and the previous one for processes that haven't seen the bump yet
+KEEP_VERSIONS = 2
+
+
+def snapshot_dir(state, root=None):
+    # The bump time tells apart two runs of the same version, e.g. after the database was restored
+    version, updated_at = state
+    return os.path.join(root or settings.API_SNAPSHOT_DIR, f'{version}-{updated_at:%Y%m%dT%H%M%S%f}')
+
+
+def snapshot_name(path):
+    return quote(path, safe='') + '.json'
+
+
+class SnapshotRequest(HttpRequest):
+    """
+    A GET request made up for rendering, on the placeholder origin.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.method = 'GET'
+        self.path = self.path_info = path
+        self.META['HTTP_ACCEPT'] = CONTENT_TYPE
+
+    def get_host(self):
+        # Not in ALLOWED_HOSTS, and never seen by clients
+        return PLACEHOLDER_ORIGIN.split('://')[1]
+
+
+def render_list(viewset, path):
+    """
+    Return the JSON bytes of the first page of a list endpoint, as an anonymous request for `path` would get them.
+    """
+    # The catalog file of the new version is not in place yet, and the previous one is out of date
+    view = viewset.as_view(
+        {'get': 'list'}, authentication_classes=[], permission_classes=[], serve_snapshots=False, response_cache=False,
+        serve_catalog=False,
+    )
+    response = view(SnapshotRequest(path))
+    response.render()
+    return response.content
+
+
+def render_details(viewset, prefix):
+    """
+    Yield (path, JSON bytes) of every object of a viewset, as its retrieve action would render them.
+    """
+    view = viewset(request=None, format_kwarg=None, action='retrieve', args=(), kwargs={})
+    serializer_class = view.get_serializer_class()
+    renderer = JSONRenderer()
+    for instance in view.get_queryset().order_by('pk').iterator(chunk_size=2000):
+        data = serializer_class(instance, context={'request': None, 'format': None, 'view': view}).data
+        yield f'/{prefix}/{instance.pk}/', renderer.render(data, CONTENT_TYPE)
+
+
+def write_snapshots(state, root=None):
+    """
+    Render every list endpoint and detail object of the router for a dataset state, and return the number of files.
+
+    `state` is the (version, bump time) pair of dataset_state(). The catalog
+    file that CatalogStore maps is written alongside the rendered responses.
+    The files are written to a temporary directory that is renamed into
+    place once complete, so readers see a version's snapshots entirely or
+    not at all. Other versions than the last KEEP_VERSIONS are removed.
+    """
+    from .urls import router
+
+    root = root or settings.API_SNAPSHOT_DIR
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=root)
+    count = 0
+    try:
+        for prefix, viewset, _ in router.registry:
+            pages = [(f'/{prefix}/', render_list(viewset, f'/{prefix}/'))]
+            for path, content in pages + list(render_details(viewset, prefix)):
+                name = snapshot_name(path)
+                with open(os.path.join(staging, name), 'wb') as file:
+                    file.write(content)
+                count += 1
+                if PLACEHOLDER_ORIGIN.encode() in content or len(content) < MIN_LENGTH:
+                    # Compressed per origin when served instead
+                    continue
+                for encoding in available_encodings():
+                    with open(os.path.join(staging, f'{name}.{encoding}'), 'wb') as file:
+                        file.write(compress(content, encoding))
+        write_catalog(os.path.join(staging, CATALOG_NAME))
+        count += 1
+        target = snapshot_dir(state, root)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    prune_snapshots(state, root)
+    return count
+
+
+def prune_snapshots(state, root=None):
+    root = root or settings.API_SNAPSHOT_DIR
+    current = os.path.basename(snapshot_dir(state, root))
+    for name in os.listdir(root):
+        version = name.split('-')[0]
+        if name == current or not version.isdigit():
+            continue
+        if not state[0] - KEEP_VERSIONS < int(version) < state[0]:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def read_snapshot(path, state, encoding=None):
+    """
+    Return the snapshot bytes of `path` for a dataset state, or None when there are none.
+
+    With an `encoding`, the precompressed variant is returned if the snapshot has one.
+    """
+    if not settings.API_SNAPSHOT_DIR or state[1] is None:
+        return None
+    name = os.path.join(snapshot_dir(state), snapshot_name(path))
+    try:
+        with open(f'{name}.{encoding}' if encoding else name, 'rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+class SnapshotMixin:
+    """
+    Serve list and detail requests from the files that write_snapshots() rendered for the current dataset version.
+
+    Only plain requests have a snapshot: a list without query parameters, a
+    detail by primary key, and JSON as the negotiated format. Anything else,
+    or a version without snapshots, is answered live. Snapshots without links
+    are also stored gzip and brotli compressed, and served that way when the
+    client accepts it.
+    """
+
+    serve_snapshots = True
+
+    def list(self, request, *args, **kwargs):
+        return self.snapshot_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.snapshot_response(super().retrieve, request, *args, **kwargs)
+
+    def snapshot_response(self, handler, request, *args, **kwargs):
+        if not self.serve_snapshots or request.query_params or not isinstance(request.accepted_renderer, JSONRenderer):
+            return handler(request, *args, **kwargs)
+        state = dataset_state()
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is not None:
+            content = read_snapshot(request.path, state, encoding)
+            if content is not None:
+                response = HttpResponse(content, content_type=CONTENT_TYPE)
+                response['Content-Encoding'] = encoding
+                patch_vary_headers(response, ('Accept-Encoding',))
+                return response
+        content = read_snapshot(request.path, state)
+        if content is None:
+            return handler(request, *args, **kwargs)
+        origin = request.build_absolute_uri('/')[:-1]
+        return HttpResponse(content.replace(PLACEHOLDER_ORIGIN.encode(), origin.encode()), content_type=CONTENT_TYPE)
@@ -0,0 +1,165 @@
+import json
+import os
+import random
+
+LOCALES = (
+    'en-US', 'en-GB', 'pt-BR', 'de-DE', 'es-ES', 'fr-FR', 'it-IT', 'ja-JP',
+    'ko-KO', 'ms-MY', 'pl-PL', 'pt-PT', 'ru-RU', 'zh-Hans', 'zh-Hant',
+)
+
+# Code point ranges used for the localized names of non-latin locales, so the files carry multi-byte text
+SCRIPTS = {
+    'ja-JP': (0x30A1, 0x30F6),
+    'ko-KO': (0xAC00, 0xD7A3),
+    'ru-RU': (0x0410, 0x042F),
+    'zh-Hans': (0x4E00, 0x9FA5),
+    'zh-Hant': (0x4E00, 0x9FA5),
+}
+
+SYLLABLES = (
+    'ak', 'bel', 'cor', 'dah', 'el', 'fen', 'gar', 'hel', 'is', 'jor', 'kel', 'len',
+    'mar', 'nox', 'or', 'pra', 'quo', 'ros', 'sol', 'tar', 'ur', 'vel', 'wex', 'zan',
+)
+NUMERALS = ('', '', ' II', ' III', ' IV', ' Prime', ' Major', ' Minor')
+
+
+def _name(rng, words=2):
+    return ' '.join(
+        ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))).capitalize()
+        for _ in range(words)
+    ) + rng.choice(NUMERALS)
+
+
+def _localized_names(rng, name):
+    names = {}
+    for locale in LOCALES:
+        if locale in SCRIPTS:
+            low, high = SCRIPTS[locale]
+            names[locale] = ''.join(chr(rng.randint(low, high)) for _ in range(max(2, len(name) // 2)))
+        else:
+            names[locale] = name.upper()
+    return names
+
+
+def _lookup(prefix, count, described=False):
+    if described:
+        return {
+            f'{prefix}_{index}': {'name': f'{prefix.title()} {index}', 'description': f'Synthetic {prefix} {index}.'}
+            for index in range(count)
+        }
+    return {str(index): f'{prefix.title()} {index}' for index in range(count)}
+
+
+def write_object(path, items):
+    """
+    Write (key, value) pairs as one top-level JSON object without holding them all in memory.
+
+    Returns the number of members written.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    count = 0
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('{')
+        for key, value in items:
+            file.write(',\n  ' if count else '\n  ')
+            file.write(json.dumps(str(key)))
+            file.write(': ')
+            file.write(json.dumps(value, ensure_ascii=False))
+            count += 1
+        file.write('\n}\n')
+    return count
+
+
+def generate_dataset(output_dir, planets=10000, weapons=1000, armors=1000, seed=0):
+    """
+    Write a synthetic dataset shaped like Ressources/Json into `output_dir`.
+
+    Records reference each other the way the real files do: planets point at
+    sectors, biomes and environmentals and carry localized names, weapons at
+    their type, fire modes and traits, armors at their slot and passive. The
+    same arguments always produce the same files. Returns a {relative path:
+    record count} mapping.
+    """
+    rng = random.Random(seed)
+    biomes = _lookup('biome', 20, described=True)
+    environmentals = _lookup('environmental', 15, described=True)
+    weapon_types = _lookup('type', 10)
+    fire_modes = _lookup('mode', 10)
+    traits = _lookup('trait', 12)
+    slots = {'0': 'Head', '1': 'Cloak', '2': 'Body'}
+    passives = {
+        str(index): {'name': f'Passive {index}', 'description': f'Synthetic passive {index}.'}
+        for index in range(15)
+    }
+    sectors = [_name(rng, words=1) for _ in range(max(1, planets // 10))]
+    weapon_ids = rng.sample(range(10 ** 8, 10 ** 10), weapons + armors)
+
+    def planet_records():
+        for planet_id in range(planets):
+            name = _name(rng)
+            yield planet_id, {
+                'name': name,
+                'sector': rng.choice(sectors),
+                'biome': rng.choice(list(biomes)),
+                'environmentals': rng.sample(list(environmentals), rng.randint(1, 3)),
+                'names': _localized_names(rng, name),
+            }
+
+    def weapon_records(ids, grenade=False):
+        for weapon_id in ids:
+            record = {
+                'name': f'{rng.choice("ABGMPRS")}{rng.choice("RGLP")}-{rng.randint(1, 99)} {_name(rng, words=1)}',
+                'description': f'Synthetic weapon {weapon_id}.',
+                'damage': rng.randint(10, 1000),
+                'capacity': rng.randint(1, 250),
+                'recoil': rng.randint(0, 100),
+                'fire_rate': rng.randint(0, 1200),
+            }
+            if not grenade:
+                record['type'] = int(rng.choice(list(weapon_types)))
+                record['fire_mode'] = sorted(int(mode) for mode in rng.sample(list(fire_modes), rng.randint(1, 3)))
+                record['traits'] = sorted(int(trait) for trait in rng.sample(list(traits), rng.randint(1, 3)))
+            yield weapon_id, record
+
+    def armor_records(ids):
+        for armor_id in ids:
+            yield armor_id, {
+                'name': _name(rng),
+                'description': f'Synthetic armor {armor_id}.',
+                'type': 1,
+                'slot': int(rng.choice(list(slots))),
+                'armor_rating': rng.choice((50, 100, 150)),
+                'speed': rng.choice((450, 500, 550)),
+                'stamina_regen': rng.choice((50, 100, 125)),
+                'passive': int(rng.choice(list(passives))),
+            }
+
+    primary_end = weapons * 6 // 10
+    secondary_end = primary_end + weapons * 2 // 10
+
+    files = {
+        'factions.json': {'1': 'Humans', '2': 'Terminids', '3': 'Automaton', '4': 'Illuminate'}.items(),
+        'planets/biomes.json': biomes.items(),
+        'planets/environmentals.json': environmentals.items(),
+        'planets/planets.json': planet_records(),
+        'items/weapons/types.json': weapon_types.items(),
+        'items/weapons/fire_modes.json': fire_modes.items(),
+        'items/weapons/traits.json': traits.items(),
+        'items/weapons/primary.json': weapon_records(weapon_ids[:primary_end]),
+        'items/weapons/secondary.json': weapon_records(weapon_ids[primary_end:secondary_end]),
+        'items/weapons/grenades.json': weapon_records(weapon_ids[secondary_end:weapons], grenade=True),
+        'items/armor/slot.json': slots.items(),
+        'items/armor/passive.json': passives.items(),
+        'items/armor/armor.json': armor_records(weapon_ids[weapons:]),
+        'items/boosters.json': (
+            (booster_id, {'name': _name(rng, words=1), 'description': f'Synthetic booster {booster_id}.'})
+            for booster_id in rng.sample(range(10 ** 8, 10 ** 9), 20)
+        ),
+        'items/item_names.json': (
+            (item_id, {'name': f'Item {item_id}', 'mix_id': str(item_id)}) for item_id in weapon_ids
+        ),
+    }
+    return {
+        relative_path: write_object(os.path.join(output_dir, relative_path), records)
+        for relative_path, records in files.items()
+    }
@@ -1,8 +1,58 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack
+from unittest import mock, skipUnless
+from urllib.parse import parse_qsl, urlparse
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APIClient
-from .models import Faction
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.renderers import JSONRenderer
+from . import compiled
+from .analytics import weapon_stats
+from .columnar import CATALOG_NAME, CatalogStore, StoredRows, Unsupported, catalog_store, write_catalog
+from .cache import VERSION_KEY, bump_dataset_version, dataset_state, get_cache, response_cache_stats
+from .compression import negotiate_encoding
+from .bulk import ForeignKeyResolver, bulk_upsert, get_loader, sync_m2m
+from .fastpath import values_serializer
+from .importer import StageReport, import_all_data
+from .jsonstream import iter_object_items
+from .loadouts import DEFAULT_WEIGHTS, LoadoutCatalog
+from .manifest import ManifestDiff
+from .pagination import CatalogCursorPagination
+from .models import (
+    Faction, Sector, Biome, Environmental, Planet,
+    WeaponType, FireMode, WeaponTrait, Weapon,
+    ArmorSlot, ArmorPassive, Armor, Booster, Item
+)
+from .pgcopy import copy_upsert
+from .scheduler import ImportStep, run_steps
+from .search import NgramIndex, best_match, database_search, ngram_index, searched_models
+from .snapshots import snapshot_dir
+from .synthetic import generate_dataset
+from .urls import router
+from .shadow import ShadowImport
+from .serializers import ArmorSerializer, FactionSerializer, PlanetSerializer, WeaponSerializer
+from .views import (
+    ArmorViewSet, FactionViewSet, ItemViewSet, PlanetViewSet, WeaponViewSet, cache_stats, loadouts,
+    lookup, search
+)
 
 class FactionAPITest(TestCase):
     def setUp(self):
@@ -24,3 +74,1544 @@ class FactionAPITest(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['name'], 'Super Earth')
+
+class BulkUpsertTest(TestCase):
+    def test_creates_and_updates_in_batches(self):
+        """Test that bulk_upsert inserts new rows and updates existing ones"""
+        Item.objects.create(id='1', name='Old name')
+        items = [Item(id=str(i), name=f'Item {i}') for i in range(1, 6)]
+
+        # One existence check plus one upsert per batch of two
+        with self.assertNumQueries(6):
+            created, updated = bulk_upsert(Item, items, batch_size=2)
+
+        self.assertEqual((created, updated), (4, 1))
+        self.assertEqual(Item.objects.count(), 5)
+        self.assertEqual(Item.objects.get(id='1').name, 'Item 1')
+
+    def test_rejects_invalid_batch_size(self):
+        """Test that a non-positive batch size is refused"""
+        with self.assertRaises(ValueError):
+            bulk_upsert(Item, [Item(id='1', name='Item')], batch_size=0)
+
+class SyncM2MTest(TestCase):
+    def setUp(self):
+        self.sector = Sector.objects.create(name="Sol")
+        self.planet = Planet.objects.create(id=1, name="Super Earth", sector=self.sector)
+        Environmental.objects.create(id='none', name='None', description='')
+        Environmental.objects.create(id='sandstorms', name='Sandstorms', description='')
+        self.planet.environmentals.add('none')
+
+    def test_applies_only_the_difference(self):
+        """Test that links are diffed against the through table"""
+        links = {self.planet.pk: ['sandstorms', 'acid_storms']}
+        added, removed, missing = sync_m2m(Planet, 'environmentals', links)
+        self.assertEqual((added, removed), (1, 1))
+        self.assertEqual(missing, [(self.planet.pk, 'acid_storms')])
+        self.assertEqual(list(self.planet.environmentals.values_list('id', flat=True)), ['sandstorms'])
+
+    def test_unchanged_links_touch_no_rows(self):
+        """Test that re-applying the same links only reads"""
+        links = {self.planet.pk: ['none']}
+        # One lookup of the targets and one read of the through table
+        with self.assertNumQueries(2):
+            added, removed, missing = sync_m2m(Planet, 'environmentals', links)
+        self.assertEqual((added, removed, missing), (0, 0, []))
+
+class ForeignKeyResolverTest(TestCase):
+    def test_resolves_from_memory_and_collects_misses(self):
+        """Test that lookups hit the database once per table"""
+        Biome.objects.create(id='mesa', name='Mesa', description='')
+        resolver = ForeignKeyResolver()
+        with self.assertNumQueries(1):
+            self.assertEqual(resolver.resolve(Biome, 'mesa', 'Klen Dahth II'), 'mesa')
+            self.assertIsNone(resolver.resolve(Biome, 'lava', 'Hellmire'))
+            self.assertIsNone(resolver.resolve(Biome, 'lava', 'Mort'))
+        self.assertEqual(resolver.missing, {('Biome', 'lava'): ['Hellmire', 'Mort']})
+
+    def test_creates_missing_rows_in_one_batch(self):
+        """Test that unknown sectors are created together"""
+        Sector.objects.create(name='Sol')
+        resolver = ForeignKeyResolver()
+        sector_ids = resolver.resolve_or_create(Sector, 'name', ['Sol', 'Altus', 'Altus', 'Barnard'])
+        self.assertEqual(Sector.objects.count(), 3)
+        self.assertEqual(sector_ids['Altus'], Sector.objects.get(name='Altus').pk)
+
+class ManifestDiffTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'boosters.json')
+        self.data = {'1': {'name': 'Stamina Enhancement'}, '2': {'name': 'Vitality Enhancement'}}
+        self.write(self.data)
+        changes = ManifestDiff(self.path, Booster)
+        list(changes.batches())
+        changes.save()
+        Booster.objects.create(id='1', name='Stamina Enhancement')
+        Booster.objects.create(id='2', name='Vitality Enhancement')
+
+    def write(self, data, **kwargs):
+        with open(self.path, 'w') as file:
+            json.dump(data, file, **kwargs)
+
+    def test_unchanged_file_is_skipped(self):
+        """Test that an identical file is not decoded again"""
+        changes = ManifestDiff(self.path, Booster)
+        self.assertTrue(changes.unchanged)
+
+    def test_only_changed_and_removed_records_are_reported(self):
+        """Test that the diff is computed per record"""
+        self.write({'1': {'name': 'Stamina Enhancement'}, '3': {'name': 'Muscle Enhancement'}}, indent=2)
+        changes = ManifestDiff(self.path, Booster)
+        self.assertFalse(changes.unchanged)
+        self.assertEqual(list(changes.batches()), [{'3': {'name': 'Muscle Enhancement'}}])
+        self.assertEqual(changes.removed, ['2'])
+        self.assertEqual(changes.delete_removed(), 1)
+        self.assertFalse(Booster.objects.filter(id='2').exists())
+
+    def test_force_marks_every_record_changed(self):
+        """Test that force re-imports identical files, in bounded batches"""
+        changes = ManifestDiff(self.path, Booster, force=True)
+        self.assertEqual(list(changes.batches(batch_size=1)), [{'1': self.data['1']}, {'2': self.data['2']}])
+        self.assertEqual(changes.changed, 2)
+
+
+class ObjectStreamReaderTest(SimpleTestCase):
+    def test_matches_json_load_with_tiny_chunks(self):
+        """Test that members split across chunk boundaries decode like json.load"""
+        data = {
+            '0': {'name': 'Super Earth', 'names': {'ja-JP': 'スーパーアース'}, 'environmentals': ['none']},
+            '1': 'Light Armor Penetrating',
+            '2': 12345,
+            '3': [1.5, True, None, 'a\\"b'],
+        }
+        raw = json.dumps(data, ensure_ascii=False, indent=1).encode('utf-8')
+        for chunk_size in (1, 3, 64):
+            items = list(iter_object_items(io.BytesIO(raw), chunk_size=chunk_size))
+            self.assertEqual(items, list(data.items()))
+
+    def test_rejects_invalid_json(self):
+        """Test that truncated or non-object files raise JSONDecodeError"""
+        for raw in (b'{"a": 1', b'[1, 2]', b'{"a" 1}'):
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_object_items(io.BytesIO(raw), chunk_size=2))
+
+
+class ImportSchedulerTest(SimpleTestCase):
+    def test_runs_steps_after_their_dependencies(self):
+        """Test that every step starts only once its dependencies are done"""
+        order = []
+        steps = [
+            ImportStep('planets', lambda: order.append('planets'), depends_on=['biomes']),
+            ImportStep('biomes', lambda: order.append('biomes')),
+            ImportStep('armors', lambda: order.append('armors'), depends_on=['armor_slots']),
+            ImportStep('armor_slots', lambda: order.append('armor_slots')),
+        ]
+        finished, failed = run_steps(steps, max_workers=2)
+        self.assertEqual(set(finished), {'planets', 'biomes', 'armors', 'armor_slots'})
+        self.assertEqual(failed, {})
+        self.assertLess(order.index('biomes'), order.index('planets'))
+        self.assertLess(order.index('armor_slots'), order.index('armors'))
+
+    def test_independent_branches_run_concurrently(self):
+        """Test that wall time approaches the longest branch"""
+        barrier = threading.Barrier(3, timeout=5)
+        steps = [ImportStep(name, barrier.wait) for name in ('planets', 'weapons', 'armors')]
+        finished, failed = run_steps(steps, max_workers=3)
+        self.assertEqual(failed, {})
+        self.assertEqual(len(finished), 3)
+
+    def test_dependents_of_a_failed_step_are_skipped(self):
+        """Test that a failure stops its branch only"""
+        def fail():
+            raise RuntimeError("boom")
+        steps = [
+            ImportStep('biomes', fail),
+            ImportStep('planets', lambda: None, depends_on=['biomes']),
+            ImportStep('items', lambda: None),
+        ]
+        finished, failed = run_steps(steps)
+        self.assertEqual(set(finished), {'items'})
+        self.assertEqual(set(failed), {'biomes', 'planets'})
+
+    def test_rejects_cycles(self):
+        """Test that a cyclic DAG is refused before anything runs"""
+        steps = [
+            ImportStep('a', lambda: None, depends_on=['b']),
+            ImportStep('b', lambda: None, depends_on=['a']),
+        ]
+        with self.assertRaises(ValueError):
+            run_steps(steps)
+
+@skipUnless(connection.vendor == 'postgresql', "COPY is PostgreSQL-only")
+class CopyUpsertTest(TestCase):
+    def test_streams_and_merges_rows(self):
+        """Test that COPY + ON CONFLICT keeps values intact and counts created rows"""
+        Booster.objects.create(id='1', name='Old name')
+        boosters = [
+            Booster(id='1', name='Stamina Enhancement', description=None),
+            Booster(id='2', name='Tab\there', description='Line\nbreak and back\\slash'),
+        ]
+        self.assertEqual(copy_upsert(Booster, boosters), (1, 1))
+        self.assertEqual(Booster.objects.get(id='1').name, 'Stamina Enhancement')
+        self.assertIsNone(Booster.objects.get(id='1').description)
+        self.assertEqual(Booster.objects.get(id='2').name, 'Tab\there')
+        self.assertEqual(Booster.objects.get(id='2').description, 'Line\nbreak and back\\slash')
+
+    def test_bulk_upsert_uses_copy_loader(self):
+        """Test that the copy loader goes through the staging table"""
+        with CaptureQueriesContext(connection) as queries:
+            bulk_upsert(Item, [Item(id='1', name='Item')], loader='copy')
+        self.assertTrue(any('_staging_' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(Item.objects.get(id='1').name, 'Item')
+
+
+class LoaderSettingTest(SimpleTestCase):
+    def test_rejects_unknown_loader(self):
+        """Test that a misspelled loader fails loudly"""
+        with self.assertRaises(ValueError):
+            get_loader('cpoy')
+
+
+class StageReportTest(SimpleTestCase):
+    def test_peak_memory_of_a_stage(self):
+        """Test that a stage run with memory tracing records its own peak, with or without tracemalloc.reset_peak()"""
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        for reset_peak in (True, False):
+            with self.subTest(reset_peak=reset_peak), mock.patch.dict(tracemalloc.__dict__):
+                if not reset_peak:
+                    # As on Python 3.8
+                    tracemalloc.__dict__.pop('reset_peak', None)
+                report = StageReport('factions', stdout=io.StringIO(), track_memory=True)
+                report.run(lambda: bytearray(2 ** 20))
+                self.assertTrue(tracemalloc.is_tracing())
+                self.assertGreaterEqual(report.peak_memory, 2 ** 20)
+
+
+class ImportJsonCommandTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.data_dir = directory.name
+        with open(os.path.join(self.data_dir, 'factions.json'), 'w') as file:
+            json.dump({'1': 'Humans', '2': 'Terminids'}, file)
+
+    def import_json(self, *args):
+        out = io.StringIO()
+        call_command('import_json', '--only', 'factions', '--data-dir', self.data_dir, '--workers', '1', *args, stdout=out)
+        return out.getvalue()
+
+    def test_reports_rows_and_queries_per_stage(self):
+        """Test that the final table has the counters of each imported stage"""
+        output = self.import_json('--quiet')
+        self.assertEqual(Faction.objects.count(), 2)
+        self.assertNotIn('Importing factions data', output)
+        row = next(line.split() for line in output.splitlines() if line.startswith('factions '))
+        self.assertEqual(row[1:3], ['2', '2'])
+        self.assertGreater(int(row[3]), 0)
+
+    def test_dry_run_rolls_back(self):
+        """Test that --dry-run reports the import but leaves the database untouched"""
+        output = self.import_json('--dry-run')
+        self.assertIn('Importing factions data', output)
+        self.assertIn('Dry run', output)
+        self.assertEqual(Faction.objects.count(), 0)
+
+    def test_version_is_bumped_in_the_last_stage_transaction(self):
+        """Test that the dataset version is bumped before the last stage commits, along with its rows"""
+        depth = len(connection.atomic_blocks)
+        bumps = []
+
+        def bump():
+            bumps.append((len(connection.atomic_blocks), Faction.objects.count()))
+            return bump_dataset_version()
+        with mock.patch('Helldivers_2_Database.api.importer.bump_dataset_version', side_effect=bump):
+            output = self.import_json('--quiet')
+        self.assertEqual(bumps, [(depth + 1, 2)])
+        self.assertIn('Dataset version is now', output)
+
+    @override_settings(API_SNAPSHOT_DIR=tempfile.gettempdir())
+    def test_snapshot_error_fails_the_command(self):
+        """Test that the command exits with an error when the snapshots of the new version can't be written"""
+        with mock.patch('Helldivers_2_Database.api.importer.write_snapshots', side_effect=OSError('disk full')):
+            with self.assertRaisesMessage(CommandError, 'disk full'):
+                self.import_json('--quiet')
+        self.assertEqual(Faction.objects.count(), 2)
+
+    def test_rejects_unknown_stage(self):
+        """Test that --only fails on a misspelled stage"""
+        with self.assertRaises(CommandError):
+            call_command('import_json', '--only', 'planetz', stdout=io.StringIO())
+
+
+class SyntheticDatasetTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.data_dir = directory.name
+
+    def test_same_seed_gives_same_files(self):
+        """Test that the generator is deterministic"""
+        other = tempfile.TemporaryDirectory()
+        self.addCleanup(other.cleanup)
+        generate_dataset(self.data_dir, planets=20, weapons=10, armors=5, seed=7)
+        generate_dataset(other.name, planets=20, weapons=10, armors=5, seed=7)
+        for name in ('planets/planets.json', 'items/weapons/primary.json', 'items/armor/armor.json'):
+            with open(os.path.join(self.data_dir, name), 'rb') as first, open(os.path.join(other.name, name), 'rb') as second:
+                self.assertEqual(first.read(), second.read())
+
+    def test_dataset_imports_with_every_reference_resolved(self):
+        """Test that a generated dataset imports cleanly and records stats per stage"""
+        counts = generate_dataset(self.data_dir, planets=30, weapons=10, armors=5)
+        run = import_all_data(data_dir=self.data_dir, workers=1, quiet=True, stdout=io.StringIO())
+        self.assertTrue(run.ok)
+        self.assertEqual(Planet.objects.count(), counts['planets/planets.json'])
+        self.assertEqual(Weapon.objects.count(), 10)
+        self.assertEqual(Armor.objects.count(), 5)
+        self.assertFalse(Planet.objects.filter(name_de_DE__isnull=True).exists())
+        self.assertTrue(Weapon.objects.filter(is_primary=True, fire_modes__isnull=False).exists())
+        planets = next(report for report in run.reports if report.name == 'planets')
+        self.assertEqual(planets.rows_read, 30)
+        self.assertIsNotNone(planets.peak_memory)
+
+    def test_failed_lookup_stage_skips_its_dependents(self):
+        """Test that a stage reporting an error fails, and the stages depending on it don't run on partial lookups"""
+        generate_dataset(self.data_dir, planets=10, weapons=5, armors=5, seed=1)
+        with open(os.path.join(self.data_dir, 'planets/biomes.json'), 'w') as file:
+            file.write('{"1": ')
+        run = import_all_data(data_dir=self.data_dir, workers=1, quiet=True, stdout=io.StringIO())
+        self.assertFalse(run.ok)
+        self.assertIn('biomes', run.failed)
+        self.assertEqual(run.failed['planets'], 'skipped, biomes failed')
+        self.assertEqual(Planet.objects.count(), 0)
+        # Independent branches still import, and what they wrote is published
+        self.assertEqual(Weapon.objects.count(), 5)
+        self.assertIsNotNone(run.dataset_version)
+
+    def test_references_come_back_with_their_rows(self):
+        """Test that removing a lookup row and restoring it restores the references and links of unchanged records"""
+        generate_dataset(self.data_dir, planets=10, weapons=5, armors=5, seed=1)
+        import_all_data(data_dir=self.data_dir, workers=1, quiet=True, stdout=io.StringIO())
+        planet = Planet.objects.filter(biome__isnull=False, environmentals__isnull=False).first()
+        biome, environmental = planet.biome_id, planet.environmentals.first().pk
+        files = {name: os.path.join(self.data_dir, f'planets/{name}.json') for name in ('biomes', 'environmentals')}
+        saved = {}
+        for name, key in (('biomes', biome), ('environmentals', environmental)):
+            with open(files[name]) as file:
+                saved[name] = json.load(file)
+            with open(files[name], 'w') as file:
+                json.dump({other: value for other, value in saved[name].items() if other != key}, file)
+        import_all_data(data_dir=self.data_dir, workers=1, quiet=True, stdout=io.StringIO())
+        planet.refresh_from_db()
+        self.assertIsNone(planet.biome_id)
+        self.assertNotIn(environmental, planet.environmentals.values_list('pk', flat=True))
+
+        for name, data in saved.items():
+            with open(files[name], 'w') as file:
+                json.dump(data, file)
+        import_all_data(data_dir=self.data_dir, workers=1, quiet=True, stdout=io.StringIO())
+        planet.refresh_from_db()
+        self.assertEqual(planet.biome_id, biome)
+        self.assertIn(environmental, planet.environmentals.values_list('pk', flat=True))
+
+    def test_unresolved_references_are_filled_in_later(self):
+        """Test that a record imported with a missing reference is written again once the referenced row exists"""
+        generate_dataset(self.data_dir, planets=10, weapons=5, armors=5, seed=1)
+        path = os.path.join(self.data_dir, 'planets/biomes.json')
+        with open(path) as file:
+            biomes = json.load(file)
+        with open(os.path.join(self.data_dir, 'planets/planets.json')) as file:
+            planet_id, planet = next(iter(json.load(file).items()))
+        with open(path, 'w') as file:
+            json.dump({key: value for key, value in biomes.items() if key != planet['biome']}, file)
+        import_all_data(data_dir=self.data_dir, workers=1, quiet=True, stdout=io.StringIO())
+        self.assertIsNone(Planet.objects.get(pk=planet_id).biome_id)
+
+        # Only the biomes change, the planets file is read again for the planets left without theirs
+        with open(path, 'w') as file:
+            json.dump(biomes, file)
+        import_all_data(data_dir=self.data_dir, workers=1, quiet=True, stdout=io.StringIO())
+        self.assertEqual(Planet.objects.get(pk=planet_id).biome_id, planet['biome'])
+        self.assertFalse(Planet.objects.filter(biome__isnull=True).exists())
+
+
+class ShadowImportTest(TestCase):
+    def test_failed_import_leaves_live_tables_untouched(self):
+        """Test that a shadow import with a failing stage changes nothing"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        generate_dataset(directory.name, planets=10, weapons=5, armors=5)
+        with open(os.path.join(directory.name, 'items/boosters.json'), 'w') as file:
+            file.write('{"1": ')
+        run = import_all_data(data_dir=directory.name, workers=1, quiet=True, stdout=io.StringIO(), shadow=True)
+        self.assertFalse(run.ok)
+        self.assertIsNone(run.swap_seconds)
+        self.assertEqual(Planet.objects.count(), 0)
+        self.assertEqual(Weapon.objects.count(), 0)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Shadow schemas are PostgreSQL-only")
+class ShadowImportNamesTest(TransactionTestCase):
+    def names(self, tables):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT tablename, indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = ANY(%s)
+                UNION SELECT rel.relname, con.conname FROM pg_constraint con JOIN pg_class rel ON rel.oid = con.conrelid
+                WHERE rel.relnamespace = current_schema()::regnamespace AND rel.relname = ANY(%s)
+                """,
+                [tables, tables],
+            )
+            return set(cursor.fetchall())
+
+    def test_swap_keeps_index_and_constraint_names(self):
+        """Test that the swapped-in tables have the indexes and constraints of the live ones, under the same names"""
+        shadow = ShadowImport()
+        before = self.names(shadow.tables)
+        shadow.prepare()
+        shadow.swap()
+        self.assertEqual(self.names(shadow.tables), before)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Shadow schemas are PostgreSQL-only")
+@override_settings(API_RESPONSE_CACHE=False)
+class ShadowImportLatencyTest(TransactionTestCase):
+    def read_planet(self, view, planet_id):
+        request = APIRequestFactory().get(f'/planets/{planet_id}/')
+        force_authenticate(request, user=self.user)
+        started = time.perf_counter()
+        response = view(request, pk=planet_id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return time.perf_counter() - started
+
+    def test_reads_stay_flat_and_consistent_during_import(self):
+        """Test that API reads during a shadow import are neither blocked nor see a partial dataset"""
+        from django.contrib.auth.models import User
+        self.user = User.objects.create_user('reader')
+        old, new = tempfile.TemporaryDirectory(), tempfile.TemporaryDirectory()
+        self.addCleanup(old.cleanup)
+        self.addCleanup(new.cleanup)
+        generate_dataset(old.name, planets=2000, weapons=50, armors=50, seed=1)
+        generate_dataset(new.name, planets=2500, weapons=50, armors=50, seed=2)
+        import_all_data(data_dir=old.name, workers=1, quiet=True, stdout=io.StringIO(), trace_memory=False)
+
+        view = PlanetViewSet.as_view({'get': 'retrieve'})
+        baseline = [self.read_planet(view, planet_id) for planet_id in range(50)]
+
+        # Import from another process so the reads here don't compete with it for the GIL
+        database = connection.settings_dict
+        credentials = database['USER'] + (f":{database['PASSWORD']}" if database['PASSWORD'] else '')
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"postgresql://{credentials}@{database['HOST'] or ''}/{database['NAME']}",
+            API_SNAPSHOT_DIR=settings.API_SNAPSHOT_DIR,
+        )
+        importer = subprocess.Popen(
+            [sys.executable, 'manage.py', 'import_json', '--shadow', '--quiet', '--data-dir', new.name],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        )
+        during, counts = [], set()
+        planet_id = 0
+        while importer.poll() is None:
+            during.append(self.read_planet(view, planet_id))
+            counts.add(Planet.objects.count())
+            planet_id = (planet_id + 1) % 2000
+        output = importer.stdout.read().decode()
+        self.assertEqual(importer.returncode, 0, output)
+        self.assertIn('Swapped the shadow tables in', output)
+
+        self.assertEqual(Planet.objects.count(), 2500)
+        self.assertLessEqual(counts, {2000, 2500})
+        self.assertGreater(len(during), 10)
+        # Generous bounds: the import shares the CPU, but reads must never wait on its locks
+        p95 = statistics.quantiles(during, n=20)[-1]
+        self.assertLess(p95, max(10 * statistics.median(baseline), 0.1))
+        self.assertLess(max(during), 1.0)
+
+
+@override_settings(API_RESPONSE_CACHE=False, API_CACHE_VERSION_TIMEOUT=None)
+class EagerLoadingTest(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.user = User.objects.create_user('reader')
+        # Look the dataset version up once, so the requests below only count their own queries
+        get_cache().delete(VERSION_KEY)
+        dataset_state()
+        self.rows = 0
+
+    def add_rows(self, count):
+        """Add `count` rows to every catalog table, with every relation populated"""
+        for index in range(self.rows, self.rows + count):
+            Faction.objects.create(name=f'Faction {index}')
+            environmentals = [
+                Environmental.objects.create(id=f'env_{index}_{n}', name='Env', description='') for n in range(2)
+            ]
+            planet = Planet.objects.create(
+                name=f'Planet {index}',
+                sector=Sector.objects.create(name=f'Sector {index}'),
+                biome=Biome.objects.create(id=f'biome_{index}', name='Biome', description=''),
+            )
+            planet.environmentals.set(environmentals)
+            weapon = Weapon.objects.create(id=str(index), name='Weapon', type=WeaponType.objects.create(name='Type'))
+            weapon.fire_modes.set([FireMode.objects.create(name='Mode') for _ in range(2)])
+            weapon.traits.set([WeaponTrait.objects.create(name='Trait') for _ in range(2)])
+            Armor.objects.create(
+                id=str(index),
+                name='Armor',
+                slot=ArmorSlot.objects.create(name='Slot'),
+                passive=ArmorPassive.objects.create(name='Passive'),
+            )
+            Booster.objects.create(id=str(index), name='Booster')
+            Item.objects.create(id=str(index), name='Item')
+        self.rows += count
+
+    def get(self, viewset, action, **kwargs):
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=self.user)
+        response = viewset.as_view({'get': action})(request, **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def count_queries(self, viewset, action, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            self.get(viewset, action, **kwargs)
+        return len(queries)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        """Test that no list endpoint issues more queries for a full page than for two rows"""
+        self.add_rows(2)
+        small = {prefix: self.count_queries(viewset, 'list') for prefix, viewset, _ in router.registry}
+        self.add_rows(settings.REST_FRAMEWORK['PAGE_SIZE'])
+        for prefix, viewset, _ in router.registry:
+            with self.subTest(endpoint=prefix):
+                self.assertEqual(self.count_queries(viewset, 'list'), small[prefix])
+
+    def test_detail_queries_match_list_queries(self):
+        """Test that a detail endpoint loads its relations as eagerly as the list"""
+        self.add_rows(3)
+        for prefix, viewset, _ in router.registry:
+            with self.subTest(endpoint=prefix):
+                pk = viewset.queryset.model.objects.values_list('pk', flat=True).first()
+                # Page-number lists also count the rows, cursor pages don't
+                count = 0 if viewset.pagination_class is CatalogCursorPagination else 1
+                self.assertEqual(
+                    self.count_queries(viewset, 'retrieve', pk=pk) + count, self.count_queries(viewset, 'list')
+                )
+
+    def test_nested_serializers_are_eager_loaded(self):
+        """Test the query budget of the endpoints with nested serializers"""
+        self.add_rows(5)
+        views = {prefix: viewset for prefix, viewset, _ in router.registry}
+        # One joined query for the page, then one query per to-many relation
+        with self.assertNumQueries(2):
+            self.get(views['planets'], 'list')
+        with self.assertNumQueries(3):
+            self.get(views['weapons'], 'list')
+        with self.assertNumQueries(1):
+            self.get(views['armors'], 'list')
+
+
+@override_settings(API_RESPONSE_CACHE=False, API_CACHE_VERSION_TIMEOUT=None)
+class ValuesSerializerTest(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.user = User.objects.create_user('reader')
+        # Look the dataset version up once, so the requests below only count their own queries
+        get_cache().delete(VERSION_KEY)
+        dataset_state()
+        environmentals = [
+            Environmental.objects.create(id=env_id, name=env_id.title(), description='Rain\nand "quotes"')
+            for env_id in ('storms', 'acid', 'fog')
+        ]
+        sector = Sector.objects.create(name='Sol')
+        biome = Biome.objects.create(id='desert', name='Desert', description='Sand')
+        for index in range(5):
+            planet = Planet.objects.create(
+                name=f'Planet {index}', sector=sector, biome=biome if index % 2 else None, name_ja_JP='惑星'
+            )
+            planet.environmentals.set(environmentals[index % 3:])
+        modes = [FireMode.objects.create(name=name) for name in ('Semi', 'Burst', 'Auto')]
+        weapon = Weapon.objects.create(id='1', name='Liberator', type=WeaponType.objects.create(name='Rifle'))
+        weapon.fire_modes.set(reversed(modes))
+        weapon.traits.set([WeaponTrait.objects.create(name='Light', description=None)])
+        Weapon.objects.create(id='2', name='Grenade', is_grenade=True)
+        Armor.objects.create(id='1', name='B-01', slot=ArmorSlot.objects.create(name='Body'))
+        Armor.objects.create(id='2', name='FS-05', passive=ArmorPassive.objects.create(name='Padding'))
+
+    def test_output_is_byte_identical(self):
+        """Test that the values() path renders exactly the same JSON as the serializers"""
+        renderer = JSONRenderer()
+        for viewset in (PlanetViewSet, WeaponViewSet, ArmorViewSet):
+            with self.subTest(viewset=viewset.__name__):
+                queryset = viewset().get_queryset().order_by('pk')
+                fast = values_serializer(viewset.serializer_class)
+                self.assertEqual(
+                    renderer.render(fast.serialize(fast.rows(queryset))),
+                    renderer.render(viewset.serializer_class(queryset, many=True).data),
+                )
+
+    def test_list_endpoint_matches_serializer(self):
+        """Test that a list endpoint served from values() answers like the serializer"""
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=self.user)
+        with self.assertNumQueries(2):
+            response = PlanetViewSet.as_view({'get': 'list'})(request)
+        planets = PlanetViewSet().get_queryset().order_by('pk')
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(
+            JSONRenderer().render(response.data['results']),
+            JSONRenderer().render(PlanetSerializer(planets, many=True).data),
+        )
+
+    def test_unsupported_serializers_fall_back(self):
+        """Test that serializers the values() path cannot reproduce are left to DRF"""
+        self.assertIsNotNone(values_serializer(ArmorSerializer))
+        self.assertIsNotNone(values_serializer(WeaponSerializer))
+        self.assertIsNotNone(values_serializer(FactionSerializer))
+
+        from rest_framework import serializers
+
+        class UpperNameSerializer(serializers.ModelSerializer):
+            upper = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Faction
+                fields = ['id', 'upper']
+
+            def get_upper(self, faction):
+                return faction.name.upper()
+
+        self.assertIsNone(values_serializer(UpperNameSerializer))
+
+
+class CompiledSerializerTest(TestCase):
+    setUp = ValuesSerializerTest.setUp
+
+    def drf_data(self, serializer):
+        """Return the data of `serializer` as DRF's own to_representation() builds it"""
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch.object(compiled, 'compile_serializer', return_value=None))
+            pending = list(compiled.CompiledModelSerializer.__subclasses__())
+            while pending:
+                serializer_class = pending.pop()
+                pending.extend(serializer_class.__subclasses__())
+                stack.enter_context(mock.patch.dict(serializer_class._compiled_cache, clear=True))
+            return serializer.data
+
+    def test_output_is_byte_identical(self):
+        """Test that the compiled serializers render exactly the same JSON as DRF"""
+        renderer = JSONRenderer()
+        for viewset in (PlanetViewSet, WeaponViewSet, ArmorViewSet):
+            with self.subTest(viewset=viewset.__name__):
+                queryset = viewset().get_queryset().order_by('pk')
+                self.assertIsNotNone(viewset.serializer_class().compiled())
+                self.assertEqual(
+                    renderer.render(viewset.serializer_class(queryset, many=True).data),
+                    renderer.render(self.drf_data(viewset.serializer_class(queryset, many=True))),
+                )
+                self.assertEqual(
+                    renderer.render(viewset.serializer_class(queryset[0]).data),
+                    renderer.render(self.drf_data(viewset.serializer_class(queryset[0]))),
+                )
+
+    def test_unsupported_serializers_fall_back(self):
+        """Test that serializers the compiler cannot reproduce are left to DRF"""
+        from rest_framework import serializers
+
+        class UpperNameSerializer(compiled.CompiledModelSerializer):
+            upper = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Faction
+                fields = ['id', 'upper']
+
+            def get_upper(self, faction):
+                return faction.name.upper()
+
+        faction = Faction.objects.create(name='Automatons')
+        self.assertIsNone(UpperNameSerializer().compiled())
+        self.assertEqual(UpperNameSerializer(faction).data, {'id': faction.id, 'upper': 'AUTOMATONS'})
+        self.assertEqual(UpperNameSerializer([faction], many=True).data, [{'id': faction.id, 'upper': 'AUTOMATONS'}])
+
+    def test_field_subsets_are_compiled_separately(self):
+        """Test that an instance with fewer fields gets its own compiled function"""
+        armor = Armor.objects.get(pk='2')
+        serializer = ArmorSerializer(armor)
+        for name in list(serializer.fields):
+            if name not in ('id', 'passive'):
+                serializer.fields.pop(name)
+        self.assertEqual(
+            serializer.data, {'id': '2', 'passive': {'id': armor.passive_id, 'name': 'Padding', 'description': None}}
+        )
+        self.assertIsNot(serializer.compiled(), ArmorSerializer().compiled())
+
+
+
+@override_settings(API_RESPONSE_CACHE=False, API_CACHE_VERSION_TIMEOUT=None)
+class SparseFieldsetTest(TestCase):
+    setUp = ValuesSerializerTest.setUp
+
+    def get(self, viewset, params, expected=status.HTTP_200_OK, **kwargs):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=self.user)
+        response = viewset.as_view({'get': 'retrieve' if kwargs else 'list'})(request, **kwargs)
+        self.assertEqual(response.status_code, expected)
+        return response.data
+
+    def test_single_language(self):
+        """Test that ?lang= replaces the name columns by one localized_name, from list and detail alike"""
+        planets = self.get(PlanetViewSet, {'lang': 'ja-JP'})['results']
+        self.assertEqual(planets[0]['localized_name'], '惑星')
+        self.assertFalse([name for name in planets[0] if name.startswith('name_')])
+        self.assertEqual(
+            self.get(PlanetViewSet, {'lang': 'ja_jp', 'fields': 'id,localized_name'}, pk=planets[0]['id']),
+            {'id': planets[0]['id'], 'localized_name': '惑星'},
+        )
+        french = self.get(PlanetViewSet, {'lang': 'fr', 'fields': 'localized_name'})['results']
+        self.assertEqual(french[0], {'localized_name': None})
+
+    def test_projection_is_narrowed(self):
+        """Test that the columns and relations of the fields left out are not queried"""
+        with CaptureQueriesContext(connection) as queries:
+            planets = self.get(PlanetViewSet, {'fields': 'id,name', 'ordering': 'name', 'page_size': 2})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('name_fr_FR', queries[0]['sql'])
+        self.assertNotIn('biomes', queries[0]['sql'])
+        self.assertEqual(set(planets['results'][0]), {'id', 'name'})
+        self.assertIsNotNone(planets['next'])
+        pk = planets['results'][0]['id']
+        with CaptureQueriesContext(connection) as queries:
+            planet = self.get(PlanetViewSet, {'fields': 'sector'}, pk=pk)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('name_fr_FR', queries[0]['sql'])
+        self.assertEqual(planet, {'sector': {'id': Planet.objects.get(pk=pk).sector_id, 'name': 'Sol'}})
+
+    def test_weapons_and_armors(self):
+        """Test that weapons and armors take ?fields=, and ignore ?lang= as they have no localized columns"""
+        weapons = self.get(WeaponViewSet, {'fields': 'fire_modes,id', 'lang': 'de-DE'})['results']
+        modes = [{'id': mode.id, 'name': mode.name} for mode in FireMode.objects.order_by('pk')]
+        self.assertEqual(weapons[0], {'id': '1', 'fire_modes': modes})
+        slot = ArmorSlot.objects.get()
+        self.assertEqual(self.get(ArmorViewSet, {'fields': 'slot'}, pk='1'), {'slot': {'id': slot.id, 'name': 'Body'}})
+
+    def test_unknown_fields_and_languages(self):
+        """Test that a field or language the serializer doesn't have is a 400"""
+        self.assertIn('fields', self.get(PlanetViewSet, {'fields': 'id,mass'}, status.HTTP_400_BAD_REQUEST))
+        self.assertIn('fields', self.get(PlanetViewSet, {'fields': 'localized_name'}, status.HTTP_400_BAD_REQUEST))
+        self.assertIn('lang', self.get(PlanetViewSet, {'lang': 'xx-YY'}, status.HTTP_400_BAD_REQUEST))
+
+    def test_routed_planet_list(self):
+        """Test that /planets/ reaches the API list, with its fieldsets, and the HTML page has a path of its own"""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('planet-list'), {'fields': 'id,localized_name', 'lang': 'ja'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first = Planet.objects.order_by('pk').first()
+        self.assertEqual(response.json()['results'][0], {'id': first.pk, 'localized_name': '惑星'})
+        self.assertEqual(reverse('planets_list'), '/planets/html/')
+        self.assertContains(self.client.get(reverse('planets_list')), 'Planet 0')
+
+
+
+class LookupTest(TestCase):
+    setUp = ValuesSerializerTest.setUp
+
+    def lookup(self, method='get', data=None, expected=status.HTTP_200_OK):
+        factory = APIRequestFactory()
+        request = factory.post('/lookup/', data, format='json') if method == 'post' else factory.get('/lookup/', data)
+        force_authenticate(request, user=self.user)
+        response = lookup(request)
+        self.assertEqual(response.status_code, expected)
+        return response.data
+
+    def test_objects_are_grouped_by_type(self):
+        """Test that IDs resolve to every catalog that has them, in the requested order, and unknown ones are listed"""
+        Booster.objects.create(id='hellpod', name='Hellpod')
+        data = self.lookup(data={'ids': '2,1,hellpod,1,nope'})
+        self.assertEqual([weapon['id'] for weapon in data['weapons']], ['2', '1'])
+        self.assertEqual(data['weapons'][1]['type']['name'], 'Rifle')
+        self.assertEqual([armor['name'] for armor in data['armors']], ['FS-05', 'B-01'])
+        self.assertEqual(data['boosters'], [{'id': 'hellpod', 'name': 'Hellpod', 'description': None}])
+        self.assertEqual(data['items'], [])
+        self.assertEqual(data['unknown'], ['nope'])
+        self.assertEqual(self.lookup('post', {'ids': ['hellpod', 'nope']})['unknown'], ['nope'])
+
+    def test_query_count_does_not_grow_with_ids(self):
+        """Test that resolving many IDs costs the same queries as resolving one"""
+        with CaptureQueriesContext(connection) as one:
+            self.lookup(data={'ids': '1'})
+        with CaptureQueriesContext(connection) as many:
+            self.lookup(data={'ids': ','.join(str(index) for index in range(300))})
+        self.assertEqual(len(many), len(one))
+
+    def test_invalid_requests(self):
+        """Test that a lookup without IDs or with too many of them is a 400"""
+        self.assertIn('ids', self.lookup(expected=status.HTTP_400_BAD_REQUEST))
+        self.assertIn('ids', self.lookup('post', {'ids': 'not a list'}, status.HTTP_400_BAD_REQUEST))
+        with override_settings(API_MAX_LOOKUP_IDS=2):
+            self.assertIn('ids', self.lookup(data={'ids': '1,2,3'}, expected=status.HTTP_400_BAD_REQUEST))
+
+
+
+@override_settings(API_RESPONSE_CACHE=False, API_CACHE_VERSION_TIMEOUT=None)
+class CatalogFilterTest(TestCase):
+    setUp = ValuesSerializerTest.setUp
+
+    def get(self, viewset, params, expected=status.HTTP_200_OK):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=self.user)
+        response = viewset.as_view({'get': 'list'})(request)
+        self.assertEqual(response.status_code, expected)
+        return response.data
+
+    def ids(self, viewset, params):
+        return [row['id'] for row in self.get(viewset, params)['results']]
+
+    def test_filters(self):
+        """Test the filters of the planet, weapon and armor lists"""
+        rifle = WeaponType.objects.get()
+        Weapon.objects.create(id='3', name='Breaker', type=rifle, damage=330, is_primary=True)
+        Weapon.objects.create(id='4', name='Peacemaker', type=rifle, damage=90, is_secondary=True)
+        self.assertEqual(self.ids(WeaponViewSet, {'type': rifle.id, 'is_primary': 'true', 'min_damage': 100}), ['3'])
+        self.assertEqual(self.ids(WeaponViewSet, {'type': rifle.id, 'max_damage': 100}), ['1', '4'])
+        self.assertEqual(self.ids(WeaponViewSet, {'is_grenade': 'true'}), ['2'])
+        self.assertEqual(self.ids(ArmorViewSet, {'passive': ArmorPassive.objects.get().id}), ['2'])
+        self.assertEqual(self.ids(ArmorViewSet, {'slot': ArmorSlot.objects.get().id, 'min_armor_rating': 100}), ['1'])
+        planets = Planet.objects.order_by('pk')
+        self.assertEqual(self.ids(PlanetViewSet, {'biome': 'desert'}), [planet.id for planet in planets[1::2]])
+        # Environmentals are shared by planets 0 and 3 (all three), 1 and 4 (acid, fog), 2 (fog)
+        self.assertEqual(self.ids(PlanetViewSet, {'environmental': 'storms'}), [planets[0].id, planets[3].id])
+        self.assertEqual(len(self.ids(PlanetViewSet, {'environmental': 'fog', 'sector': planets[0].sector_id})), 5)
+
+    def test_routed_planet_filters(self):
+        """Test that the planet filters and ordering apply to /planets/ through the URL conf"""
+        self.client.force_login(self.user)
+        planets = Planet.objects.order_by('pk')
+        params = {'biome': 'desert', 'environmental': 'fog', 'sector': planets[0].sector_id, 'ordering': '-name'}
+        response = self.client.get(reverse('planet-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.json()['results']], [planets[3].id, planets[1].id])
+        response = self.client.get(reverse('planet-list'), {'sector': 'Sol'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering(self):
+        """Test that the lists can be ordered by the indexed columns, one cursor page after another"""
+        for index, damage in enumerate((50, 300, 50, 120)):
+            Weapon.objects.create(id=f'x{index}', name=f'X{index}', damage=damage)
+        page = self.get(WeaponViewSet, {'ordering': '-damage', 'page_size': 2, 'fields': 'id'})
+        self.assertEqual([row['id'] for row in page['results']], ['x1', 'x3'])
+        request = APIRequestFactory().get(page['next'])
+        force_authenticate(request, user=self.user)
+        rest = WeaponViewSet.as_view({'get': 'list'})(request).data['results']
+        self.assertEqual([row['id'] for row in rest], ['x2', 'x0'])
+        self.assertIn('damage', self.get(WeaponViewSet, {'ordering': 'damage'})['results'][0])
+        self.assertEqual(self.ids(ArmorViewSet, {'ordering': '-name'}), ['2', '1'])
+
+    def test_invalid_values(self):
+        """Test that a filter value the column cannot hold is a 400"""
+        self.assertIn('min_damage', self.get(WeaponViewSet, {'min_damage': 'lots'}, status.HTTP_400_BAD_REQUEST))
+        self.assertIn('is_primary', self.get(WeaponViewSet, {'is_primary': 'maybe'}, status.HTTP_400_BAD_REQUEST))
+
+
+@skipUnless(connection.vendor == 'postgresql', "The plans checked are PostgreSQL's")
+@override_settings(API_SNAPSHOT_DIR='')
+class CatalogFilterIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with tempfile.TemporaryDirectory() as data_dir:
+            generate_dataset(data_dir, planets=5000, weapons=2000, armors=2000, seed=3)
+            import_all_data(data_dir=data_dir, workers=1, quiet=True, stdout=io.StringIO())
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def plan(self, viewset, params):
+        """Return the EXPLAIN output of the list query of `viewset` for `params`, with sequential scans discouraged"""
+        request = Request(APIRequestFactory().get('/', params))
+        view = viewset(request=request, format_kwarg=None, action='list', args=(), kwargs={})
+        queryset = view.filter_queryset(view.get_queryset())
+        if 'ordering' in params:
+            queryset = queryset.order_by(*view.paginator.get_ordering(request, queryset, view))[:20]
+        with connection.cursor() as cursor:
+            # Only a plan without any usable index ends up scanning the whole table anyway
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def test_every_filter_uses_an_index(self):
+        """Test that every filter and ordering of the catalog lists is answered from an index other than the key"""
+        weapon = Weapon.objects.exclude(type=None).first()
+        armor = Armor.objects.exclude(slot=None).exclude(passive=None).first()
+        planet = Planet.objects.exclude(biome=None).first()
+        cases = {
+            PlanetViewSet: [
+                {'sector': planet.sector_id},
+                {'biome': planet.biome_id},
+                {'environmental': Environmental.objects.first().id},
+                {'ordering': 'name'},
+            ],
+            WeaponViewSet: [
+                {'type': weapon.type_id},
+                {'type': weapon.type_id, 'min_damage': weapon.damage},
+                {'min_damage': weapon.damage},
+                {'max_damage': weapon.damage},
+                {'is_primary': 'true'},
+                {'is_secondary': 'true'},
+                {'is_grenade': 'true'},
+                {'ordering': 'name'},
+                {'ordering': '-damage'},
+                {'ordering': 'fire_rate'},
+            ],
+            ArmorViewSet: [
+                {'slot': armor.slot_id},
+                {'passive': armor.passive_id},
+                {'slot': armor.slot_id, 'passive': armor.passive_id},
+                {'type': armor.type},
+                {'min_armor_rating': armor.armor_rating},
+                {'ordering': 'name'},
+                {'ordering': 'armor_rating'},
+                {'ordering': '-speed'},
+            ],
+        }
+        for viewset, params_list in cases.items():
+            for params in params_list:
+                with self.subTest(viewset=viewset.__name__, params=params):
+                    plan = self.plan(viewset, params)
+                    self.assertNotIn('Seq Scan', plan)
+                    indexes = re.findall(r'Index (?:Only )?Scan(?: Backward)? (?:using|on) (\w+)', plan)
+                    self.assertTrue([name for name in indexes if not name.endswith('_pkey')], plan)
+
+
+
+@override_settings(API_SNAPSHOT_DIR='')
+class SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+        cls.user = User.objects.create_user('reader')
+        data_dir = os.path.join(settings.BASE_DIR, 'Ressources', 'Json')
+        import_all_data(data_dir=data_dir, workers=1, quiet=True, stdout=io.StringIO())
+
+    def searches(self):
+        """Yield (backend name, search function) for the in-memory index and, on PostgreSQL, pg_trgm"""
+        index = NgramIndex.from_database()
+        yield 'ngram', index.search
+        if connection.vendor == 'postgresql':
+            yield 'database', database_search
+
+    def test_planet_names_in_every_language(self):
+        """Test that a planet is found by its name in any locale, ranked first"""
+        for backend, run in self.searches():
+            for query in ('Super Terre', 'スーパーアース', 'super earth'):
+                with self.subTest(backend=backend, query=query):
+                    best = run(query, 5)[0]
+                    self.assertEqual((best['type'], best['name'], best['rank']), ('planet', 'Super Earth', 1.0))
+            self.assertEqual(run('Super Terre', 5)[0]['matched'], 'SUPER-TERRE')
+
+    def test_partial_and_misspelled_names(self):
+        """Test that part of a name, or a name with a typo, finds the typed objects having it"""
+        for backend, run in self.searches():
+            with self.subTest(backend=backend):
+                results = run('liberat', 20)
+                self.assertLessEqual({'weapon', 'item'}, {result['type'] for result in results})
+                self.assertIn('AR-23 Liberator', [result['name'] for result in results])
+                self.assertEqual(results, sorted(results, key=lambda result: -result['rank']))
+                misspelled = [(result['type'], result['name']) for result in run('Liberatr', 20)]
+                self.assertIn(('weapon', 'AR-23 Liberator'), misspelled)
+                self.assertEqual(run('zzzzqx', 20), [])
+                self.assertEqual(run('-_-', 20), [])
+
+    def test_full_dataset_search_is_bounded(self):
+        """Test that a search of the whole game dataset scores only a few candidates and costs one query per type"""
+        queries = ['Super Terre', 'スーパーアース', 'liberat', 'Liberatr', 'padding', 'B-01', 'stamina', 'su']
+        index = NgramIndex.from_database()
+        for query in queries:
+            with self.subTest(query=query):
+                with self.assertNumQueries(0), mock.patch(
+                    'Helldivers_2_Database.api.search.best_match', wraps=best_match
+                ) as scored:
+                    index.search(query, 20)
+                # The trigram postings leave out nearly every name, timings are for benchmark_search
+                self.assertLess(scored.call_count, len(index.documents) / 10)
+                if connection.vendor == 'postgresql':
+                    with self.assertNumQueries(len(searched_models())):
+                        database_search(query, 20)
+
+    def test_endpoint(self):
+        """Test the /search/ endpoint and its validation"""
+        def get(params, expected=status.HTTP_200_OK):
+            request = APIRequestFactory().get('/search/', params)
+            force_authenticate(request, user=self.user)
+            response = search(request)
+            self.assertEqual(response.status_code, expected)
+            return response.data
+
+        data = get({'q': 'Super Terre', 'limit': 3})
+        self.assertEqual(data['query'], 'Super Terre')
+        self.assertLessEqual(len(data['results']), 3)
+        self.assertEqual(set(data['results'][0]), {'type', 'id', 'name', 'matched', 'rank'})
+        self.assertIn('q', get({'q': ' '}, status.HTTP_400_BAD_REQUEST))
+        self.assertIn('q', get({'q': '!!!'}, status.HTTP_400_BAD_REQUEST))
+        self.assertIn('limit', get({'q': 'super', 'limit': 0}, status.HTTP_400_BAD_REQUEST))
+        self.assertIn('limit', get({'q': 'super', 'limit': 'all'}, status.HTTP_400_BAD_REQUEST))
+
+    def test_index_follows_the_dataset_version(self):
+        """Test that the in-memory index is built once per dataset version"""
+        with mock.patch('Helldivers_2_Database.api.search._index', (None, None)):
+            index = ngram_index()
+            self.assertIs(ngram_index(), index)
+            Booster.objects.create(id='new', name='Orbital Cheese Dispenser')
+            with self.captureOnCommitCallbacks(execute=True):
+                bump_dataset_version()
+            self.assertIsNot(ngram_index(), index)
+            self.assertEqual(ngram_index().search('cheese dispenser', 1)[0]['id'], 'new')
+
+
+@override_settings(API_RESPONSE_CACHE=False, API_CACHE_VERSION_TIMEOUT=None)
+class LoadoutTest(TestCase):
+    def setUp(self):
+        ValuesSerializerTest.setUp(self)
+        rifle = WeaponType.objects.get()
+        Weapon.objects.create(id='3', name='Breaker', type=rifle, damage=330, capacity=16, recoil=10, is_primary=True)
+        Weapon.objects.create(id='4', name='Peacemaker', damage=120, capacity=15, recoil=10, is_secondary=True)
+        Weapon.objects.filter(pk='1').update(damage=60, capacity=45, recoil=10, is_primary=True)
+        Armor.objects.filter(pk='2').update(armor_rating=150)
+        # A new dataset version, so the endpoint doesn't answer from the catalog of an earlier test
+        bump_dataset_version()
+        get_cache().delete(VERSION_KEY)
+
+    def get(self, data=None, expected=status.HTTP_200_OK):
+        request = APIRequestFactory().get('/loadouts/', data)
+        force_authenticate(request, user=self.user)
+        response = loadouts(request)
+        self.assertEqual(response.status_code, expected)
+        return response.data
+
+    def test_top_loadouts_match_brute_force(self):
+        """Test that the pruned search returns the same scores as scoring every combination"""
+        import itertools
+        import numpy as np
+        random = np.random.default_rng(7)
+        armors = [(str(index), index % 3, index % 4, *random.integers(50, 200, 3)) for index in range(40)]
+        weapons = [
+            (str(index), index % 3 == 0, index % 3 == 1, index % 3 == 2, *random.integers(0, 400, 4))
+            for index in range(60)
+        ]
+        catalog = LoadoutCatalog(armors, weapons)
+        weights = {**DEFAULT_WEIGHTS, 'speed': -2.0, 'damage': 3.0}
+        constraints = {'min_armor_rating': 80, 'passive': 1, 'max_recoil': 300}
+        results, counts = catalog.best_loadouts(constraints, weights, k=15)
+
+        armor_ids, armor_scores = catalog.armor_candidates(constraints, weights)
+        parts = [list(zip(catalog.armor_ids[armor_ids], armor_scores))]
+        for role in ('primary', 'secondary', 'grenade'):
+            indices, scores = catalog.weapon_candidates(role, constraints, weights)
+            parts.append(list(zip(catalog.weapons[role][0][indices], scores)))
+        expected = sorted((sum(score for _, score in combo) for combo in itertools.product(*parts)), reverse=True)
+        self.assertEqual([loadout['score'] for loadout in results], [round(score, 4) for score in expected[:15]])
+        self.assertEqual(list(counts.values()), [len(part) for part in parts])
+        self.assertTrue(all(armors[int(loadout['armor'])][2] == 1 for loadout in results))
+
+    def test_endpoint(self):
+        """Test that the endpoint applies the constraints and weights and returns serialized loadouts"""
+        data = self.get({'limit': 5})
+        self.assertEqual(data['candidates'], {'armor': 2, 'primary': 2, 'secondary': 1, 'grenade': 1})
+        self.assertEqual([loadout['primary']['id'] for loadout in data['results']], ['3', '1', '3', '1'])
+        self.assertEqual(data['results'][0]['armor']['name'], 'FS-05')
+        self.assertEqual(data['results'][0]['primary']['type']['name'], 'Rifle')
+
+        data = self.get({'min_damage': 100, 'passive': ArmorPassive.objects.get().id, 'weights': 'damage:-1'})
+        self.assertEqual(data['weights']['damage'], -1.0)
+        self.assertEqual([(loadout['armor']['id'], loadout['primary']['id']) for loadout in data['results']], [('2', '3')])
+        self.assertEqual(self.get({'min_armor_rating': 500})['results'], [])
+
+    def test_invalid_requests(self):
+        """Test that unknown features, non-numeric constraints and out of range limits are a 400"""
+        self.assertIn('weights', self.get({'weights': 'luck:1'}, status.HTTP_400_BAD_REQUEST))
+        self.assertIn('weights', self.get({'weights': 'damage:nan'}, status.HTTP_400_BAD_REQUEST))
+        self.assertIn('min_damage', self.get({'min_damage': 'lots'}, status.HTTP_400_BAD_REQUEST))
+        self.assertIn('limit', self.get({'limit': 51}, status.HTTP_400_BAD_REQUEST))
+
+
+class WeaponStatsTest(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.user = User.objects.create_user('reader')
+        self.data_dir = os.path.join(settings.BASE_DIR, 'Ressources', 'Json')
+
+    def import_weapons(self):
+        return import_all_data(
+            only=['weapon_types', 'fire_modes', 'weapon_traits', 'primary_weapons'], data_dir=self.data_dir,
+            workers=1, quiet=True, stdout=io.StringIO()
+        )
+
+    def get(self, action, data=None):
+        request = APIRequestFactory().get('/weapons/', data)
+        force_authenticate(request, user=self.user)
+        response = WeaponViewSet.as_view({'get': action})(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_vectorized_stats_match_per_weapon_formulas(self):
+        """Test that the one-pass computation gives each weapon's DPS, magazine damage, time to empty and percentile"""
+        import random
+        rng = random.Random(3)
+        weapons = [(rng.randint(0, 500), rng.randint(0, 60), rng.choice([0, 60, 450, 900]), rng.randint(0, 3))
+                   for _ in range(200)]
+        stats = weapon_stats(*zip(*weapons))
+        for index, (damage, capacity, fire_rate, code) in enumerate(weapons):
+            dps = round(damage * fire_rate / 60, 2)
+            same_type = [round(other[0] * other[2] / 60, 2) for other in weapons if other[3] == code]
+            self.assertEqual(stats['dps'][index], dps)
+            self.assertEqual(stats['damage_per_magazine'][index], damage * capacity)
+            self.assertEqual(stats['time_to_empty'][index], round(capacity * 60 / fire_rate, 2) if fire_rate else 0)
+            self.assertAlmostEqual(
+                stats['dps_percentile'][index], 100 * sum(other <= dps for other in same_type) / len(same_type), 2
+            )
+
+    def test_stats_are_stored_at_import(self):
+        """Test that importing weapons also stores their stats, and that an unchanged import rewrites none"""
+        run = self.import_weapons()
+        self.assertTrue(run.ok)
+        liberator = Weapon.objects.get(name='AR-23 Liberator')
+        self.assertEqual(
+            (liberator.dps, liberator.damage_per_magazine, liberator.time_to_empty), (746.67, 3150, 4.22)
+        )
+        for type_id in Weapon.objects.values_list('type', flat=True).distinct():
+            best = Weapon.objects.filter(type=type_id).order_by('-dps').first()
+            self.assertEqual(best.dps_percentile, 100)
+        stats = next(report for report in self.import_weapons().reports if report.name == 'weapon_stats')
+        self.assertEqual((stats.rows_read, stats.rows_written), (Weapon.objects.count(), 0))
+
+    @override_settings(API_RESPONSE_CACHE=False, API_SNAPSHOT_DIR='')
+    def test_filters_orderings_and_rankings(self):
+        """Test that the stats filter and order the weapon list, and rank weapons within their type"""
+        self.import_weapons()
+        data = self.get('list', {'ordering': '-dps', 'min_dps_percentile': 50, 'fields': 'id,dps,dps_percentile'})
+        dps = [weapon['dps'] for weapon in data['results']]
+        self.assertEqual(dps, sorted(dps, reverse=True))
+        self.assertTrue(all(weapon['dps_percentile'] >= 50 for weapon in data['results']))
+
+        rankings = self.get('rankings')
+        self.assertEqual(len(rankings), Weapon.objects.values('type').distinct().count())
+        for group in rankings:
+            self.assertEqual([weapon['rank'] for weapon in group['weapons']], list(range(1, len(group['weapons']) + 1)))
+            self.assertEqual(group['weapons'][0]['dps_percentile'], 100)
+        rifles = self.get('rankings', {'type': rankings[0]['type']['id']})
+        self.assertEqual(rifles, rankings[:1])
+
+
+@override_settings(API_RESPONSE_CACHE=False, API_CACHE_VERSION_TIMEOUT=None)
+class CatalogPaginationTest(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.user = User.objects.create_user('reader')
+        # Look the dataset version up once, so the requests below only count their own queries
+        get_cache().delete(VERSION_KEY)
+        dataset_state()
+        for index in range(25):
+            # Names run backwards from the IDs, and repeat
+            Item.objects.create(id=f'{index:03}', name=f'Item {(30 - index) // 2:02}')
+
+    def get(self, params):
+        request = APIRequestFactory().get('/items/', params)
+        force_authenticate(request, user=self.user)
+        response = ItemViewSet.as_view({'get': 'list'})(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def walk(self, params):
+        """Follow the next links from the first page, returning the IDs and the SQL of every page"""
+        ids, queries = [], []
+        while params is not None:
+            with CaptureQueriesContext(connection) as captured:
+                data = self.get(params)
+            queries.append([query['sql'] for query in captured])
+            ids.extend(item['id'] for item in data['results'])
+            params = data['next'] and dict(parse_qsl(urlparse(data['next']).query))
+        return ids, queries
+
+    def test_pages_are_fetched_by_key(self):
+        """Test that every page, however deep, is one LIMIT query without OFFSET or COUNT"""
+        ids, queries = self.walk({'page_size': 4})
+        self.assertEqual(ids, sorted(Item.objects.values_list('id', flat=True)))
+        self.assertEqual(len(queries), 7)
+        for sql in queries:
+            self.assertEqual(len(sql), 1)
+            self.assertIn('LIMIT 5', sql[0])
+            self.assertNotIn('OFFSET', sql[0])
+            self.assertNotIn('COUNT', sql[0])
+
+    def test_ordering_by_name(self):
+        """Test that ?ordering=name pages through every item by name, then ID"""
+        expected = list(Item.objects.order_by('name', 'id').values_list('id', flat=True))
+        self.assertEqual(self.walk({'ordering': 'name', 'page_size': 4})[0], expected)
+        self.assertEqual(self.walk({'ordering': '-name', 'page_size': 4})[0], expected[::-1])
+        self.assertEqual(self.walk({'ordering': 'description'})[0], sorted(expected))
+
+    def test_page_size_is_capped(self):
+        """Test that clients pick the page size, up to API_MAX_PAGE_SIZE"""
+        self.assertEqual(len(self.get({})['results']), settings.REST_FRAMEWORK['PAGE_SIZE'])
+        self.assertEqual(len(self.get({'page_size': 3})['results']), 3)
+        with mock.patch.object(CatalogCursorPagination, 'max_page_size', 7):
+            self.assertEqual(len(self.get({'page_size': 1000})['results']), 7)
+
+    def test_routed_planet_pages(self):
+        """Test that a client following the next links of /planets/ pages through every planet"""
+        sector = Sector.objects.create(name='Sol')
+        for index in range(12):
+            Planet.objects.create(name=f'Planet {index}', sector=sector)
+        self.client.force_login(self.user)
+        ids = []
+        url = reverse('planet-list') + '?page_size=5'
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            data = response.json()
+            ids.extend(planet['id'] for planet in data['results'])
+            url = data['next']
+            if url is not None:
+                self.assertTrue(url.startswith('http://testserver/planets/?cursor='))
+        self.assertEqual(ids, list(Planet.objects.order_by('pk').values_list('pk', flat=True)))
+
+
+@override_settings(API_SNAPSHOT_DIR='')
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        self.user = User.objects.create_user('reader')
+        for index in range(3):
+            Item.objects.create(id=str(index), name=f'Item {index}')
+
+    def get(self, viewset, params=None, user=None):
+        request = APIRequestFactory().get('/items/', params or {})
+        if user is not False:
+            force_authenticate(request, user=user or self.user)
+        return viewset.as_view({'get': 'list'})(request)
+
+    def test_repeated_requests_are_served_from_cache(self):
+        """Test that a second identical request skips the database and counts as a hit"""
+        with self.assertNumQueries(2):
+            first = self.get(ItemViewSet)
+        with self.assertNumQueries(0):
+            second = self.get(ItemViewSet)
+        self.assertEqual(JSONRenderer().render(second.data), JSONRenderer().render(first.data))
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.get(ItemViewSet, {'page_size': 2}).data['results']), 2)
+        stats = response_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertAlmostEqual(stats['hit_ratio'], 1 / 3)
+
+    def test_permissions_are_checked_before_the_cache(self):
+        """Test that a cached response is never served to an anonymous client"""
+        self.assertEqual(self.get(ItemViewSet).status_code, status.HTTP_200_OK)
+        self.assertIn(
+            self.get(ItemViewSet, user=False).status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+        )
+
+    def test_import_bumps_the_dataset_version(self):
+        """Test that an import which changes rows retires the cached responses, a dry run doesn't"""
+        self.assertEqual(self.get(FactionViewSet).data['count'], 0)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with open(os.path.join(directory.name, 'factions.json'), 'w') as file:
+            json.dump({'1': 'Humans', '2': 'Terminids'}, file)
+
+        options = {'only': ['factions'], 'data_dir': directory.name, 'workers': 1, 'quiet': True, 'stdout': io.StringIO()}
+        self.assertIsNone(import_all_data(dry_run=True, **options).dataset_version)
+        self.assertEqual(self.get(FactionViewSet).data['count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(import_all_data(**options).dataset_version, 1)
+        self.assertEqual(self.get(FactionViewSet).data['count'], 2)
+        # Nothing changed, the cached responses stay valid
+        self.assertIsNone(import_all_data(**options).dataset_version)
+        self.assertEqual(response_cache_stats()['dataset_version'], 1)
+
+    def test_stats_endpoint_is_for_admins(self):
+        """Test that the cache counters are only exposed to staff users"""
+        from django.contrib.auth.models import User
+        request = APIRequestFactory().get('/cache-stats/')
+        force_authenticate(request, user=self.user)
+        self.assertEqual(cache_stats(request).status_code, status.HTTP_403_FORBIDDEN)
+        request = APIRequestFactory().get('/cache-stats/')
+        force_authenticate(request, user=User.objects.create_user('admin', is_staff=True))
+        response = cache_stats(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'hits', 'misses', 'hit_ratio', 'dataset_version'})
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        self.user = User.objects.create_user('reader')
+        Item.objects.create(id='1', name='Item')
+        bump_dataset_version()
+
+    def get(self, params=None, **headers):
+        request = APIRequestFactory().get('/items/', params or {}, **headers)
+        force_authenticate(request, user=self.user)
+        return ItemViewSet.as_view({'get': 'list'})(request)
+
+    def test_unchanged_poll_is_answered_without_queries(self):
+        """Test that If-None-Match with the current ETag gets a 304 before any query runs"""
+        response = self.get()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            response = self.get(HTTP_IF_NONE_MATCH=f'"other", {etag}')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.render().content)
+
+    def test_etag_follows_version_and_parameters(self):
+        """Test that the ETag changes with the request parameters and after an import"""
+        etag = self.get()['ETag']
+        self.assertNotEqual(self.get({'page_size': 1})['ETag'], etag)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=self.get({'page_size': 1})['ETag']).status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_dataset_version()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since is answered from the time of the last import"""
+        last_modified = self.get()['Last-Modified']
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=last_modified).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(
+            self.get(HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2001 00:00:00 GMT').status_code, status.HTTP_200_OK
+        )
+        # If-None-Match takes precedence
+        self.assertEqual(
+            self.get(HTTP_IF_MODIFIED_SINCE=last_modified, HTTP_IF_NONE_MATCH='"other"').status_code,
+            status.HTTP_200_OK,
+        )
+
+
+class SnapshotTest(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        self.user = User.objects.create_user('reader')
+        for name in ('data', 'snapshots'):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            setattr(self, f'{name}_dir', directory.name)
+        snapshot_settings = override_settings(API_SNAPSHOT_DIR=self.snapshots_dir)
+        snapshot_settings.enable()
+        self.addCleanup(snapshot_settings.disable)
+
+    def import_data(self, seed):
+        generate_dataset(self.data_dir, planets=15, weapons=5, armors=5, seed=seed)
+        with self.captureOnCommitCallbacks(execute=True):
+            run = import_all_data(data_dir=self.data_dir, workers=1, quiet=True, stdout=io.StringIO(), force=True)
+        self.assertIsNone(run.snapshot_error)
+        return run
+
+    def get(self, viewset, path, serve_snapshots=True, **kwargs):
+        request = APIRequestFactory().get(path)
+        force_authenticate(request, user=self.user)
+        action = 'retrieve' if kwargs else 'list'
+        view = viewset.as_view({'get': action}, serve_snapshots=serve_snapshots, response_cache=False)
+        response = view(request, **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_snapshots_match_live_responses(self):
+        """Test that every endpoint serves the same bytes from its snapshot as live, without a query"""
+        self.import_data(seed=1)
+        dataset_state()
+        for prefix, viewset, _ in router.registry:
+            with self.subTest(endpoint=prefix):
+                pk = viewset.queryset.model.objects.values_list('pk', flat=True).first()
+                for path, kwargs in ((f'/{prefix}/', {}), (f'/{prefix}/{pk}/', {'pk': pk})):
+                    with self.assertNumQueries(0):
+                        snapshot = self.get(viewset, path, **kwargs)
+                    self.assertFalse(hasattr(snapshot, 'data'))
+                    live = self.get(viewset, path, serve_snapshots=False, **kwargs).render()
+                    self.assertEqual(snapshot.content, live.content)
+        planets = json.loads(self.get(PlanetViewSet, '/planets/').content)
+        self.assertTrue(planets['next'].startswith('http://testserver/planets/?cursor='))
+
+    def test_new_import_replaces_snapshots(self):
+        """Test that an import renders the snapshots of its own version and drops the old ones"""
+        first = self.import_data(seed=1)
+        second = self.import_data(seed=2)
+        self.import_data(seed=3)
+        self.assertEqual(
+            sorted(int(name.split('-')[0]) for name in os.listdir(self.snapshots_dir)),
+            [second.dataset_version, second.dataset_version + 1],
+        )
+        self.assertNotEqual(first.dataset_version, second.dataset_version)
+        name = Planet.objects.order_by('pk').first().name
+        planets = json.loads(self.get(PlanetViewSet, '/planets/').content)
+        self.assertEqual(planets['results'][0]['name'], name)
+
+    def test_other_requests_are_answered_live(self):
+        """Test that requests with query parameters or for other formats skip the snapshots"""
+        self.import_data(seed=1)
+        self.assertTrue(hasattr(self.get(PlanetViewSet, '/planets/?page_size=3'), 'data'))
+        request = APIRequestFactory().get('/planets/', HTTP_ACCEPT='text/html')
+        force_authenticate(request, user=self.user)
+        self.assertTrue(hasattr(PlanetViewSet.as_view({'get': 'list'})(request), 'data'))
+
+
+class CatalogStoreTest(TestCase):
+    setUp = SnapshotTest.setUp
+    import_data = SnapshotTest.import_data
+
+    def get(self, viewset, path, serve_catalog=True, expected=status.HTTP_200_OK, **kwargs):
+        request = APIRequestFactory().get(path)
+        force_authenticate(request, user=self.user)
+        action = 'retrieve' if kwargs else 'list'
+        view = viewset.as_view(
+            {'get': action}, serve_snapshots=False, response_cache=False, serve_catalog=serve_catalog
+        )
+        response = view(request, **kwargs)
+        self.assertEqual(response.status_code, expected)
+        return response.render()
+
+    def test_responses_match_the_database_without_a_query(self):
+        """Test that lists, filters, orderings, pages and details from the catalog file match the database"""
+        self.import_data(seed=1)
+        dataset_state()
+        weapon = Weapon.objects.order_by('pk').first()
+        planet = Planet.objects.filter(environmentals__isnull=False).first()
+        requests = [(viewset, f'/{prefix}/', {}) for prefix, viewset, _ in router.registry]
+        for prefix, viewset, _ in router.registry:
+            pk = viewset.queryset.model.objects.order_by('-pk').values_list('pk', flat=True).first()
+            requests.append((viewset, f'/{prefix}/{pk}/', {'pk': str(pk)}))
+        requests += [
+            (PlanetViewSet, f'/planets/?environmental={planet.environmentals.first().pk}&ordering=-name', {}),
+            (PlanetViewSet, f'/planets/?sector={planet.sector_id}&fields=id,environmentals&page_size=3', {}),
+            (PlanetViewSet, '/planets/?lang=ja&page_size=2', {}),
+            (WeaponViewSet, f'/weapons/?type={weapon.type_id}&is_primary=true&ordering=-dps', {}),
+            (WeaponViewSet, '/weapons/?min_damage=100&ordering=name&page_size=2', {}),
+            (ArmorViewSet, '/armors/?ordering=-armor_rating&page_size=2', {}),
+        ]
+        for viewset, path, kwargs in requests:
+            with self.subTest(path=path):
+                with self.assertNumQueries(0):
+                    stored = self.get(viewset, path, **kwargs)
+                live = self.get(viewset, path, serve_catalog=False, **kwargs)
+                self.assertEqual(stored.content, live.content)
+                # Follow the cursor of the next page on both sides
+                following = json.loads(stored.content).get('next') if not kwargs else None
+                if following:
+                    with self.assertNumQueries(0):
+                        stored = self.get(viewset, following)
+                    self.assertEqual(stored.content, self.get(viewset, following, serve_catalog=False).content)
+
+    def test_unknown_objects_and_invalid_filters(self):
+        """Test that missing objects are a 404 and invalid filter values a 400, as on the database"""
+        self.import_data(seed=1)
+        self.get(WeaponViewSet, '/weapons/nope/', expected=status.HTTP_404_NOT_FOUND, pk='nope')
+        self.get(PlanetViewSet, '/planets/x/', expected=status.HTTP_404_NOT_FOUND, pk='x')
+        self.get(WeaponViewSet, '/weapons/?min_damage=lots', expected=status.HTTP_400_BAD_REQUEST)
+
+    def test_orderings_and_ranges_follow_the_database(self):
+        """Test that stored orderings, NULLs included, and range filters give the rows and order of the database"""
+        self.import_data(seed=1)
+        Weapon.objects.filter(pk__in=list(Weapon.objects.order_by('pk').values_list('pk', flat=True)[:2])).update(
+            type=None, description=None
+        )
+        path = os.path.join(self.data_dir, CATALOG_NAME)
+        write_catalog(path)
+        store = CatalogStore(path)
+        for model, field in ((Weapon, 'type_id'), (Weapon, 'description'), (Weapon, 'dps'), (Planet, 'name')):
+            rows = StoredRows(store.table(model), ['pk'])
+            queryset = model.objects.values_list('pk', flat=True)
+            for ordering in ((field, 'pk'), (f'-{field}', '-pk'), ('pk',), ('-pk',)):
+                with self.subTest(ordering=ordering):
+                    self.assertEqual(
+                        [row['pk'] for row in rows.order_by(*ordering)], list(queryset.order_by(*ordering))
+                    )
+            values = list(queryset.exclude(**{field: None}).order_by(field).values_list(field, flat=True))
+            value = values[len(values) // 2]
+            for lookup_type in ('exact', 'gt', 'gte', 'lt', 'lte'):
+                with self.subTest(field=field, lookup=lookup_type):
+                    filtered = rows.filter(**{f'{field}__{lookup_type}': value}).order_by(field, 'pk')
+                    self.assertEqual(
+                        [row['pk'] for row in filtered],
+                        list(queryset.filter(**{f'{field}__{lookup_type}': value}).order_by(field, 'pk')),
+                    )
+        # A string the column doesn't hold matches nothing, and only the database can place it in a range
+        rows = StoredRows(store.table(Planet), ['pk'])
+        self.assertEqual(len(rows.filter(name='Nowhere')), 0)
+        with self.assertRaises(Unsupported):
+            rows.filter(name__gt='Nowhere')
+        with self.assertRaises(Unsupported):
+            rows.order_by('name', '-pk')
+
+    def test_import_swaps_the_catalog_file(self):
+        """Test that each import writes a catalog file for its version, which readers map once it is current"""
+        first = self.import_data(seed=1)
+        store = catalog_store()
+        self.assertEqual(store.table(Planet).count, Planet.objects.count())
+        self.assertIs(catalog_store(), store)
+        second = self.import_data(seed=2)
+        self.assertNotEqual(first.dataset_version, second.dataset_version)
+        self.assertIsNot(catalog_store(), store)
+        self.assertTrue(os.path.exists(os.path.join(snapshot_dir(dataset_state()), CATALOG_NAME)))
+        name = Planet.objects.order_by('pk').first().name
+        with self.assertNumQueries(0):
+            planets = json.loads(self.get(PlanetViewSet, '/planets/?page_size=1').content)
+        self.assertEqual(planets['results'][0]['name'], name)
+
+
+class CompressionTest(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+        for name in ('data', 'snapshots'):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            setattr(self, f'{name}_dir', directory.name)
+        snapshot_settings = override_settings(API_SNAPSHOT_DIR=self.snapshots_dir)
+        snapshot_settings.enable()
+        self.addCleanup(snapshot_settings.disable)
+        self.client.force_login(User.objects.create_user('reader'))
+        generate_dataset(self.data_dir, planets=15, weapons=5, armors=5, seed=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            import_all_data(data_dir=self.data_dir, workers=1, quiet=True, stdout=io.StringIO())
+
+    def test_negotiate_encoding(self):
+        """Test that Accept-Encoding is honoured, including q-values and wildcards"""
+        self.assertEqual(negotiate_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0, identity'))
+        self.assertEqual(negotiate_encoding('*;q=0.5'), negotiate_encoding('br, gzip'))
+        self.assertIsNone(negotiate_encoding(''))
+        self.assertIsNone(negotiate_encoding(None))
+
+    def test_live_response_is_compressed_once(self):
+        """Test that a live JSON body is gzip compressed for clients that accept it, once"""
+        path = '/planets/?page_size=10'
+        plain = self.client.get(path)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        with mock.patch('gzip.compress', wraps=gzip.compress) as compress:
+            first = self.client.get(path, HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get(path, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(first.content), plain.content)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(first['ETag'], plain['ETag'][:-1] + '-gzip"')
+        response = self.client.get(path, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_snapshot_is_served_precompressed(self):
+        """Test that a snapshot without links is read from its gzip file instead of compressed per request"""
+        path = f'/planets/{Planet.objects.order_by("pk").values_list("pk", flat=True).first()}/'
+        plain = self.client.get(path)
+        with mock.patch('gzip.compress') as compress:
+            response = self.client.get(path, HTTP_ACCEPT_ENCODING='gzip')
+        compress.assert_not_called()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
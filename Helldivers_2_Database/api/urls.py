@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     FactionViewSet, SectorViewSet, BiomeViewSet, EnvironmentalViewSet, PlanetViewSet,
     WeaponTypeViewSet, FireModeViewSet, WeaponTraitViewSet, WeaponViewSet,
-    ArmorSlotViewSet, ArmorPassiveViewSet, ArmorViewSet, BoosterViewSet, ItemViewSet, hello_world, planet_list
+    ArmorSlotViewSet, ArmorPassiveViewSet, ArmorViewSet, BoosterViewSet, ItemViewSet, cache_stats, hello_world, loadouts,
+    lookup, planet_list, search
 )
 
 router = DefaultRouter()
@@ -23,7 +24,11 @@ router.register(r'boosters', BoosterViewSet)
 router.register(r'items', ItemViewSet)
 
 urlpatterns = [
-    path('planets/', planet_list, name='planets_list'),
+    # The HTML page has a path of its own, /planets/ is the API list
+    path('planets/html/', planet_list, name='planets_list'),
+    path('cache-stats/', cache_stats, name='cache_stats'),
+    path('loadouts/', loadouts, name='loadouts'),
+    path('lookup/', lookup, name='lookup'),
+    path('search/', search, name='search'),
     path('', include(router.urls)),
-    path('admin/', include(router.urls))
 ]
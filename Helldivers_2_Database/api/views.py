@@ -1,5 +1,26 @@
+from functools import partial
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models import F
 from django.shortcuts import render
 from rest_framework import viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from .analytics import WEAPON_STATS
+from .cache import ConditionalGetMixin, ResponseCacheMixin, response_cache_stats
+from .columnar import CatalogStoreMixin
+from .fastpath import ValuesListMixin, values_serializer
+from .fieldsets import SparseFieldsetMixin
+from .filters import CatalogFilterBackend
+from .loadouts import ARMOR_CONSTRAINTS, DEFAULT_WEIGHTS, ROLES, WEAPON_CONSTRAINTS, loadout_catalog
+from .mixins import EagerLoadingMixin, eager_loading
+from .pagination import CatalogCursorPagination
+from .search import normalize, search_catalog
+from .snapshots import SnapshotMixin
 from .models import (
     Faction, Sector, Biome, Environmental, Planet,
     WeaponType, FireMode, WeaponTrait, Weapon,
@@ -29,58 +50,259 @@ def planet_list(request):
     }
     return render(request, 'planets.html', context)
 
-class FactionViewSet(viewsets.ReadOnlyModelViewSet):
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    # Hit/miss counters of the API response cache, for monitoring
+    return Response(response_cache_stats())
+
+class CatalogViewSetMixin(
+    ConditionalGetMixin, SnapshotMixin, ResponseCacheMixin, CatalogStoreMixin, SparseFieldsetMixin, EagerLoadingMixin
+):
+    """
+    Conditional GET, snapshots, response caching, the catalog file, sparse fieldsets, filters and eager loading.
+    """
+
+    filter_backends = [CatalogFilterBackend]
+
+class FactionViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Faction.objects.all()
     serializer_class = FactionSerializer
 
-class SectorViewSet(viewsets.ReadOnlyModelViewSet):
+class SectorViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Sector.objects.all()
     serializer_class = SectorSerializer
 
-class BiomeViewSet(viewsets.ReadOnlyModelViewSet):
+class BiomeViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Biome.objects.all()
     serializer_class = BiomeSerializer
 
-class EnvironmentalViewSet(viewsets.ReadOnlyModelViewSet):
+class EnvironmentalViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Environmental.objects.all()
     serializer_class = EnvironmentalSerializer
 
-class PlanetViewSet(viewsets.ReadOnlyModelViewSet):
+class PlanetViewSet(CatalogViewSetMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Planet.objects.all()
     serializer_class = PlanetSerializer
+    pagination_class = CatalogCursorPagination
+    filter_fields = {'sector': 'sector_id', 'biome': 'biome_id', 'environmental': 'environmentals'}
+    ordering_fields = ('name',)
 
-class WeaponTypeViewSet(viewsets.ReadOnlyModelViewSet):
+class WeaponTypeViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = WeaponType.objects.all()
     serializer_class = WeaponTypeSerializer
 
-class FireModeViewSet(viewsets.ReadOnlyModelViewSet):
+class FireModeViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = FireMode.objects.all()
     serializer_class = FireModeSerializer
 
-class WeaponTraitViewSet(viewsets.ReadOnlyModelViewSet):
+class WeaponTraitViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = WeaponTrait.objects.all()
     serializer_class = WeaponTraitSerializer
 
-class WeaponViewSet(viewsets.ReadOnlyModelViewSet):
+class WeaponViewSet(CatalogViewSetMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Weapon.objects.all()
     serializer_class = WeaponSerializer
+    pagination_class = CatalogCursorPagination
+    filter_fields = {
+        'type': 'type_id',
+        'min_damage': 'damage__gte',
+        'max_damage': 'damage__lte',
+        'is_primary': 'is_primary',
+        'is_secondary': 'is_secondary',
+        'is_grenade': 'is_grenade',
+        'min_dps': 'dps__gte',
+        'min_damage_per_magazine': 'damage_per_magazine__gte',
+        'max_time_to_empty': 'time_to_empty__lte',
+        'min_dps_percentile': 'dps_percentile__gte',
+    }
+    ordering_fields = ('name', 'damage', 'fire_rate', 'dps', 'damage_per_magazine', 'time_to_empty')
 
-class ArmorSlotViewSet(viewsets.ReadOnlyModelViewSet):
+    @action(detail=False)
+    def rankings(self, request):
+        # Weapons ranked by DPS within their type, from the stored stats
+        return self.conditional_response(partial(self.cached_response, self.ranked_weapons), request)
+
+    def ranked_weapons(self, request):
+        # Weapons without a type (grenades) come last
+        weapons = self.filter_queryset(self.get_queryset()).order_by(
+            F('type__name').asc(nulls_last=True), 'type_id', '-dps', 'pk'
+        )
+        rankings = []
+        for (type_id, type_name), rows in groupby(
+            weapons.values_list('type_id', 'type__name', 'pk', 'name', *WEAPON_STATS), key=itemgetter(0, 1)
+        ):
+            ranked = [
+                {'rank': rank, 'id': pk, 'name': name, **dict(zip(WEAPON_STATS, stats))}
+                for rank, (_, _, pk, name, *stats) in enumerate(rows, 1)
+            ]
+            weapon_type = {'id': type_id, 'name': type_name} if type_id is not None else None
+            rankings.append({'type': weapon_type, 'weapons': ranked})
+        return Response(rankings)
+
+class ArmorSlotViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = ArmorSlot.objects.all()
     serializer_class = ArmorSlotSerializer
 
-class ArmorPassiveViewSet(viewsets.ReadOnlyModelViewSet):
+class ArmorPassiveViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = ArmorPassive.objects.all()
     serializer_class = ArmorPassiveSerializer
 
-class ArmorViewSet(viewsets.ReadOnlyModelViewSet):
+class ArmorViewSet(CatalogViewSetMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Armor.objects.all()
     serializer_class = ArmorSerializer
+    pagination_class = CatalogCursorPagination
+    filter_fields = {
+        'slot': 'slot_id',
+        'passive': 'passive_id',
+        'type': 'type',
+        'min_armor_rating': 'armor_rating__gte',
+    }
+    ordering_fields = ('name', 'armor_rating', 'speed')
 
-class BoosterViewSet(viewsets.ReadOnlyModelViewSet):
+class BoosterViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Booster.objects.all()
     serializer_class = BoosterSerializer
 
-class ItemViewSet(viewsets.ReadOnlyModelViewSet):
+class ItemViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Item.objects.all()
     serializer_class = ItemSerializer
+    pagination_class = CatalogCursorPagination
+
+# Catalogs keyed by game ID (mix_id), in the order of the /lookup/ response
+LOOKUP_VIEWSETS = {
+    'weapons': WeaponViewSet,
+    'armors': ArmorViewSet,
+    'boosters': BoosterViewSet,
+    'items': ItemViewSet,
+}
+
+def lookup_ids(request):
+    """
+    Return the deduplicated game IDs of a lookup, from ?ids=a,b,... or a JSON body {"ids": [...]}.
+    """
+    if request.method == 'POST':
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not all(isinstance(game_id, str) for game_id in ids):
+            raise ValidationError({'ids': ['Expected a list of game IDs.']})
+    else:
+        ids = [game_id for value in request.query_params.getlist('ids') for game_id in value.split(',')]
+    ids = list(dict.fromkeys(game_id.strip() for game_id in ids if game_id.strip()))
+    if not ids:
+        raise ValidationError({'ids': ['No game IDs given.']})
+    if len(ids) > settings.API_MAX_LOOKUP_IDS:
+        raise ValidationError({'ids': [f'At most {settings.API_MAX_LOOKUP_IDS} game IDs per request.']})
+    return ids
+
+def lookup_objects(serializer_class, ids):
+    """
+    Return the serialized objects of `serializer_class` whose primary key is in `ids`, in the order of `ids`.
+
+    The rows of every batch are read with one query per table, whatever the number of IDs.
+    """
+    model = serializer_class.Meta.model
+    fast = values_serializer(serializer_class)
+    if fast is not None:
+        data = fast.serialize(fast.rows(model.objects.filter(pk__in=ids)))
+    else:
+        select, prefetch = eager_loading(serializer_class)
+        queryset = model.objects.filter(pk__in=ids).select_related(*select).prefetch_related(*prefetch)
+        data = serializer_class(queryset, many=True).data
+    position = {game_id: index for index, game_id in enumerate(ids)}
+    return sorted(data, key=lambda item: position[str(item['id'])])
+
+@api_view(['GET', 'POST'])
+def lookup(request):
+    # Weapons, armors, boosters and items by game ID in one response, for resolving loadouts
+    ids = lookup_ids(request)
+    response = {}
+    found = set()
+    for name, viewset in LOOKUP_VIEWSETS.items():
+        response[name] = lookup_objects(viewset.serializer_class, ids)
+        found.update(str(item['id']) for item in response[name])
+    response['unknown'] = [game_id for game_id in ids if game_id not in found]
+    return Response(response)
+
+# Longest query accepted by /search/
+MAX_SEARCH_LENGTH = 100
+
+@api_view(['GET'])
+def search(request):
+    # Planets (in any language), weapons, armors, boosters and items by name, best match first
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        raise ValidationError({'q': ['No search query given.']})
+    if len(query) > MAX_SEARCH_LENGTH:
+        raise ValidationError({'q': [f'At most {MAX_SEARCH_LENGTH} characters.']})
+    if not normalize(query):
+        # Punctuation alone would otherwise be a prefix of every name
+        raise ValidationError({'q': ['The search query has no letters or digits.']})
+    try:
+        limit = int(request.query_params.get('limit', 20))
+    except ValueError:
+        raise ValidationError({'limit': ['Expected a number.']})
+    if not 1 <= limit <= settings.API_MAX_PAGE_SIZE:
+        raise ValidationError({'limit': [f'Expected a number from 1 to {settings.API_MAX_PAGE_SIZE}.']})
+    return Response({'query': query, 'results': search_catalog(query, limit)})
+
+# Most loadouts returned by /loadouts/
+MAX_LOADOUTS = 50
+
+def loadout_constraints(request):
+    """
+    Return the loadout constraints of the query parameters, every one a whole number.
+    """
+    constraints = {}
+    for name in (*ARMOR_CONSTRAINTS, *WEAPON_CONSTRAINTS):
+        value = request.query_params.get(name, '')
+        if value == '':
+            continue
+        try:
+            constraints[name] = int(value)
+        except ValueError:
+            raise ValidationError({name: ['Expected a whole number.']})
+    return constraints
+
+def loadout_weights(request):
+    """
+    Return the scoring weights of ?weights=damage:2,recoil:-1, the features left out keeping their default.
+    """
+    weights = {}
+    for pair in request.query_params.get('weights', '').split(','):
+        if not pair.strip():
+            continue
+        name, _, value = pair.partition(':')
+        name = name.strip()
+        if name not in DEFAULT_WEIGHTS:
+            choices = ', '.join(DEFAULT_WEIGHTS)
+            raise ValidationError({'weights': [f"Unknown feature '{name}', expected any of: {choices}."]})
+        try:
+            weights[name] = float(value)
+        except ValueError:
+            raise ValidationError({'weights': [f"Expected a number for '{name}'."]})
+        if not -100 <= weights[name] <= 100:
+            raise ValidationError({'weights': [f"Expected a number from -100 to 100 for '{name}'."]})
+    return weights
+
+@api_view(['GET'])
+def loadouts(request):
+    # The best armor x primary x secondary x grenade combinations meeting the constraints, best first
+    constraints = loadout_constraints(request)
+    weights = loadout_weights(request)
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        raise ValidationError({'limit': ['Expected a number.']})
+    if not 1 <= limit <= MAX_LOADOUTS:
+        raise ValidationError({'limit': [f'Expected a number from 1 to {MAX_LOADOUTS}.']})
+    results, candidates = loadout_catalog().best_loadouts(constraints, weights, limit)
+    # Every armor and weapon of the results in two queries
+    armor_ids = list(dict.fromkeys(loadout['armor'] for loadout in results))
+    weapon_ids = list(dict.fromkeys(loadout[role] for loadout in results for role in ROLES))
+    armors = {item['id']: item for item in lookup_objects(ArmorSerializer, armor_ids)}
+    weapons = {item['id']: item for item in lookup_objects(WeaponSerializer, weapon_ids)}
+    for loadout in results:
+        loadout['armor'] = armors[loadout['armor']]
+        for role in ROLES:
+            loadout[role] = weapons[loadout[role]]
+    return Response({'weights': {**DEFAULT_WEIGHTS, **weights}, 'candidates': candidates, 'results': results})
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'Helldivers_2_Database.api.compression.PrecompressedResponseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -138,5 +139,54 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Cache API responses until the next import changes the dataset version
+API_RESPONSE_CACHE = os.getenv('API_RESPONSE_CACHE', 'True') == 'True'
+
+# Cache (from CACHES) holding the API responses, the dataset version and the hit/miss counters
+API_CACHE_ALIAS = os.getenv('API_CACHE_ALIAS', 'default')
+
+# Seconds a cached API response is kept, the dataset version already makes stale ones unreachable
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', '86400'))
+
+# Seconds a process reuses the dataset version it read, i.e. how long a local-memory cache may lag an import
+API_CACHE_VERSION_TIMEOUT = int(os.getenv('API_CACHE_VERSION_TIMEOUT', '5'))
+
+# Directory the import renders the JSON snapshots of the API into, served without touching the database.
+# Must be shared by every server process; an empty value turns snapshots off
+API_SNAPSHOT_DIR = os.getenv('API_SNAPSHOT_DIR', str(BASE_DIR / 'snapshots'))
+
+# Answer catalog list and detail requests from the memory-mapped catalog file written with the snapshots
+API_CATALOG_STORE = os.getenv('API_CATALOG_STORE', 'True') == 'True'
+
+# Compression levels of the gzip and brotli (optional `brotli` package) variants of API responses,
+# produced once per response body so they can be high
+API_GZIP_LEVEL = int(os.getenv('API_GZIP_LEVEL', '9'))
+API_BROTLI_QUALITY = int(os.getenv('API_BROTLI_QUALITY', '9'))
+
+# Largest page a client can request with ?page_size= on the cursor-paginated catalog endpoints
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '100'))
+
+# Most game IDs a client can resolve in one request to /lookup/
+API_MAX_LOOKUP_IDS = int(os.getenv('API_MAX_LOOKUP_IDS', '500'))
+
+# Directory holding the JSON resource files read by `manage.py import_json`
+IMPORT_DATA_DIR = os.getenv('IMPORT_DATA_DIR', 'Ressources/Json')
+
+# Number of rows written per INSERT ... ON CONFLICT statement by `manage.py import_json`
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+
+# 'orm' writes with batched INSERT ... ON CONFLICT, 'copy' streams rows with COPY FROM STDIN on PostgreSQL
+IMPORT_LOADER = os.getenv('IMPORT_LOADER', 'orm')
+
+# Number of independent import steps run concurrently, each on its own database connection
+IMPORT_WORKERS = int(os.getenv('IMPORT_WORKERS', '4'))
+
 # Custom test runner to handle database connections properly
 TEST_RUNNER = 'Helldivers_2_Database.test_runner.TestRunner'
@@ -1,3 +1,6 @@
+import shutil
+import tempfile
+
 from django.test.runner import DiscoverRunner
 from django.db import connections
 import psycopg2.extensions
@@ -10,6 +13,18 @@ class TestRunner(DiscoverRunner):
     when recreating the test database.
     """
 
+    def setup_test_environment(self, **kwargs):
+        """
+        Point API snapshots at a temporary directory, so imports run by tests don't touch the project's.
+        """
+        super().setup_test_environment(**kwargs)
+        self._snapshot_dir = tempfile.mkdtemp(prefix='hd2-snapshots-')
+        settings.API_SNAPSHOT_DIR = self._snapshot_dir
+
+    def teardown_test_environment(self, **kwargs):
+        shutil.rmtree(self._snapshot_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
     def setup_databases(self, **kwargs):
         """
         Close existing connections before setting up test databases.